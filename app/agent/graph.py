@@ -1,32 +1,48 @@
-import operator
-from typing import Dict, TypedDict, Annotated, List
+import asyncio
+import time
+from typing import Dict, TypedDict, Annotated, List, Optional
 
-from langchain_core.messages import BaseMessage, ToolMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
+from app.agent.llm import HedgedModel, build_chat_model
+from app.agent.loop_guard import LOOP_EXIT_MESSAGE, loop_guard_from
+from app.agent.prefetch import INVALIDATING_TOOLS, prefetcher_from
+from app.agent.recording import recorder_from
+from app.agent.routing import FAST_TIER, STRONG_TIER, select_tier
 from app.agent.tools import calendar_tools, search_tools
+from app.agent.utils.message_budget import budget_messages, estimate_message_tokens, format_tool_output
 from app.core.config import settings
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.core.profiling import profile_span
+from app.core.tracing import KIND_CLIENT, SpanContext, trace_span
 
 # --- Agent State Definition ---
 class AgentState(TypedDict):
     """
     Represents the state of our agent. This state is passed between nodes in the graph.
     """
-    messages: Annotated[List[BaseMessage], operator.add]
+    messages: Annotated[List[BaseMessage], budget_messages]
     current_user: Dict
+    # The chat turn's span when the request is traced, so LLM and tool spans nest under it.
+    trace: Optional[SpanContext]
 
 # --- Tool & Model Definition ---
 
 # Collect all the async tools we've built
 tools = [
     calendar_tools.confirm_and_book_event,
+    calendar_tools.book_recurring_event,
     calendar_tools.list_events,
     calendar_tools.delete_event,
     calendar_tools.update_user_timezone,
     calendar_tools.update_event,
     calendar_tools.find_available_slots,
+    calendar_tools.get_team_busyness,
+    calendar_tools.find_common_availability,
     search_tools.search_web,
     search_tools.search_news,
 ]
@@ -34,11 +50,49 @@ tools = [
 # The ToolNode will execute tools when called by the agent
 tool_node = ToolNode(tools)
 
+# Arguments each tool declares with `InjectedToolArg`. They are left out of the schemas
+# bound to the model and supplied by `custom_tool_node` from the graph state.
+INJECTED_ARGS: Dict[str, set] = {
+    tool.name: set(tool.get_input_schema().model_fields) - set(tool.tool_call_schema.model_fields)
+    for tool in tools
+}
+
+# Tools that write to MongoDB and Google Calendar and undo their own partial work on
+# failure. If the turn is cancelled (e.g. the client disconnected), they run to
+# completion in the background instead, so no half-made booking is left behind.
+UNCANCELLABLE_TOOLS = {
+    "confirm_and_book_event",
+    "book_recurring_event",
+    "update_event",
+    "delete_event",
+    "update_user_timezone",
+}
+_background_tools: set = set()
+
 # Define the LLM. Using a specific model and temperature for consistent results.
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+llm = build_chat_model(settings.LLM_PRIMARY_MODEL)
+fallback_llm = build_chat_model(settings.LLM_FALLBACK_MODEL) if settings.LLM_FALLBACK_MODEL else None
+
+# Bind the tools to the LLM, so it knows what functions it can call.
+# Calls are hedged against slow responses and fail over to the fallback model on errors.
+model_with_tools = HedgedModel(
+    primary=llm.bind_tools(tools),
+    primary_name=settings.LLM_PRIMARY_MODEL,
+    fallback=fallback_llm.bind_tools(tools) if fallback_llm else None,
+    fallback_name=settings.LLM_FALLBACK_MODEL,
+)
 
-# Bind the tools to the LLM, so it knows what functions it can call
-model_with_tools = llm.bind_tools(tools)
+# A smaller, faster model for steps that only report tool results back to the user.
+# It fails over to the strong model, so a fast-tier outage never breaks a turn.
+fast_llm = build_chat_model(settings.LLM_FAST_MODEL) if settings.LLM_FAST_MODEL else None
+models_by_tier = {STRONG_TIER: model_with_tools}
+if fast_llm:
+    models_by_tier[FAST_TIER] = HedgedModel(
+        primary=fast_llm.bind_tools(tools),
+        primary_name=settings.LLM_FAST_MODEL,
+        fallback=model_with_tools,
+        fallback_name=settings.LLM_PRIMARY_MODEL,
+    )
 
 # --- Graph Node Definitions ---
 
@@ -50,49 +104,163 @@ def should_continue(state: AgentState) -> str:
     """
     return "tools" if state["messages"][-1].tool_calls else END
 
-async def call_model(state: AgentState) -> Dict:
+async def call_model(state: AgentState, config: RunnableConfig) -> Dict:
     """
     The primary node that calls the LLM.
     It takes the current conversation state and invokes the model.
     """
+    with profile_span(config, "node", "agent"), trace_span("agent.llm", state.get("trace"), KIND_CLIENT) as span:
+        return await _call_model(state, config, span)
+
+async def _call_model(state: AgentState, config: RunnableConfig, span) -> Dict:
     # The custom_tool_node injects the user, so we don't pass it to the model directly
     # This prevents the model from trying to hallucinate the user object.
     messages_for_llm = [msg for msg in state['messages'] if msg.type != 'tool' or 'current_user' not in getattr(msg, 'additional_kwargs', {})]
     
-    response = await model_with_tools.ainvoke(messages_for_llm)
+    tier = select_tier(messages_for_llm)
+    model = models_by_tier.get(tier, model_with_tools)
+
+    # Each attempt (including hedges and failovers) takes its own admission slot.
+    started = time.perf_counter()
+    try:
+        response = await model.ainvoke(messages_for_llm, user_id=state['current_user']['id'])
+    except asyncio.CancelledError:
+        metrics.increment("agent_cancelled_calls_total", kind="llm", tier=tier)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe("agent_step_seconds", elapsed, tier=tier)
+
+    recorder = recorder_from(config)
+    if recorder is not None:
+        recorder.record_llm(tier, messages_for_llm, response, elapsed)
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    if span is not None:
+        span.set_attribute("llm.tier", tier)
+        span.set_attribute("llm.prompt_tokens", usage.get("input_tokens", 0))
+        span.set_attribute("llm.output_tokens", usage.get("output_tokens", 0))
+    metrics.increment("agent_steps_total", tier=tier)
+    metrics.increment("llm_prompt_tokens_total", usage.get("input_tokens", 0), tier=tier)
+    metrics.increment("llm_output_tokens_total", usage.get("output_tokens", 0), tier=tier)
+    logger.info(
+        "call_model[%s]: %d messages, ~%d estimated tokens, %s prompt tokens, %s output tokens",
+        tier,
+        len(messages_for_llm),
+        estimate_message_tokens(messages_for_llm),
+        usage.get("input_tokens", "n/a"),
+        usage.get("output_tokens", "n/a"),
+    )
     return {"messages": [response]}
 
-async def custom_tool_node(state: AgentState):
+async def custom_tool_node(state: AgentState, config: RunnableConfig):
     """
-    A custom tool node that injects the current_user dictionary into
-    every tool call's arguments before execution.
+    A custom tool node that supplies the runtime-injected arguments (the current_user
+    dictionary) to every tool that declares them, before execution.
     """
+    with profile_span(config, "node", "tools"):
+        return await _run_tools(state, config)
+
+async def _run_tools(state: AgentState, config: RunnableConfig):
     tool_messages = []
     # LangChain can handle async tool execution concurrently
     tool_invocation_tasks = []
+    prefetcher = prefetcher_from(config)
+    loop_guard = loop_guard_from(config)
+    if loop_guard is not None:
+        loop_guard.forget_elided(state["messages"])
     
     for tool_call in state["messages"][-1].tool_calls:
         tool_name = tool_call['name']
         for tool_func in tools:
             if tool_func.name == tool_name:
-                # Add current_user to the args for the tool to use
-                tool_args = tool_call['args']
-                tool_args['current_user'] = state['current_user']
+                # Add the injected arguments to a copy, so they never enter the model's own
+                # tool call (which is sent back to it on every later step of the turn)
+                tool_args = dict(tool_call['args'])
+                if 'current_user' in INJECTED_ARGS[tool_name]:
+                    tool_args['current_user'] = state['current_user']
+
+                # An exact repeat of an earlier lookup in this turn gets the earlier answer
+                cached = loop_guard.cached(tool_name, tool_args, tool_call['id']) if loop_guard is not None else None
+                if cached is not None:
+                    tool_messages.append(ToolMessage(content=cached, tool_call_id=tool_call['id'], name=tool_name))
+                    break
                 
-                # Invoke the async tool
-                result = await tool_func.ainvoke(tool_args)
+                # Invoke the async tool, unless its result was already prefetched during the model call
+                started = time.perf_counter()
+                with profile_span(config, "tool", tool_name), trace_span(f"tool.{tool_name}", state.get("trace")) as span:
+                    result = None
+                    if prefetcher is not None:
+                        if tool_name in INVALIDATING_TOOLS:
+                            prefetcher.discard()
+                        else:
+                            result = await prefetcher.take(tool_name, tool_args)
+                    if span is not None:
+                        span.set_attribute("tool.prefetched", result is not None)
+                    if result is None:
+                        result = await _invoke_tool(tool_func, tool_args)
+                recorder = recorder_from(config)
+                if recorder is not None:
+                    recorder.record_tool(tool_name, tool_args, result, time.perf_counter() - started)
                 
-                # Append the result as a ToolMessage
-                tool_messages.append(ToolMessage(content=str(result), tool_call_id=tool_call['id']))
+                # Append the result as a ToolMessage, serialized compactly within the token budget
+                content = format_tool_output(result)
+                if loop_guard is not None:
+                    loop_guard.remember(tool_name, tool_args, content)
+                tool_messages.append(ToolMessage(
+                    content=content,
+                    tool_call_id=tool_call['id'],
+                    name=tool_name,
+                ))
                 break
-                
+
+    if loop_guard is not None:
+        loop_guard.end_step()
     return {"messages": tool_messages}
 
+def after_tools(state: AgentState, config: RunnableConfig) -> str:
+    """
+    Routes tool results back to the agent, or to 'loop_exit' when the loop guard has
+    seen the model repeat itself without making progress.
+    """
+    loop_guard = loop_guard_from(config)
+    return "loop_exit" if loop_guard is not None and loop_guard.tripped else "agent"
+
+def loop_exit(state: AgentState) -> Dict:
+    """
+    Ends a turn that is going in circles with an explanation, in place of the model call
+    (and any further round trips) that would have followed.
+    """
+    repeated = [message.name for message in state["messages"] if isinstance(message, ToolMessage)][-3:]
+    tool_names = ", ".join(f"`{name}`" for name in dict.fromkeys(reversed(repeated)))
+    metrics.increment("agent_loop_guard_exits_total")
+    metrics.increment("agent_llm_iterations_saved_total")
+    logger.info("Loop guard ended a turn repeating %s", tool_names)
+    return {"messages": [AIMessage(content=LOOP_EXIT_MESSAGE.format(tools=tool_names))]}
+
+async def _invoke_tool(tool_func, tool_args: Dict):
+    if tool_func.name not in UNCANCELLABLE_TOOLS:
+        try:
+            return await tool_func.ainvoke(tool_args)
+        except asyncio.CancelledError:
+            metrics.increment("agent_cancelled_calls_total", kind="tool", tool=tool_func.name)
+            raise
+
+    task = asyncio.create_task(tool_func.ainvoke(tool_args))
+    _background_tools.add(task)
+    task.add_done_callback(_background_tools.discard)
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        logger.info("Turn cancelled during %s; letting it finish in the background.", tool_func.name)
+        metrics.increment("agent_shielded_tools_total", tool=tool_func.name)
+        raise
+
 # --- Graph Assembly ---
 workflow = StateGraph(AgentState)
 
 workflow.add_node("agent", call_model)
 workflow.add_node("tools", custom_tool_node) # Using our custom node
+workflow.add_node("loop_exit", loop_exit)
 
 workflow.set_entry_point("agent")
 workflow.add_conditional_edges(
@@ -100,7 +268,12 @@ workflow.add_conditional_edges(
     should_continue,
     {"tools": "tools", END: END}
 )
-workflow.add_edge("tools", "agent")
+workflow.add_conditional_edges(
+    "tools",
+    after_tools,
+    {"agent": "agent", "loop_exit": "loop_exit"}
+)
+workflow.add_edge("loop_exit", END)
 
 # The final, compiled LangGraph application
 agent_app = workflow.compile()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import Any, List, Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsException
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.services.admission_service import admission_controller
+
+# Minimum number of latency samples before the observed percentile is trusted as the hedge delay.
+MIN_SAMPLES_FOR_PERCENTILE = 20
+
+def build_chat_model(model_name: str) -> ChatGoogleGenerativeAI:
+    """Builds a Gemini chat model with the agent's standard settings."""
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        temperature=0,
+        max_retries=settings.LLM_MAX_RETRIES,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+    )
+
+
+class HedgedModel:
+    """
+    Wraps a tool-bound chat model with hedged requests and failover.
+
+    If the primary call hasn't answered within the model's observed latency percentile
+    (`LLM_HEDGE_PERCENTILE`), a duplicate request is fired and whichever finishes first
+    wins; the other is cancelled. If the primary model fails, the call is retried once
+    on the fallback model.
+
+    Given a `user_id`, every attempt (the first call, a hedge, the failover) takes its own
+    admission slot (`admission_controller.llm_slot`), so hedging never bypasses the
+    in-flight cap or the global LLM rate limit.
+
+    Any object with an async `ainvoke(messages)` can be used as a model, which lets a
+    fake slow model stand in for Gemini in tests and simulations.
+    """
+
+    def __init__(self, primary: Any, primary_name: str, fallback: Any = None, fallback_name: Optional[str] = None):
+        self.primary = primary
+        self.primary_name = primary_name
+        self.fallback = fallback
+        self.fallback_name = fallback_name
+
+    def hedge_delay(self) -> float:
+        """Returns how long to wait for the primary call before firing a hedge."""
+        if metrics.timer_count("llm_attempt_seconds", model=self.primary_name) < MIN_SAMPLES_FOR_PERCENTILE:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        observed = metrics.percentile("llm_attempt_seconds", settings.LLM_HEDGE_PERCENTILE, model=self.primary_name)
+        return max(observed, settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+
+    async def _attempt(
+        self, model: Any, model_name: str, messages: List[BaseMessage], user_id: Optional[str] = None
+    ) -> BaseMessage:
+        if isinstance(model, HedgedModel):
+            # A wrapped model takes the slots for its own attempts.
+            return await model.ainvoke(messages, user_id=user_id)
+        slot = admission_controller.llm_slot(user_id) if user_id is not None else nullcontext()
+        async with slot:
+            started = time.perf_counter()
+            try:
+                response = await model.ainvoke(messages)
+            except asyncio.CancelledError:
+                # A cancelled attempt (usually the slow one a hedge beat) ran at least this
+                # long. Leaving it out would drag the hedge-delay percentile down over time.
+                metrics.observe("llm_attempt_seconds", time.perf_counter() - started, model=model_name)
+                raise
+            metrics.observe("llm_attempt_seconds", time.perf_counter() - started, model=model_name)
+            return response
+
+    async def _hedged(self, messages: List[BaseMessage], user_id: Optional[str]) -> BaseMessage:
+        tasks = [asyncio.create_task(self._attempt(self.primary, self.primary_name, messages, user_id))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if not done:
+                metrics.increment("llm_hedges_total", model=self.primary_name)
+                tasks.append(asyncio.create_task(self._attempt(self.primary, self.primary_name, messages, user_id)))
+
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # When both finished together, prefer the original attempt.
+                for task in (task for task in tasks if task in done):
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            metrics.increment("llm_hedge_wins_total", model=self.primary_name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the loser, or everything if we were cancelled ourselves.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def ainvoke(self, messages: List[BaseMessage], user_id: Optional[str] = None) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            if settings.LLM_HEDGING_ENABLED:
+                response = await self._hedged(messages, user_id)
+            else:
+                response = await self._attempt(self.primary, self.primary_name, messages, user_id)
+        except Exception as e:
+            # A full admission queue would reject the fallback model's call just the same.
+            if self.fallback is None or isinstance(e, TooManyRequestsException):
+                raise
+            logger.warning(f"Primary model {self.primary_name} failed, failing over to {self.fallback_name}: {e}")
+            metrics.increment("llm_failovers_total", model=self.primary_name)
+            response = await self._attempt(self.fallback, self.fallback_name, messages, user_id)
+        metrics.observe("llm_call_seconds", time.perf_counter() - started)
+        return response
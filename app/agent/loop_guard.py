@@ -0,0 +1,106 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Tools whose result only depends on their arguments and the calendar, so an identical
+# repeat within a turn can be answered from the earlier result (until a write happens).
+REPEATABLE_TOOLS = {
+    "list_events",
+    "find_available_slots",
+    "get_team_busyness",
+    "find_common_availability",
+    "search_web",
+    "search_news",
+}
+
+LOOP_EXIT_MESSAGE = (
+    "I'm sorry, I kept repeating the same {tools} lookup without getting any further, "
+    "so I've stopped here. The results above are the latest I have. Could you rephrase "
+    "the request or add details, such as a specific date, time range or meeting length?"
+)
+
+
+def fingerprint(name: str, args: Dict) -> str:
+    """A stable key for a tool call: its name and arguments, without the injected user."""
+    return name + orjson.dumps(
+        {key: value for key, value in args.items() if key != "current_user"},
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    ).decode()
+
+
+class ToolLoopGuard:
+    """
+    Watches the tool calls of one agent turn for a model that is going in circles.
+
+    - An exact repeat of a read-only tool call is answered with the earlier result
+      instead of running the tool again. Writes clear the remembered results.
+    - A tool step made only of calls already seen this turn makes no progress. After
+      `AGENT_LOOP_GUARD_MAX_STALE_STEPS` such steps in a row (e.g. A, A, A or A, B, A, B),
+      the guard trips and the graph ends the turn instead of calling the model again.
+      A write resets what has been seen, since lookups after it can return new results,
+      and so does eliding a result from the context (see `forget_elided`), which asks
+      the model to call the tool again.
+    """
+
+    def __init__(self, max_stale_steps: int):
+        self.max_stale_steps = max_stale_steps
+        self.seen: Set[str] = set()
+        self.results: Dict[str, str] = {}
+        self.stale_steps = 0
+        self.tripped = False
+        self._step: List[str] = []
+        self._keys_by_call: Dict[str, str] = {}
+
+    def forget_elided(self, messages: Iterable) -> None:
+        """Un-sees the calls whose results were elided from the context, so a re-call is not stale."""
+        for message in messages:
+            if getattr(message, "additional_kwargs", {}).get("summarized"):
+                key = self._keys_by_call.pop(getattr(message, "tool_call_id", None), None)
+                if key is not None:
+                    self.seen.discard(key)
+
+    def cached(self, name: str, args: Dict, tool_call_id: Optional[str] = None) -> Optional[str]:
+        """Notes the call as part of the current step; returns the earlier result of an exact repeat."""
+        key = fingerprint(name, args)
+        self._step.append(key)
+        if tool_call_id is not None:
+            self._keys_by_call[tool_call_id] = key
+        result = self.results.get(key) if name in REPEATABLE_TOOLS else None
+        if result is not None:
+            metrics.increment("agent_tool_repeats_served_total", tool=name)
+        return result
+
+    def remember(self, name: str, args: Dict, content: str) -> None:
+        """Stores a result for later repeats; a write forgets everything stored and seen so far."""
+        if name in REPEATABLE_TOOLS:
+            self.results[fingerprint(name, args)] = content
+        else:
+            self.results.clear()
+            self.seen.clear()
+
+    def end_step(self) -> bool:
+        """Closes the current tool step; returns True when the turn should end."""
+        if self._step and all(key in self.seen for key in self._step):
+            self.stale_steps += 1
+        else:
+            self.stale_steps = 0
+        self.seen.update(self._step)
+        self._step = []
+        if self.stale_steps >= self.max_stale_steps:
+            self.tripped = True
+        return self.tripped
+
+
+def start_loop_guard() -> Optional[ToolLoopGuard]:
+    """Returns a guard for the turn when `AGENT_LOOP_GUARD_ENABLED` is set, else None."""
+    if not settings.AGENT_LOOP_GUARD_ENABLED:
+        return None
+    return ToolLoopGuard(settings.AGENT_LOOP_GUARD_MAX_STALE_STEPS)
+
+def loop_guard_from(config: Optional[Dict]) -> Optional[ToolLoopGuard]:
+    """Returns the loop guard carried in a graph run's config, if any."""
+    return ((config or {}).get("configurable") or {}).get("loop_guard")
@@ -0,0 +1,145 @@
+import asyncio
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agent.utils.time_parser import extract_dates, extract_duration_minutes
+from app.core.config import settings
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.utils.timezones import get_zone
+
+PREFETCHED_TOOL = "find_available_slots"
+
+# Tools that can change the calendar (or the user's timezone) within a turn. Once one of
+# them runs, anything prefetched before it may be stale and is thrown away.
+INVALIDATING_TOOLS = {
+    "confirm_and_book_event",
+    "book_recurring_event",
+    "delete_event",
+    "update_event",
+    "update_user_timezone",
+}
+
+# Only messages asking about free time are worth a speculative query; "list my events
+# tomorrow" or "move it to Friday" mention dates too but never need free slots.
+AVAILABILITY_QUESTION = re.compile(
+    r"\b(free|available|availability|open|slots?|times?|when|meet|book|schedule|fit|squeeze)\b", re.IGNORECASE
+)
+
+# (date, user_timezone, duration_minutes), as the model would pass them to the tool.
+PrefetchKey = Tuple[str, str, float]
+
+
+class AvailabilityPrefetcher:
+    """
+    Speculatively runs `find_available_slots` for the dates a chat turn mentions while the
+    model is still deciding what to do, so that the Mongo work overlaps the LLM call
+    instead of following it.
+
+    The tool node asks `take()` for each matching tool call; a prefetch with the same
+    date, timezone and duration is served instead of running the tool again. Every
+    `find_available_slots` call counts as a hit or a miss, and every prefetch that is
+    never served counts as wasted, in `availability_prefetch_total{outcome=...}`.
+    """
+
+    def __init__(self, current_user: Dict):
+        self.current_user = current_user
+        self._tasks: Dict[PrefetchKey, asyncio.Task] = {}
+        self._started_at: Dict[PrefetchKey, float] = {}
+
+    def start(self, user_input: str, history: List[Dict]) -> None:
+        """
+        Starts a prefetch for each date the input mentions (falling back to the last
+        user message in `history`, e.g. when the input only answers "how long?"), if
+        either asks about availability.
+        """
+        user_timezone = self.current_user.get("timezone")
+        if not user_timezone:
+            return  # The model has to ask for the timezone first.
+
+        earlier = [str(m.get("content", "")) for m in history if m.get("type") == "human"][-1:]
+        if not AVAILABILITY_QUESTION.search(" ".join([user_input] + earlier)):
+            return
+        now = datetime.now(get_zone(user_timezone))
+        dates = extract_dates(user_input, now) or (extract_dates(earlier[0], now) if earlier else [])
+        if not dates:
+            return
+        # Imported here so that loading ChatService doesn't pull in the agent's tools.
+        from app.agent.tools.calendar_tools import find_available_slots
+        duration = extract_duration_minutes(user_input)
+        if duration is None and earlier:
+            duration = extract_duration_minutes(earlier[0])
+
+        for day in dates[:settings.AVAILABILITY_PREFETCH_MAX_DATES]:
+            key = (day.isoformat(), user_timezone, float(duration or 30.0))
+            self._started_at[key] = time.perf_counter()
+            self._tasks[key] = asyncio.create_task(find_available_slots.ainvoke({
+                "date": key[0],
+                "user_timezone": user_timezone,
+                "duration_minutes": key[2],
+                "current_user": self.current_user,
+            }))
+            metrics.increment("availability_prefetch_total", outcome="started")
+
+    async def take(self, tool_name: str, args: Dict) -> Optional[Any]:
+        """Returns the prefetched result for a tool call, or None when it must run normally."""
+        if tool_name != PREFETCHED_TOOL:
+            return None
+        try:
+            key = (str(args.get("date")), str(args.get("user_timezone")), float(args.get("duration_minutes", 30.0)))
+        except (TypeError, ValueError):
+            key = None
+        task = self._tasks.pop(key, None) if key else None
+        if task is None:
+            metrics.increment("availability_prefetch_total", outcome="miss")
+            return None
+        try:
+            result = await task
+        except Exception as e:
+            logger.warning("Availability prefetch for %s failed: %s", key[0], e)
+            metrics.increment("availability_prefetch_total", outcome="miss")
+            return None
+        metrics.increment("availability_prefetch_total", outcome="hit")
+        return _drop_elapsed_slots(result, key[1])
+
+    def discard(self) -> None:
+        """Cancels and counts as wasted every prefetch that hasn't been served."""
+        for key, task in self._tasks.items():
+            task.cancel()
+            metrics.increment("availability_prefetch_total", outcome="wasted")
+            metrics.observe("availability_prefetch_wasted_seconds", time.perf_counter() - self._started_at[key])
+        self._tasks.clear()
+
+
+def _drop_elapsed_slots(result: Any, user_timezone: str) -> Any:
+    """
+    The tool leaves out slots that have already started; a prefetched result was computed
+    a model call earlier, so slots that started in the meantime are removed here.
+    """
+    if not isinstance(result, list):
+        return result
+    now = datetime.now(get_zone(user_timezone))
+    kept = []
+    for slot in result:
+        try:
+            if datetime.fromisoformat(slot) <= now:
+                continue
+        except (TypeError, ValueError):
+            pass
+        kept.append(slot)
+    return kept
+
+
+def start_prefetch(user_input: str, history: List[Dict], current_user: Dict) -> Optional[AvailabilityPrefetcher]:
+    """Starts prefetching for a chat turn when `AVAILABILITY_PREFETCH_ENABLED` is set, else returns None."""
+    if not settings.AVAILABILITY_PREFETCH_ENABLED:
+        return None
+    prefetcher = AvailabilityPrefetcher(current_user)
+    prefetcher.start(user_input, history)
+    return prefetcher
+
+def prefetcher_from(config: Optional[Dict]) -> Optional[AvailabilityPrefetcher]:
+    """Returns the prefetcher carried in a graph run's config, if any."""
+    return ((config or {}).get("configurable") or {}).get("prefetcher")
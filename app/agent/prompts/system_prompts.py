@@ -1,8 +1,8 @@
 from datetime import datetime
-import pytz
 
 from app.schemas.user import UserInDB
 from app.core.config import settings
+from app.utils.timezones import get_zone
 
 def get_system_prompt(current_user: UserInDB) -> str:
     """
@@ -29,7 +29,7 @@ def get_system_prompt(current_user: UserInDB) -> str:
 
 
     if user_timezone:
-        now_in_user_tz = datetime.now(pytz.timezone(user_timezone))
+        now_in_user_tz = datetime.now(get_zone(user_timezone))
         prompt_sections.extend([
             f"\n## Current User Context:",
             f"- User Email: {current_user.email}",
@@ -42,7 +42,7 @@ def get_system_prompt(current_user: UserInDB) -> str:
             "**Example of the Partial Completion Principle in action:**",
             "User says: 'delete my 2pm meeting and book a pitch at 5pm'",
             "Your thought process:",
-            "1.  **Plan:** The user wants two things. First, I need the `google_event_id` for the '2pm meeting'. I will use `list_events`. Second, I need to book a 'pitch at 5pm', but the duration is missing.",
+            "1.  **Plan:** The user wants two things. First, I need the `event_id` for the '2pm meeting'. I will use `list_events`. Second, I need to book a 'pitch at 5pm', but the duration is missing.",
             "2.  **Analyze and Act:** I have enough information to delete the event now. I do not have enough to book the new one.",
             "3.  **Execute:** I will call `list_events` to get the ID, and then IMMEDIATELY call `delete_event` with that ID in the same turn.",
             "4.  **Formulate Response:** My final response will do two things: first, confirm the deletion ('I have deleted the 2pm meeting.'), and second, ask for the missing information ('To book the new pitch, what is the desired duration?').",
@@ -51,7 +51,9 @@ def get_system_prompt(current_user: UserInDB) -> str:
             "- **Handling Booking Conflicts:** If a call to `confirm_and_book_event` fails with an error message that the slot was taken or is too close to another meeting, you MUST politely inform the user and ask if they would like you to look for other available slots. You MUST NOT call `find_available_slots` again unless the user explicitly asks for it.",
             
             "- **`find_available_slots`:** This tool's `date` parameter MUST be a string in `YYYY-MM-DD` format. Based on the user's current local time, you MUST resolve any relative dates like 'today', 'tomorrow', or 'next Friday' into this specific format before calling the tool. You also MUST know the desired meeting duration; if the user hasn't specified it, you must ask.",
-            "- **`update_event` & `delete_event`:** These tools require a `google_event_id`. If you don't have it, you MUST use `list_events` first to find it.",
+            "- **`update_event` & `delete_event`:** These tools require the `event_id` reported by `list_events`. If you don't have it, you MUST use `list_events` first to find it.",
+            "- **`book_recurring_event`:** Use this for repeating meetings (e.g. 'every Tuesday at 10 for 8 weeks'). Translate the pattern into an RRULE such as `FREQ=WEEKLY;BYDAY=TU;COUNT=8`, confirm the pattern and first occurrence with the user, then book it. Events returned by `list_events` with a `recurrence` field are occurrences of a series; deleting one deletes the whole series, so confirm that with the user first.",
+            "- **`find_common_availability`:** Use this instead of `find_available_slots` when a meeting involves other participants. Pass their email addresses; the user is included automatically. If it reports `unknown_participants` or `unverified_calendars`, tell the user their availability could not be fully checked.",
             "- **`create_event`:** When successfully booking a meeting, you MUST always return the Google Calendar meeting link to the user along with the confirmation."
         ])
     else:
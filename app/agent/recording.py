@@ -0,0 +1,109 @@
+import os
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import orjson
+from langchain_core.messages import BaseMessage, messages_to_dict
+
+from app.core.config import settings
+from app.core.log_config import logger
+
+# Recordings are one JSON object per line, one line per chat turn ("task"):
+#   {"id", "recorded_at", "input", "history", "user_timezone", "wall_seconds",
+#    "steps": [{"type": "llm", ...} | {"type": "tool", ...}, ...]}
+# benchmarks/agent_replay.py replays a corpus of these lines offline.
+#
+# An LLM step does not repeat the whole request: `request_prefix` is how many leading
+# messages it shares with the previous LLM request of the turn, and `request` holds only
+# the messages after them. The system prompt is therefore stored once per turn.
+#
+# Email addresses are replaced with "[email]" in every string stored: input, history,
+# messages, tool arguments and results. Replays stay consistent because the model's
+# recorded tool calls and the recorded tool arguments are redacted alike. Names, titles
+# and other conversation content are kept, so recordings still hold personal data.
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def redact(value: Any) -> Any:
+    """Returns `value` with email addresses replaced in every string it contains."""
+    if isinstance(value, str):
+        return EMAIL_PATTERN.sub("[email]", value)
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class ConversationRecorder:
+    """
+    Captures one agent turn: every LLM request/response and every tool call with its
+    arguments and result, with email addresses redacted. Of the user, only the timezone
+    is recorded, but the conversation itself (names, meeting titles) is stored as is.
+    """
+
+    def __init__(self, user_input: str, history: List[Dict], user_timezone: Optional[str]):
+        self.record: Dict[str, Any] = {
+            "id": uuid.uuid4().hex,
+            "recorded_at": datetime.utcnow().isoformat() + "Z",
+            "input": redact(user_input),
+            "history": redact(history),
+            "user_timezone": user_timezone,
+            "steps": [],
+        }
+        self._last_request: List[Dict] = []
+
+    def record_llm(
+        self, tier: str, request: List[BaseMessage], response: BaseMessage, seconds: float
+    ) -> None:
+        messages = redact(messages_to_dict(request))
+        shared = 0
+        for previous, current in zip(self._last_request, messages):
+            if previous != current:
+                break
+            shared += 1
+        self._last_request = messages
+        self.record["steps"].append({
+            "type": "llm",
+            "tier": tier,
+            "request_prefix": shared,
+            "request": messages[shared:],
+            "response": redact(messages_to_dict([response])[0]),
+            "usage": getattr(response, "usage_metadata", None) or {},
+            "seconds": round(seconds, 4),
+        })
+
+    def record_tool(self, name: str, args: Dict, result: Any, seconds: float) -> None:
+        self.record["steps"].append({
+            "type": "tool",
+            "name": name,
+            "args": redact({key: value for key, value in args.items() if key != "current_user"}),
+            "result": redact(result),
+            "seconds": round(seconds, 4),
+        })
+
+    def save(self, wall_seconds: float) -> None:
+        """Appends the turn to today's recording file; failures are logged, never raised."""
+        self.record["wall_seconds"] = round(wall_seconds, 4)
+        try:
+            # Recordings hold conversation content: readable by the service's user only.
+            os.makedirs(settings.AGENT_RECORDING_DIR, mode=0o700, exist_ok=True)
+            path = os.path.join(settings.AGENT_RECORDING_DIR, f"agent-{datetime.utcnow():%Y%m%d}.jsonl")
+            with open(os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600), "ab") as f:
+                f.write(orjson.dumps(self.record, default=str) + b"\n")
+        except Exception as e:
+            logger.warning("Could not save agent recording %s: %s", self.record["id"], e)
+
+
+def start_recording(user_input: str, history: List[Dict], user_timezone: Optional[str]) -> Optional[ConversationRecorder]:
+    """Returns a recorder for the turn when `AGENT_RECORDING_ENABLED` is set, else None."""
+    if not settings.AGENT_RECORDING_ENABLED:
+        return None
+    return ConversationRecorder(user_input, history, user_timezone)
+
+def recorder_from(config: Optional[Dict]) -> Optional[ConversationRecorder]:
+    """Returns the recorder carried in a graph run's config, if any."""
+    return ((config or {}).get("configurable") or {}).get("recorder")
@@ -0,0 +1,66 @@
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from app.core.config import settings
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
+
+# Tools whose result normally just needs to be reported back to the user.
+# After `list_events` the model often chains a follow-up action (update/delete),
+# so it is deliberately left out and handled by the strong tier.
+REPORTING_TOOLS = {
+    "confirm_and_book_event",
+    "book_recurring_event",
+    "delete_event",
+    "update_event",
+    "update_user_timezone",
+    "find_available_slots",
+    "get_team_busyness",
+    "find_common_availability",
+    "search_web",
+    "search_news",
+}
+
+def _last_tool_batch(messages: List[BaseMessage]) -> List[ToolMessage]:
+    """Returns the tool results produced since the last AI message."""
+    batch: List[ToolMessage] = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        batch.append(message)
+    return batch
+
+def _looks_like_error(message: ToolMessage) -> bool:
+    # Tools report failures in-band ("Error: ...", {"error": ...}), near the start of the output.
+    return "error" in str(message.content)[:120].lower()
+
+def select_tier(messages: List[BaseMessage]) -> str:
+    """
+    Picks the model tier for the next `call_model` step.
+
+    The fast tier handles "report the result" steps: every pending tool call has returned,
+    every tool in the batch is a reporting tool, and nothing failed. New user turns,
+    follow-ups to `list_events`, error recovery and long tool loops go to the strong tier.
+    """
+    if not settings.LLM_TIERING_ENABLED or not settings.LLM_FAST_MODEL:
+        return STRONG_TIER
+
+    batch = _last_tool_batch(messages)
+    if not batch:
+        return STRONG_TIER  # a new user turn needs planning
+
+    # Only route to the fast tier once every tool call of the last AI message has an answer.
+    last_ai = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+    pending = {call["id"] for call in (last_ai.tool_calls if last_ai else [])} - {m.tool_call_id for m in batch}
+    if pending:
+        return STRONG_TIER
+
+    tool_rounds = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+    if tool_rounds > settings.LLM_FAST_TIER_MAX_TOOL_ROUNDS:
+        return STRONG_TIER
+
+    if all(m.name in REPORTING_TOOLS and not _looks_like_error(m) for m in batch):
+        return FAST_TIER
+    return STRONG_TIER
@@ -2,19 +2,29 @@ import base64
 import json
 import pytz
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Annotated, Dict, List, Optional
 
 from bson import ObjectId
 from fastapi.concurrency import run_in_threadpool
 
 from googleapiclient.errors import HttpError
-from langchain_core.tools import tool
+from langchain_core.tools import InjectedToolArg, tool
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
 from app.core.config import settings
-from app.database.mongodb import get_db
+from app.core.warmup import record_first_booking
+from app.database.mongodb import get_db, get_read_db
+from app.services.archive_service import EventArchiveService
+from app.services.availability_service import (
+    AvailabilityService, invalidate_series_availability, refresh_availability
+)
 from app.services.calendar_service import calendar_service_instance
+from app.services.common_availability_service import CommonAvailabilityService
+from app.services.recurrence_service import RecurrenceService, normalize_rule, series_bounds
+from app.services.reminder_service import notify_event_changed, notify_series_booked
+from app.utils.timezones import as_utc, get_zone, parse_to_utc, to_local_many
 
 async def _internal_create_event(
     summary: str, start_time: str, end_time: str, current_user: Dict
@@ -22,16 +32,9 @@ async def _internal_create_event(
     """(Internal) Creates the event after all checks and locks have passed."""
     db: AsyncIOMotorDatabase = get_db()
     events_collection = db.get_collection("events")
-    user_tz = pytz.timezone(current_user.get('timezone', 'UTC'))
-
-    start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
-    end_dt = datetime.fromisoformat(end_time.replace('Z', ''))
-
-    if start_dt.tzinfo is None: start_dt = user_tz.localize(start_dt)
-    if end_dt.tzinfo is None: end_dt = user_tz.localize(end_dt)
-
-    start_utc = start_dt.astimezone(pytz.UTC)
-    end_utc = end_dt.astimezone(pytz.UTC)
+    user_timezone = current_user.get('timezone', 'UTC')
+    start_utc = parse_to_utc(start_time, user_timezone)
+    end_utc = parse_to_utc(end_time, user_timezone)
     # 1. LOCAL BOOKING: Insert the event into our database first to reserve the slot.
     event_to_db = {
         "google_event_id": None, 
@@ -71,39 +74,41 @@ async def _internal_create_event(
                 "status": "confirmed"
             }}
         )
+        await refresh_availability(db, (start_utc, end_utc))
+        await notify_event_changed(temp_event_id_for_db, new_start_utc=start_utc)
+        record_first_booking()
         return f"Event created successfully! Link: {created_event.get('htmlLink')}"
     except Exception as e:
         # COMPENSATING ACTION: If any step after the initial insert fails,
         # ensure the reserved slot is deleted from our database to prevent orphaned records.
         await events_collection.delete_one({"_id": temp_event_id_for_db})
+        await refresh_availability(db, (start_utc, end_utc))
         return f"Error: Could not create event on Google Calendar after reserving the slot. Reason: {e}"
 
 @tool
-async def confirm_and_book_event(summary: str, start_time: str, end_time: str, current_user: Dict) -> str:
+async def confirm_and_book_event(
+    summary: str, start_time: str, end_time: str, current_user: Annotated[Dict, InjectedToolArg]
+) -> str:
     """
-    Performs a final availability check and books the event if the slot is still free. 
-    This is the ONLY tool that should be used to create an event and 
-    should only be called AFTER the user has explicitly confirmed the proposed time.
+    Books an event after a final availability check. The ONLY way to create an event;
+    call it only AFTER the user has explicitly confirmed the proposed time.
     """
     try:
         db: AsyncIOMotorDatabase = get_db()
         events_collection = db.get_collection("events")
-        user_tz = pytz.timezone(current_user.get('timezone', 'UTC'))
-        
-        start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
-        end_dt = datetime.fromisoformat(end_time.replace('Z', ''))
-        
-        if start_dt.tzinfo is None: start_dt = user_tz.localize(start_dt)
-        if end_dt.tzinfo is None: end_dt = user_tz.localize(end_dt)
-        
-        start_utc, end_utc = start_dt.astimezone(pytz.UTC), end_dt.astimezone(pytz.UTC)
+        user_timezone = current_user.get('timezone', 'UTC')
+        start_utc = parse_to_utc(start_time, user_timezone)
+        end_utc = parse_to_utc(end_time, user_timezone)
         buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
         
         # CONFLICT CHECK: Ensure the proposed slot (including buffer) doesn't overlap with existing events.
         conflicting_event = await events_collection.find_one({
             "start_time_utc": {"$lt": end_utc + buffer},
             "end_time_utc": {"$gt": start_utc - buffer}
-        })
+        }, {"_id": 1})
+
+        if not conflicting_event:
+            conflicting_event = await RecurrenceService(db).find_conflict(start_utc - buffer, end_utc + buffer)
 
         if conflicting_event:
             return "Error: Apologies, but that time slot is no longer available. It may have been booked just now or is too close to another scheduled meeting. Please find another available slot."
@@ -113,17 +118,110 @@ async def confirm_and_book_event(summary: str, start_time: str, end_time: str, c
         return f"An unexpected error occurred during the final booking step: {e}"
 
 @tool
-async def list_events(current_user: Dict, start_time: str = None, end_time: str = None) -> List[Dict]:
+async def book_recurring_event(
+    summary: str, start_time: str, end_time: str, recurrence_rule: str, current_user: Annotated[Dict, InjectedToolArg]
+) -> str:
     """
-    Retrieves the user's own calendar events as a list of structured data, 
-    automatically converted to their local timezone. Can be filtered by a time range. 
-    If no time range is given, it lists upcoming events.
+    Books a recurring series if its occurrences are free; only AFTER the user confirmed it.
+    `start_time`/`end_time`: the FIRST occurrence (ISO). `recurrence_rule`: an RFC 5545 RRULE,
+    e.g. 'FREQ=WEEKLY;BYDAY=TU;COUNT=10' (DAILY, WEEKLY, MONTHLY or YEARLY).
     """
     db: AsyncIOMotorDatabase = get_db()
-    events_collection = db.get_collection("events")
+    user_timezone = current_user.get('timezone') or 'UTC'
+    try:
+        rule = normalize_rule(recurrence_rule)
+        start_utc = parse_to_utc(start_time, user_timezone)
+        end_utc = parse_to_utc(end_time, user_timezone)
+        if end_utc <= start_utc:
+            return "Error: The end time must be after the start time."
+        duration = end_utc - start_utc
+        dtstart_local = start_utc.astimezone(get_zone(user_timezone)).replace(tzinfo=None)
+        series_start_utc, series_end_utc = series_bounds(rule, user_timezone, dtstart_local, duration)
+    except ValueError as e:
+        return f"Error: Invalid recurring event: {e}"
+
+    series_doc = {
+        "google_event_id": None,
+        "owner_user_id": ObjectId(current_user['id']),
+        "title": summary,
+        "rrule": rule,
+        "timezone": user_timezone,
+        "dtstart_local": dtstart_local,
+        "duration_minutes": int(duration.total_seconds() // 60),
+        "series_start_utc": series_start_utc,
+        "series_end_utc": series_end_utc,
+        "attendees": [],
+        "created_at": datetime.utcnow(),
+        "status": "pending"
+    }
+
+    recurrence_service = RecurrenceService(db)
+    # CONFLICT CHECK: occurrences are only expanded over a bounded horizon, never the whole series.
+    # Existing events past the horizon are not checked, and a booking racing this check can
+    # still slip in before the insert below (see RecurrenceService.first_conflict).
+    horizon_end = series_start_utc + timedelta(days=settings.RECURRENCE_CONFLICT_HORIZON_DAYS)
+    if series_end_utc is not None:
+        horizon_end = min(horizon_end, series_end_utc)
+    conflict = await recurrence_service.first_conflict(
+        series_doc, series_start_utc, horizon_end, timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
+    )
+    if conflict:
+        conflict_local = to_local_many([conflict[0]], user_timezone)[0]
+        return f"Error: The occurrence on {conflict_local.strftime('%Y-%m-%d %I:%M %p')} conflicts with another scheduled meeting. Please choose another time or pattern."
+
+    # 1. LOCAL BOOKING: Store the series first so concurrent bookings see its occurrences.
+    result = await recurrence_service.collection.insert_one(series_doc)
+    series_doc["_id"] = result.inserted_id
+    try:
+        # 2. EXTERNAL SYNC: Create the recurring event on Google Calendar.
+        service = await run_in_threadpool(calendar_service_instance.get_client)
+        event_body = {
+            'summary': summary,
+            'description': f"Recurring call booked by {current_user.get('email')}",
+            'start': {'dateTime': dtstart_local.isoformat(), 'timeZone': user_timezone},
+            'end': {'dateTime': (dtstart_local + duration).isoformat(), 'timeZone': user_timezone},
+            'recurrence': [f"RRULE:{rule}"],
+        }
+        created_event = await run_in_threadpool(
+            service.events().insert(calendarId=settings.CALENDAR_ID, body=event_body).execute
+        )
+        # 3. FINALIZE: Update our local record with the Google Event ID.
+        await recurrence_service.collection.update_one(
+            {"_id": series_doc["_id"]},
+            {"$set": {"google_event_id": created_event['id'], "status": "confirmed"}}
+        )
+        await invalidate_series_availability(db, series_doc)
+        await notify_series_booked(series_doc)
+        return f"Recurring event created successfully! Link: {created_event.get('htmlLink')}"
+    except Exception as e:
+        # COMPENSATING ACTION: Remove the reserved series so it doesn't block the calendar.
+        await recurrence_service.collection.delete_one({"_id": series_doc["_id"]})
+        await invalidate_series_availability(db, series_doc)
+        return f"Error: Could not create the recurring event on Google Calendar after reserving it. Reason: {e}"
+
+def _event_filter(event_id: str) -> Dict:
+    """
+    Matches an event by its Google event ID or, for local-only events (imported ones have
+    no Google event), by the `event_id` that `list_events` reports for them or their UID.
+    """
+    local = [{"import_uid": event_id}]
+    if ObjectId.is_valid(event_id):
+        local.append({"_id": ObjectId(event_id)})
+    return {"$or": [{"google_event_id": event_id}] + [{**match, "google_event_id": None} for match in local]}
+
+@tool
+async def list_events(
+    current_user: Annotated[Dict, InjectedToolArg], start_time: str = None, end_time: str = None
+) -> List[Dict]:
+    """
+    Lists the user's own events in their local timezone, within an optional time range
+    (upcoming events by default).
+    """
+    db: AsyncIOMotorDatabase = get_read_db("list_events")
     try:
         user_id = ObjectId(current_user['id'])
-        user_tz = pytz.timezone(current_user.get('timezone', 'UTC'))
+        user_timezone = current_user.get('timezone', 'UTC')
+        get_zone(user_timezone)
     except pytz.UnknownTimeZoneError:
         return [{"error": "User has an invalid timezone set in their profile."}]
     except Exception:
@@ -134,13 +232,11 @@ async def list_events(current_user: Dict, start_time: str = None, end_time: str
 
     if start_time:
         try:
-            dt_aware = user_tz.localize(datetime.fromisoformat(start_time.replace('Z', '')))
-            time_filter["$gte"] = dt_aware.astimezone(pytz.UTC)
+            time_filter["$gte"] = parse_to_utc(start_time, user_timezone)
         except ValueError: return [{"error": "Invalid start_time format. Please use ISO format."}]
     if end_time:
         try:
-            dt_aware = user_tz.localize(datetime.fromisoformat(end_time.replace('Z', '')))
-            time_filter["$lte"] = dt_aware.astimezone(pytz.UTC)
+            time_filter["$lte"] = parse_to_utc(end_time, user_timezone)
         except ValueError: return [{"error": "Invalid end_time format. Please use ISO format."}]
 
     if time_filter: 
@@ -148,73 +244,128 @@ async def list_events(current_user: Dict, start_time: str = None, end_time: str
     else: 
         query["start_time_utc"] = {"$gte": datetime.utcnow().replace(tzinfo=pytz.UTC)}
     
-    serializable_events = []
-    cursor = events_collection.find(query).sort("start_time_utc", 1)
-
-    async for event in cursor:
-        start_utc_aware = event['start_time_utc'].replace(tzinfo=pytz.UTC)
-        end_utc_aware = event['end_time_utc'].replace(tzinfo=pytz.UTC)
-        start_local = start_utc_aware.astimezone(user_tz)
-        end_local = end_utc_aware.astimezone(user_tz)
+    # Upcoming events live in the hot collection; a start filter reaching further back
+    # than the hot retention (or an end-only filter) also reads the archive.
+    since_utc = time_filter.get("$gte", datetime.min) if time_filter else None
+    events = await EventArchiveService(db).find_events(query, since_utc, projection={
+        "_id": 1, "google_event_id": 1, "title": 1, "start_time_utc": 1, "end_time_utc": 1, "attendees": 1,
+    })
+    rows = [(event['start_time_utc'], event['end_time_utc'], event, None) for event in events]
+
+    # Recurring series are expanded only inside the listed window (a bounded default
+    # window when no end is given), and only occurrences starting in it are listed.
+    window_start = as_utc(time_filter.get("$gte", datetime.utcnow()))
+    window_end = as_utc(time_filter["$lte"]) if "$lte" in time_filter else window_start + timedelta(days=settings.RECURRENCE_LIST_WINDOW_DAYS)
+    occurrences = await RecurrenceService(db).occurrences(window_start, window_end, {"owner_user_id": user_id})
+    rows.extend(
+        (start, end, series, series["rrule"])
+        for (start, end), series in occurrences
+        if window_start.replace(tzinfo=None) <= start <= window_end.replace(tzinfo=None)
+    )
+    rows.sort(key=lambda row: row[0])
+
+    # Convert the whole result set in one pass instead of an astimezone() call per field.
+    starts_local = to_local_many([row[0] for row in rows], user_timezone)
+    ends_local = to_local_many([row[1] for row in rows], user_timezone)
 
+    serializable_events = []
+    for (_, _, event, recurrence), start_local, end_local in zip(rows, starts_local, ends_local):
         event_data = {
+            # Local-only events have no Google event; they are addressed by their own _id.
+            "event_id": event.get("google_event_id") or str(event["_id"]),
             "google_event_id": event.get("google_event_id"), 
             "title": event.get("title"),
             "start_time": start_local.isoformat(), 
             "end_time": end_local.isoformat(),
             "attendees": event.get("attendees", [])
         }
+        if recurrence:
+            event_data["recurrence"] = recurrence
         serializable_events.append(event_data)
 
     return serializable_events
 
 @tool
-async def delete_event(event_id: str, current_user: Dict) -> str:
+async def delete_event(event_id: str, current_user: Annotated[Dict, InjectedToolArg]) -> str:
     """
-    Deletes a specific event using its unique google_event_id. 
-    The user must be the owner.
+    Deletes one of the user's events (or recurring series) by the event_id from `list_events`.
     """
     db: AsyncIOMotorDatabase = get_db()
-    events_collection = db.get_collection("events")
-    
-    event_doc = await events_collection.find_one({"google_event_id": event_id})
+    # Ownership is part of the filter. Past events may already have been moved to the
+    # archive; delete from wherever it lives.
+    owned = {**_event_filter(event_id), "owner_user_id": ObjectId(current_user['id'])}
+    event_doc, events_collection = await EventArchiveService(db).find_one_event(
+        owned, {"google_event_id": 1, "title": 1, "start_time_utc": 1, "end_time_utc": 1}
+    )
     if not event_doc:
+        series_doc = await RecurrenceService(db).collection.find_one(
+            {"google_event_id": event_id},
+            {"owner_user_id": 1, "google_event_id": 1, "title": 1, "series_start_utc": 1, "series_end_utc": 1},
+        )
+        if series_doc:
+            return await _delete_series(db, series_doc, current_user)
+        if (await EventArchiveService(db).find_one_event(_event_filter(event_id), {"_id": 1}))[0]:
+            return "Error: Permission Denied. You are not the owner of this event."
         return f"Error: Event with ID '{event_id}' not found in our records."
-    
-    if str(event_doc['owner_user_id']) != current_user['id']:
+
+    message = f"Event '{event_doc['title']}' deleted successfully."
+    # Google first: our record keeps the slot reserved until the calendar has let it go.
+    # Local-only events have nothing to delete there.
+    if event_doc.get("google_event_id"):
+        try:
+            service = await run_in_threadpool(calendar_service_instance.get_client)
+            await run_in_threadpool(
+                service.events().delete(
+                    calendarId=settings.CALENDAR_ID, eventId=event_doc["google_event_id"]
+                ).execute
+            )
+        except HttpError as e:
+            # The event might already be deleted on Google's side, which is fine.
+            # Check if the error is a 404 or 410, and if so, proceed to delete locally.
+            if e.resp.status not in [404, 410]:
+                return f"An error occurred with Google Calendar API: {e}"
+            message = f"Event '{event_doc['title']}' was already deleted from the calendar, and has now been removed from our records."
+        except Exception as e:
+            return f"An unexpected error occurred: {e}"
+
+    await events_collection.find_one_and_delete({"_id": event_doc["_id"]}, {"_id": 1})
+    await refresh_availability(db, (event_doc['start_time_utc'], event_doc['end_time_utc']))
+    await notify_event_changed(event_doc['_id'], old_start_utc=event_doc['start_time_utc'])
+    return message
+
+async def _delete_series(db: AsyncIOMotorDatabase, series_doc: Dict, current_user: Dict) -> str:
+    """(Internal) Deletes a whole recurring series from Google Calendar and our records."""
+    if str(series_doc['owner_user_id']) != current_user['id']:
         return "Error: Permission Denied. You are not the owner of this event."
 
+    series_collection = RecurrenceService(db).collection
+    event_id = series_doc['google_event_id']
     try:
         service = await run_in_threadpool(calendar_service_instance.get_client)
         await run_in_threadpool(
-            service.events().delete(
-                calendarId=settings.CALENDAR_ID, eventId=event_id
-            ).execute
+            service.events().delete(calendarId=settings.CALENDAR_ID, eventId=event_id).execute
         )
-        await events_collection.delete_one({"google_event_id": event_id})
-        return f"Event '{event_doc['title']}' deleted successfully."
     except HttpError as e:
-        # The event might already be deleted on Google's side, which is fine.
-        # Check if the error is a 404 or 410, and if so, proceed to delete locally.
-        if e.resp.status in [404, 410]:
-             await events_collection.delete_one({"google_event_id": event_id})
-             return f"Event '{event_doc['title']}' was already deleted from the calendar, and has now been removed from our records."
-        return f"An error occurred with Google Calendar API: {e}"
+        # Already gone on Google's side; still remove it from our records.
+        if e.resp.status not in [404, 410]:
+            return f"An error occurred with Google Calendar API: {e}"
     except Exception as e:
         return f"An unexpected error occurred: {e}"
 
+    await series_collection.delete_one({"_id": series_doc['_id']})
+    await invalidate_series_availability(db, series_doc)
+    return f"Recurring series '{series_doc['title']}' deleted successfully (all occurrences)."
 
 @tool
-async def update_user_timezone(current_user: Dict, timezone: str) -> str:
+async def update_user_timezone(current_user: Annotated[Dict, InjectedToolArg], timezone: str) -> str:
     """
-    Updates the current user's preferred timezone in their profile. 
-    On success, it returns a JSON string containing a success message AND the user's current local time in the new timezone. 
-    The agent MUST use this returned time to resolve relative dates for the rest of the current turn.
+    Saves the user's IANA timezone. Returns JSON with the user's current local time, which
+    MUST be used to resolve relative dates for the rest of the turn.
     """
     db: AsyncIOMotorDatabase = get_db()
     users_collection = db.get_collection("users")
     try:
-        user_tz = pytz.timezone(timezone)
+        user_tz = get_zone(timezone)
         
         await users_collection.update_one(
             {"_id": ObjectId(current_user["id"])},
@@ -226,6 +377,7 @@ async def update_user_timezone(current_user: Dict, timezone: str) -> str:
         response_data = {
             "status": "success",
             "message": f"Timezone updated successfully to {timezone}.",
+            "timezone": timezone,
             "current_user_time": now_in_user_tz.strftime('%Y-%m-%d %I:%M %p')
         }
         return json.dumps(response_data)
@@ -244,34 +396,46 @@ async def update_user_timezone(current_user: Dict, timezone: str) -> str:
         return json.dumps(error_data)
 
 @tool
-async def update_event(event_id: str, current_user: Dict, new_start_time: str = None, new_summary: str = None) -> str:
+async def update_event(
+    event_id: str, current_user: Annotated[Dict, InjectedToolArg], new_start_time: str = None, new_summary: str = None
+) -> str:
     """
-    Updates an existing event's time or title using its google_event_id. The user must be the owner.
-    To reschedule, this tool performs a final availability check (including buffer time) to ensure the new slot is free.
-    The original event duration is preserved when rescheduling.
+    Renames and/or reschedules one of the user's events by the event_id from `list_events`.
+    Rescheduling keeps the duration and checks that the new slot (with buffer) is free.
     """
     db: AsyncIOMotorDatabase = get_db()
     events_collection = db.get_collection("events")
 
-    event_doc = await events_collection.find_one({"google_event_id": event_id})
-    if not event_doc:
-        return f"Error: Event with ID '{event_id}' not found."
-    if str(event_doc['owner_user_id']) != current_user['id']:
-        return "Error: Permission Denied. You do not own this event."
-
     if not new_start_time and not new_summary:
         return "Error: You must provide a new start time or a new summary to update the event."
 
-    original_start_utc = event_doc['start_time_utc']
-    original_end_utc = event_doc['end_time_utc']
+    # Ownership is part of every filter; only the fields needed to revert are read.
+    owned = {**_event_filter(event_id), "owner_user_id": ObjectId(current_user['id'])}
+    original_fields = {"google_event_id": 1, "title": 1, "start_time_utc": 1, "end_time_utc": 1}
     db_update_payload = {}
     new_start_dt, new_end_dt = None, None
 
-    if new_summary:
+    if not new_start_time:
+        # A rename needs no availability check: find, check ownership and write in one round trip.
         db_update_payload['title'] = new_summary
-
-    if new_start_time:
-        user_tz = pytz.timezone(current_user.get('timezone', 'UTC'))
+        event_doc = await events_collection.find_one_and_update(
+            owned, {"$set": db_update_payload}, projection=original_fields, return_document=ReturnDocument.BEFORE
+        )
+        if not event_doc:
+            return await _update_event_not_found(db, event_id)
+        original_start_utc = event_doc['start_time_utc']
+        original_end_utc = event_doc['end_time_utc']
+    else:
+        event_doc = await events_collection.find_one(owned, original_fields)
+        if not event_doc:
+            return await _update_event_not_found(db, event_id)
+
+        original_start_utc = event_doc['start_time_utc']
+        original_end_utc = event_doc['end_time_utc']
+        if new_summary:
+            db_update_payload['title'] = new_summary
+
+        user_tz = get_zone(current_user.get('timezone', 'UTC'))
         duration = original_end_utc - original_start_utc
         
         new_start_dt = datetime.fromisoformat(new_start_time.replace('Z', ''))
@@ -285,10 +449,12 @@ async def update_event(event_id: str, current_user: Dict, new_start_time: str =
         buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
         
         conflicting_event = await events_collection.find_one({
-            "google_event_id": {"$ne": event_id},
+            "_id": {"$ne": event_doc["_id"]},
             "start_time_utc": {"$lt": new_end_utc + buffer},
             "end_time_utc": {"$gt": new_start_utc - buffer}
-        })
+        }, {"_id": 1})
+        if not conflicting_event:
+            conflicting_event = await RecurrenceService(db).find_conflict(new_start_utc - buffer, new_end_utc + buffer)
 
         if conflicting_event:
             return "Error: The requested new time slot is not available as it conflicts with another scheduled meeting. Please try another time."
@@ -296,16 +462,25 @@ async def update_event(event_id: str, current_user: Dict, new_start_time: str =
         db_update_payload['start_time_utc'] = new_start_utc
         db_update_payload['end_time_utc'] = new_end_utc
 
-    try:
-        await events_collection.update_one({"google_event_id": event_id}, {"$set": db_update_payload})
-    except DuplicateKeyError:
-        return "Error: The requested new time slot is already booked. Please try another time."
-    except Exception as e:
-        return f"Error updating local database: {e}"
+        try:
+            await events_collection.update_one({"_id": event_doc["_id"]}, {"$set": db_update_payload})
+        except DuplicateKeyError:
+            return "Error: The requested new time slot is already booked. Please try another time."
+        except Exception as e:
+            return f"Error updating local database: {e}"
+
+    google_event_id = event_doc.get("google_event_id")
+    if not google_event_id:
+        # Local-only event: our record is the only copy, and it has been written.
+        if new_start_time:
+            await refresh_availability(db, (original_start_utc, original_end_utc), (new_start_utc, new_end_utc))
+            await notify_event_changed(event_doc['_id'], old_start_utc=original_start_utc, new_start_utc=new_start_utc)
+            return f"Event '{new_summary or event_doc['title']}' updated successfully. It is now scheduled for {new_start_dt.isoformat()}."
+        return f"Event '{new_summary}' updated successfully."
 
     try:
         service = await run_in_threadpool(calendar_service_instance.get_client)
-        event_on_google = await run_in_threadpool(service.events().get(calendarId=settings.CALENDAR_ID, eventId=event_id).execute)
+        event_on_google = await run_in_threadpool(service.events().get(calendarId=settings.CALENDAR_ID, eventId=google_event_id).execute)
         
         if new_summary: event_on_google['summary'] = new_summary
         if new_start_time:
@@ -313,31 +488,47 @@ async def update_event(event_id: str, current_user: Dict, new_start_time: str =
             event_on_google['end']['dateTime'] = new_end_dt.isoformat()
         
         updated_event = await run_in_threadpool(
-            service.events().update(calendarId=settings.CALENDAR_ID, eventId=event_id, body=event_on_google).execute
+            service.events().update(calendarId=settings.CALENDAR_ID, eventId=google_event_id, body=event_on_google).execute
         )
+        if new_start_time:
+            await refresh_availability(db, (original_start_utc, original_end_utc), (new_start_utc, new_end_utc))
+            await notify_event_changed(event_doc['_id'], old_start_utc=original_start_utc, new_start_utc=new_start_utc)
         start = updated_event['start'].get('dateTime', updated_event['start'].get('date'))
         return f"Event '{updated_event['summary']}' updated successfully. It is now scheduled for {start}."
     except Exception as e:
-        # COMPENSATING ACTION: If Google fails, revert the change in our database
+        # COMPENSATING ACTION: If Google fails, revert the change in our database. Matching on
+        # the values we wrote keeps a newer change to the event from being overwritten.
         await events_collection.update_one(
-            {"google_event_id": event_id},
+            {"_id": event_doc["_id"], **db_update_payload},
             {"$set": {
                 "start_time_utc": original_start_utc,
                 "end_time_utc": original_end_utc,
                 "title": event_doc.get("title") 
             }}
         )
+        if new_start_time:
+            await refresh_availability(db, (original_start_utc, original_end_utc), (new_start_utc, new_end_utc))
         return f"Error: Failed to update Google Calendar after reserving the slot. All changes have been reverted. Reason: {e}"
 
+async def _update_event_not_found(db: AsyncIOMotorDatabase, event_id: str) -> str:
+    """(Internal) Explains why `update_event` found no event of the user's with this ID."""
+    if await db.get_collection("events").find_one(_event_filter(event_id), {"_id": 1}):
+        return "Error: Permission Denied. You do not own this event."
+    if await RecurrenceService(db).collection.find_one({"google_event_id": event_id}, {"_id": 1}):
+        return "Error: This is a recurring series, which cannot be updated. Delete the series and book a new one with `book_recurring_event` instead."
+    if await EventArchiveService(db).archive_collection.find_one(_event_filter(event_id), {"_id": 1}):
+        return "Error: This event is in the past and has been archived, so it can no longer be changed."
+    return f"Error: Event with ID '{event_id}' not found."
+
 @tool
-async def find_available_slots(date: str, user_timezone: str, duration_minutes: float = 30.0, current_user: Dict = None) -> List[str]:
+async def find_available_slots(
+    date: str, user_timezone: str, duration_minutes: float = 30.0,
+    current_user: Annotated[Optional[Dict], InjectedToolArg] = None,
+) -> List[str]:
     """
-    Finds available meeting slots on a given date, ensuring a buffer around existing meetings.
-    The 'date' parameter MUST be a string in 'YYYY-MM-DD' format.
-    Converts company's available slots into the user's local timezone.
+    Lists free meeting slots (with buffer) on `date` ('YYYY-MM-DD'), in the user's timezone.
     """
     db: AsyncIOMotorDatabase = get_db()
-    events_collection = db.get_collection("events")
     try:
         try:
             target_date_obj = datetime.strptime(date, '%Y-%m-%d').date()
@@ -345,9 +536,8 @@ async def find_available_slots(date: str, user_timezone: str, duration_minutes:
             return ["Error: The date provided was not in the required YYYY-MM-DD format."]
         
         duration = timedelta(minutes=int(duration_minutes))
-        buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
-        company_tz = pytz.timezone(settings.COMPANY_TIMEZONE)
-        user_tz = pytz.timezone(user_timezone)
+        company_tz = get_zone(settings.COMPANY_TIMEZONE)
+        user_tz = get_zone(user_timezone)
         
         now_in_user_tz = datetime.now(user_tz)
         user_req_date_aware = user_tz.localize(datetime.combine(target_date_obj, datetime.min.time()))
@@ -355,39 +545,91 @@ async def find_available_slots(date: str, user_timezone: str, duration_minutes:
         if user_req_date_aware.date() < now_in_user_tz.date(): 
             return ["The date you selected is in the past."]
         
-        search_start_utc = (user_req_date_aware - timedelta(days=1)).astimezone(pytz.UTC)
-        search_end_utc = (user_req_date_aware + timedelta(days=2)).astimezone(pytz.UTC)
-        
-        cursor = events_collection.find({"start_time_utc": {"$gte": search_start_utc, "$lt": search_end_utc}})
-        
+        # The user's date can straddle two company days; the bitmaps of both are read in one query.
+        company_days = sorted({
+            (user_req_date_aware + timedelta(days=day_offset)).astimezone(company_tz).date()
+            for day_offset in range(2)
+        })
+        slot_starts_utc = await AvailabilityService(db, read_db=get_read_db("find_available_slots")).find_free_slot_starts(
+            company_days, duration, settings.SLOT_CHECK_DURATION_MINUTES
+        )
 
-        busy_blocks_utc = [
-            {
-                "start": e['start_time_utc'].replace(tzinfo=pytz.UTC) - buffer,
-                "end": e['end_time_utc'].replace(tzinfo=pytz.UTC) + buffer
-            }
-            async for e in cursor
-        ]
-        
         available_slots_in_user_tz = []
-        for day_offset in range(2):
-            day_to_check = (user_req_date_aware + timedelta(days=day_offset)).astimezone(company_tz)
-            slot_runner = day_to_check.replace(hour=settings.COMPANY_WORKING_START_HOUR, minute=0, second=0, microsecond=0)
-            day_end = slot_runner.replace(hour=settings.COMPANY_WORKING_END_HOUR)
-            
-            while (slot_runner + duration) <= day_end:
-                slot_start_utc = slot_runner.astimezone(pytz.UTC)
-                slot_end_utc = (slot_runner + duration).astimezone(pytz.UTC)
-                
-                if not any(slot_start_utc < block['end'] and slot_end_utc > block['start'] for block in busy_blocks_utc):
-                    slot_in_user_tz = slot_start_utc.astimezone(user_tz)
-                    if slot_in_user_tz > now_in_user_tz and slot_in_user_tz.date() == user_req_date_aware.date():
-                        available_slots_in_user_tz.append(slot_in_user_tz.isoformat())
-                slot_runner += timedelta(minutes=settings.SLOT_CHECK_DURATION_MINUTES)
+        for slot_in_user_tz in to_local_many(slot_starts_utc, user_timezone):
+            if slot_in_user_tz > now_in_user_tz and slot_in_user_tz.date() == user_req_date_aware.date():
+                available_slots_in_user_tz.append(slot_in_user_tz.isoformat())
         return sorted(list(set(available_slots_in_user_tz)))
     except Exception as e:
         return [f"An unexpected error occurred in find_available_slots: {e}"]
 
+@tool
+async def get_team_busyness(
+    start_date: str, end_date: str, current_user: Annotated[Optional[Dict], InjectedToolArg] = None
+) -> List[Dict]:
+    """
+    Busy/free working minutes of the team calendar per day, start_date to end_date
+    (inclusive, 'YYYY-MM-DD', company days).
+    """
+    try:
+        start_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return [{"error": "Dates must be in the required YYYY-MM-DD format."}]
+    if end_day < start_day:
+        return [{"error": "end_date must not be before start_date."}]
+    if (end_day - start_day).days > 92:
+        return [{"error": "Please request at most three months at a time."}]
+
+    try:
+        return await AvailabilityService(get_db()).busy_summary(start_day, end_day)
+    except Exception as e:
+        return [{"error": f"An unexpected error occurred in get_team_busyness: {e}"}]
+
+@tool
+async def find_common_availability(
+    attendee_emails: List[str], start_date: str, end_date: str, duration_minutes: float = 30.0,
+    current_user: Annotated[Optional[Dict], InjectedToolArg] = None,
+) -> Dict:
+    """
+    For meetings with several participants: the windows within working hours, in the user's
+    timezone, where the user AND all attendees are free for `duration_minutes`.
+    Dates 'YYYY-MM-DD' (inclusive, company days).
+    """
+    try:
+        start_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return {"error": "Dates must be in the required YYYY-MM-DD format."}
+    if end_day < start_day:
+        return {"error": "end_date must not be before start_date."}
+    if (end_day - start_day).days > 62:
+        return {"error": "Please search at most two months at a time."}
+
+    user_timezone = current_user.get('timezone') or 'UTC'
+    emails = list(dict.fromkeys(
+        [current_user['email']] + [email.strip() for email in attendee_emails if email.strip()]
+    ))
+    try:
+        result = await CommonAvailabilityService(get_db()).find_common_availability(
+            emails, start_day, end_day, timedelta(minutes=int(duration_minutes)),
+            not_before_utc=datetime.utcnow(),
+        )
+    except Exception as e:
+        return {"error": f"An unexpected error occurred in find_common_availability: {e}"}
+
+    windows = result["free_windows"]
+    starts_local = to_local_many([start for start, _ in windows], user_timezone)
+    ends_local = to_local_many([end for _, end in windows], user_timezone)
+    return {
+        "participants": emails,
+        "free_windows": [
+            {"start_time": start.isoformat(), "end_time": end.isoformat()}
+            for start, end in zip(starts_local, ends_local)
+        ],
+        "unknown_participants": result["unknown_participants"],
+        "unverified_calendars": result["unverified_calendars"],
+    }
+
 @tool
 def propose_event(summary: str, start_time: str, end_time: str) -> Dict:
     """
@@ -4,18 +4,27 @@ from fastapi.concurrency import run_in_threadpool
 import requests
 
 from app.core.config import settings
+from app.core.tracing import KIND_CLIENT, trace_span
+
+async def _serper_post(endpoint: str, payload: Dict) -> Dict:
+    """POSTs a query to a Serper endpoint (off the event loop) and returns the decoded JSON."""
+    headers = {"X-API-KEY": settings.SERPER_API_KEY, "Content-Type": "application/json"}
+    url = f"https://google.serper.dev/{endpoint}"
+    with trace_span("http POST google.serper.dev", kind=KIND_CLIENT, **{"http.method": "POST", "http.url": url}) as span:
+        response = await run_in_threadpool(requests.post, url, json=payload, headers=headers)
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+    response.raise_for_status()
+    return response.json()
 
 @tool
 async def search_web(query: str, num_results: int = 5) -> List[Dict]:
     """
-    Searches the web and returns a list of results, each with a title, link, and snippet.
+    Searches the web; returns results with a title, link and snippet.
     """
     try:
-        headers = {"X-API-KEY": settings.SERPER_API_KEY, "Content-Type": "application/json"}
         payload = {"q": query, "num": min(num_results, 10)}
-        response = await run_in_threadpool(requests.post, "https://google.serper.dev/search", json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = await _serper_post("search", payload)
         if "organic" not in data: return []
         return [
             {
@@ -31,14 +40,11 @@ async def search_web(query: str, num_results: int = 5) -> List[Dict]:
 @tool 
 async def search_news(query: str, num_results: int = 5) -> List[Dict]:
     """
-    Searches for news articles and returns a list of results, each with a title, source, date, link, and snippet.
+    Searches news articles; returns results with a title, source, date, link and snippet.
     """
     try:
-        headers = {"X-API-KEY": settings.SERPER_API_KEY, "Content-Type": "application/json"}
         payload = {"q": query, "num": min(num_results, 10)}
-        response = await run_in_threadpool(requests.post, "https://google.serper.dev/news", json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = await _serper_post("news", payload)
         if "news" not in data: return []
         return [{"title": a.get('title'), "source": a.get('source'), "date": a.get('date'), "link": a.get('link'), "snippet": a.get('snippet')} for a in data['news']]
     except Exception as e:
@@ -0,0 +1,147 @@
+# Token budgeting for tool outputs kept in the agent state
+import json
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from app.core.config import settings
+
+# Gemini tokenizes English/JSON at roughly four characters per token. This is only used
+# for budgeting, so a cheap estimate is preferable to a tokenizer round trip.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens in a string."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def estimate_message_tokens(messages: List[BaseMessage]) -> int:
+    """Estimates the prompt size of a list of messages."""
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+def _truncate_strings(value: Any, max_chars: int) -> Any:
+    """Recursively shortens long string fields such as search snippets."""
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "…"
+    if isinstance(value, list):
+        return [_truncate_strings(item, max_chars) for item in value]
+    if isinstance(value, dict):
+        return {key: _truncate_strings(item, max_chars) for key, item in value.items() if item is not None}
+    return value
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _longest_prefix(count: int, fits) -> int:
+    """Binary search for the largest n <= count such that fits(n)."""
+    low, high = 0, count
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def _fit(value: Any, max_tokens: int) -> Any:
+    """
+    Shrinks a JSON-serializable value until it fits within `max_tokens`, keeping it
+    valid JSON: trailing list items are dropped (with a note saying how many), the
+    largest dict fields are shortened (trailing fields are dropped only if that is not
+    enough), and strings are cut with a marker.
+    """
+    if estimate_tokens(_dumps(value)) <= max_tokens:
+        return value
+
+    if isinstance(value, list):
+        def with_note(n: int) -> List:
+            return value[:n] + [{"omitted_items": len(value) - n, "note": "Narrow the query to see the rest."}]
+        return with_note(_longest_prefix(len(value), lambda n: estimate_tokens(_dumps(with_note(n))) <= max_tokens))
+
+    if isinstance(value, dict):
+        # Small fields are kept whole; the large ones share what they leave over.
+        fitted, remaining = {}, max_tokens - 1
+        by_size = sorted(value, key=lambda k: len(_dumps(value[k])))
+        for position, key in enumerate(by_size):
+            share = remaining // (len(by_size) - position)
+            overhead = estimate_tokens(_dumps({key: None}))
+            fitted[key] = _fit(value[key], max(share - overhead, 1))
+            remaining -= estimate_tokens(_dumps({key: fitted[key]}))
+        fitted = {key: fitted[key] for key in value}
+        if estimate_tokens(_dumps(fitted)) <= max_tokens:
+            return fitted
+        # Still too many fields: keep the leading ones.
+        keys = list(fitted)
+        def with_note(n: int) -> dict:
+            return {**{k: fitted[k] for k in keys[:n]}, "omitted_fields": len(keys) - n}
+        return with_note(_longest_prefix(len(keys), lambda n: estimate_tokens(_dumps(with_note(n))) <= max_tokens))
+
+    if isinstance(value, str):
+        marker = "…[truncated]"
+        return value[: max(max_tokens * CHARS_PER_TOKEN - len(marker) - 8, 0)] + marker
+    return value
+
+def format_tool_output(result: Any, max_tokens: int | None = None) -> str:
+    """
+    Serializes a tool result as compact JSON that fits within `max_tokens`.
+
+    Long string fields are shortened first; if the output is still too large, it is cut
+    down structurally (see `_fit`) so the model always receives valid JSON. A plain-text
+    result that is not JSON is cut at the budget.
+    """
+    max_tokens = max_tokens or settings.AGENT_TOOL_OUTPUT_MAX_TOKENS
+    if isinstance(result, str):
+        text = result
+        try:
+            parsed = json.loads(result)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, (dict, list)):
+            result = parsed
+    else:
+        result = _truncate_strings(result, settings.AGENT_TOOL_SNIPPET_MAX_CHARS)
+        text = _dumps(result)
+
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if isinstance(result, (dict, list)):
+        return _dumps(_fit(result, max_tokens))
+    return text[: max_tokens * CHARS_PER_TOKEN] + "…[truncated]"
+
+def summarize_tool_output(message: ToolMessage) -> str:
+    """Builds a short placeholder for a tool result the model has already acted on."""
+    content = str(message.content)
+    try:
+        parsed = json.loads(content)
+        shape = f"{len(parsed)} items" if isinstance(parsed, list) else "1 object"
+    except ValueError:
+        shape = f"{len(content)} chars"
+    return f"[Earlier {message.name or 'tool'} result ({shape}) elided to save context; call the tool again if needed.]"
+
+def budget_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Reducer for `AgentState.messages`.
+
+    Appends new messages like `operator.add`, then keeps the tool results the model has
+    already responded to within `AGENT_STALE_TOOL_TOKEN_BUDGET`, replacing the oldest
+    ones with short summaries. Tool results newer than the last AI message are never
+    touched, and every ToolMessage keeps its tool_call_id so call/result pairs stay valid.
+    """
+    messages = list(left) + list(right)
+
+    last_ai_index = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    stale_indexes = [
+        i for i, m in enumerate(messages[:last_ai_index])
+        if isinstance(m, ToolMessage) and not m.additional_kwargs.get("summarized")
+    ]
+
+    remaining_budget = settings.AGENT_STALE_TOOL_TOKEN_BUDGET
+    for i in reversed(stale_indexes):  # newest stale results are the most likely to still matter
+        tokens = estimate_tokens(str(messages[i].content))
+        if tokens <= remaining_budget:
+            remaining_budget -= tokens
+            continue
+        messages[i] = messages[i].model_copy(update={
+            "content": summarize_tool_output(messages[i]),
+            "additional_kwargs": {**messages[i].additional_kwargs, "summarized": True},
+        })
+    return messages
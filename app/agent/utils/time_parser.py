@@ -1 +1,98 @@
-# Natural language time parsing utilities
\ No newline at end of file
+# Natural language time parsing utilities
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+# A cheap, deliberately conservative reading of the dates a message mentions. It is only
+# used to guess ahead of the model (see app/agent/prefetch.py); the model still resolves
+# dates itself, so a wrong guess costs a wasted prefetch and never a wrong answer.
+
+_WEEKDAYS = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+_MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ])
+    for name in names
+}
+
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_RELATIVE_DAY = re.compile(r"\b(today|tonight|tomorrow|tmrw|day after tomorrow)\b")
+_WEEKDAY = re.compile(r"\b(next\s+|this\s+)?(" + "|".join(sorted(_WEEKDAYS, key=len, reverse=True)) + r")\b")
+_MONTH_DAY = re.compile(r"\b(" + _MONTH_NAMES + r")\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b")
+_DAY_MONTH = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(" + _MONTH_NAMES + r")\b")
+_DURATION = re.compile(r"\b(\d+(?:\.\d+)?)\s*(minutes?|mins?|m|hours?|hrs?|h)\b")
+
+
+def _next_occurrence(month: int, day: int, today: date) -> Optional[date]:
+    """The next `month`/`day` on or after `today` (this year or next)."""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            return None
+        if candidate >= today:
+            return candidate
+    return None
+
+
+def extract_dates(text: str, now: datetime) -> List[date]:
+    """
+    Returns the calendar dates `text` likely refers to, in order of appearance,
+    relative to `now` (the user's local time). Past dates are left out.
+
+    Understands ISO dates, today/tomorrow, weekday names ("Thursday", "next Fri")
+    and month/day pairs ("March 5th", "5 March").
+    """
+    lowered = text.lower()
+    today = now.date()
+    found: List[tuple] = []
+
+    for match in _ISO_DATE.finditer(lowered):
+        try:
+            found.append((match.start(), date(*(int(part) for part in match.groups()))))
+        except ValueError:
+            continue
+    for match in _RELATIVE_DAY.finditer(lowered):
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1}.get(match.group(1), 2)
+        found.append((match.start(), today + timedelta(days=offset)))
+    for match in _WEEKDAY.finditer(lowered):
+        days_ahead = (_WEEKDAYS[match.group(2)] - today.weekday()) % 7
+        if days_ahead == 0 and (match.group(1) or "").startswith("next"):
+            days_ahead = 7
+        found.append((match.start(), today + timedelta(days=days_ahead)))
+    for match in _MONTH_DAY.finditer(lowered):
+        found.append((match.start(), _next_occurrence(_MONTHS[match.group(1)], int(match.group(2)), today)))
+    for match in _DAY_MONTH.finditer(lowered):
+        found.append((match.start(), _next_occurrence(_MONTHS[match.group(2)], int(match.group(1)), today)))
+
+    dates: List[date] = []
+    for _, day in sorted(found, key=lambda item: item[0]):
+        if day is not None and day >= today and day not in dates:
+            dates.append(day)
+    return dates
+
+
+def extract_duration_minutes(text: str) -> Optional[float]:
+    """Returns the meeting length `text` mentions ("45 min", "1.5 hours", "half an hour"), if any."""
+    lowered = text.lower()
+    if "half an hour" in lowered or "half hour" in lowered:
+        return 30.0
+    match = _DURATION.search(lowered)
+    if match:
+        value = float(match.group(1))
+        return value * 60 if match.group(2).startswith("h") else value
+    if re.search(r"\ban hour\b", lowered):
+        return 60.0
+    return None
@@ -1,27 +1,183 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import time
+
+import orjson
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core.config import settings
+from app.core.exceptions import BaseAPIException, TooManyRequestsException
+from app.core.log_config import logger
+from app.core.profiling import start_request_profile
+from app.database.mongodb import get_db
 from app.schemas.chat import ChatRequest
 from app.schemas.user import UserInDB
-from app.dependencies.auth_dependencies import get_current_user
+from app.dependencies.auth_dependencies import get_current_user, get_user_from_token
 from app.dependencies.service_dependencies import get_chat_service
-from app.services.chat_service import ChatService
+from app.services.admission_service import admission_controller
+from app.services.chat_service import ChatService, ChatSession, record_cancelled_turn
+from app.utils.sse import sse_stream
 
 router = APIRouter(prefix="/chat", tags=["Chat Agent"])
 
 @router.post("/stream")
 async def stream_chat(
     request: ChatRequest,
+    http_request: Request,
     current_user: UserInDB = Depends(get_current_user),
-    chat_service: ChatService = Depends(get_chat_service)
+    chat_service: ChatService = Depends(get_chat_service),
+    x_profile_token: Optional[str] = Header(None)
 ):
     """
     Handles a streaming chat request with the AI agent.
 
     This endpoint receives the user's input and chat history, then streams
     back the agent's thought process and final response in real-time.
+    Requests over the user's rate limit, or arriving while the LLM queue is full,
+    are rejected with a 429 and a Retry-After header before streaming starts.
+    When profiling is enabled, an `X-Profile-Token` header matching `PROFILING_TOKEN`
+    (or random sampling) saves a profile of the turn to `PROFILING_OUTPUT_DIR`.
+    If the client disconnects mid-turn, the agent run is cancelled; calendar writes
+    already under way still complete.
     """
+    await admission_controller.admit_stream(str(current_user.id))
+    profile = start_request_profile(f"chat/stream user={current_user.id}", x_profile_token)
     return StreamingResponse(
-        chat_service.stream_agent_response(request, current_user),
+        sse_stream(
+            chat_service.stream_agent_response(request, current_user, profile, http_request.is_disconnected),
+            heartbeat_interval=settings.SSE_HEARTBEAT_SECONDS,
+            coalesce_window=settings.SSE_COALESCE_WINDOW_SECONDS,
+        ),
         media_type="text/event-stream"
-    )
\ No newline at end of file
+    )
+
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """
+    Persistent chat session over a WebSocket.
+
+    The client authenticates once, with an `Authorization: Bearer` header or, from browsers
+    (which cannot set headers on a WebSocket), with a first `{"type": "auth", "token": "<jwt>"}`
+    frame within `WS_AUTH_TIMEOUT_SECONDS`. Tokens are never taken from the URL, which the
+    server's access log records.
+    Each turn is a `{"type": "message", "input": "..."}` frame; the server answers with the
+    same token/tool_start/tool_end chunks as `/stream`, then `{"type": "done"}`, or an
+    `{"type": "error"}` frame if the turn failed (the session stays open). The history
+    is kept server-side for the lifetime of the connection. Heartbeats are sent while the
+    agent is busy, and `{"type": "ping"}` frames are answered with a pong at any time.
+    Turns are processed one at a time; a message sent before the previous turn's `done`
+    is rejected with an error frame. Closing the socket cancels a running turn.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            current_user = await get_user_from_token(authorization[7:], db)
+        except BaseAPIException as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+            return
+        await websocket.accept()
+    else:
+        await websocket.accept()
+        current_user = await _authenticate_first_frame(websocket, db)
+        if current_user is None:
+            return
+
+    session = ChatSession(chat_service, current_user, settings.WS_MAX_HISTORY_MESSAGES)
+    send_lock = asyncio.Lock()
+    last_sent = time.monotonic()
+
+    async def send(payload: dict) -> None:
+        nonlocal last_sent
+        # Awaiting the send applies the transport's flow control, so a slow reader
+        # pauses the agent stream instead of growing an unbounded buffer.
+        async with send_lock:
+            await websocket.send_text(orjson.dumps(payload, default=str).decode())
+            last_sent = time.monotonic()
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(settings.SSE_HEARTBEAT_SECONDS)
+            if time.monotonic() - last_sent >= settings.SSE_HEARTBEAT_SECONDS:
+                await send({"type": "heartbeat"})
+
+    async def run_turn(user_input: str) -> None:
+        try:
+            async for chunk in session.run_turn(user_input):
+                await send(chunk)
+        except Exception as e:
+            logger.exception("Chat turn failed for user %s: %s", session.current_user.id, e)
+            await send({"type": "error", "detail": "The agent could not complete this turn. Please try again."})
+            return
+        await send({"type": "done"})
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    # The socket is read while a turn streams, so pings are answered at once and a
+    # client close cancels the turn (write tools under way still complete).
+    turn: Optional[asyncio.Task] = None
+    turn_started = 0.0
+    try:
+        while True:
+            try:
+                message = orjson.loads(await websocket.receive_text())
+            except orjson.JSONDecodeError:
+                message = None
+            if not isinstance(message, dict):
+                await send({"type": "error", "detail": "Frames must be JSON objects."})
+                continue
+
+            user_input = message.get("input")
+            if message.get("type") == "ping":
+                await send({"type": "pong"})
+                continue
+            if message.get("type") != "message" or not isinstance(user_input, str) or not user_input.strip():
+                await send({"type": "error", "detail": "Expected {\"type\": \"message\", \"input\": \"...\"}."})
+                continue
+            if turn is not None and not turn.done():
+                await send({"type": "error", "detail": "A turn is already in progress; wait for its done frame."})
+                continue
+
+            try:
+                await admission_controller.admit_stream(str(session.current_user.id))
+            except TooManyRequestsException as e:
+                await send({"type": "error", "status": e.status_code, "detail": e.detail,
+                            "retry_after": int(e.headers["Retry-After"])})
+                continue
+
+            turn_started = time.perf_counter()
+            turn = asyncio.create_task(run_turn(user_input))
+    except WebSocketDisconnect:
+        if turn is not None and not turn.done():
+            record_cancelled_turn(turn_started)
+    finally:
+        # The heartbeat and the turn end with an exception if a send failed on a closed socket.
+        heartbeat_task.cancel()
+        if turn is not None:
+            turn.cancel()
+        await asyncio.gather(heartbeat_task, *([turn] if turn is not None else []), return_exceptions=True)
+
+async def _authenticate_first_frame(websocket: WebSocket, db: AsyncIOMotorDatabase) -> Optional[UserInDB]:
+    """Reads the `auth` frame of an accepted socket; closes it and returns None if it is missing or invalid."""
+    try:
+        frame = orjson.loads(await asyncio.wait_for(websocket.receive_text(), settings.WS_AUTH_TIMEOUT_SECONDS))
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication timed out.")
+        return None
+    except WebSocketDisconnect:
+        return None
+    except orjson.JSONDecodeError:
+        frame = None
+    if not isinstance(frame, dict) or frame.get("type") != "auth" or not isinstance(frame.get("token"), str):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Expected an auth frame.")
+        return None
+    try:
+        return await get_user_from_token(frame["token"], db)
+    except BaseAPIException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return None
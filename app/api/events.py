@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.dependencies.auth_dependencies import get_current_user
+from app.dependencies.service_dependencies import get_event_transfer_service
+from app.schemas.user import UserInDB
+from app.services.event_transfer_service import EventTransferService
+from app.utils.event_formats import LineTooLongError, encode_ndjson, iter_ics_rows, iter_ndjson_rows
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.post("/import")
+async def import_events(
+    request: Request,
+    import_format: Optional[Literal["ndjson", "ics"]] = Query(None, alias="format"),
+    allow_conflicts: bool = False,
+    current_user: UserInDB = Depends(get_current_user),
+    transfer_service: EventTransferService = Depends(get_event_transfer_service)
+):
+    """
+    Bulk-imports events from an NDJSON or iCalendar (ICS) upload.
+
+    The body is parsed as it arrives and written in batches, so uploads of any size
+    run in constant memory. The format comes from `?format=`, or from a `text/calendar`
+    content type. The response is an NDJSON stream with one result per row
+    (`created`, `conflict`, `duplicate` or `invalid`), sent batch by batch, followed
+    by a `{"summary": {...}}` line. Rows overlapping existing events are skipped
+    unless `allow_conflicts` is set.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "ics" if content_type.startswith("text/calendar") else "ndjson"
+    parse = iter_ics_rows if import_format == "ics" else iter_ndjson_rows
+    rows = parse(request.stream(), settings.EVENT_IMPORT_MAX_LINE_BYTES)
+
+    async def results() -> AsyncIterator[bytes]:
+        try:
+            async for batch in transfer_service.import_rows(
+                rows, ObjectId(current_user.id), current_user.timezone or "UTC", allow_conflicts
+            ):
+                yield b"".join(encode_ndjson(result) for result in batch)
+        except LineTooLongError as e:
+            # Rows already written stay written; the client can resume after the last result.
+            logger.warning(f"Event import by {current_user.email} aborted: {e}")
+            yield encode_ndjson({"status": "aborted", "error": str(e)})
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/export")
+async def export_events(
+    export_format: Literal["ndjson", "ics"] = Query("ndjson", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: UserInDB = Depends(get_current_user),
+    transfer_service: EventTransferService = Depends(get_event_transfer_service)
+):
+    """
+    Streams the authenticated user's events, including archived ones, as NDJSON
+    (re-importable through `/import`) or as an iCalendar file. `start` and `end`
+    optionally limit the export to events overlapping that range (naive values are UTC).
+    """
+    media_type = "text/calendar" if export_format == "ics" else "application/x-ndjson"
+    filename = f"events.{export_format}"
+    return StreamingResponse(
+        transfer_service.export_events(ObjectId(current_user.id), export_format, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,23 @@
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     MONGO_URI: str
     DATABASE_NAME: str
+    # Pool and timeout defaults are the driver's own; unset values are not passed to Motor.
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int | None = None
+    MONGO_CONNECT_TIMEOUT_MS: int | None = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int | None = None
+    MONGO_SOCKET_TIMEOUT_MS: int | None = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int | None = None
+    # Route lag-tolerant reads to secondaries (see get_read_db). The driver requires a
+    # staleness bound of at least 90 seconds. "get_current_user" can be added to the sites;
+    # the user is then re-read from the primary when the secondary doesn't have it yet.
+    MONGO_SECONDARY_READS_ENABLED: bool = False
+    MONGO_MAX_STALENESS_SECONDS: int = 90
+    MONGO_SECONDARY_READ_SITES: List[str] = ["list_events", "find_available_slots"]
 
     CALENDAR_ID: str
     GOOGLE_CALENDAR_SCOPES: List[str] = ["https://www.googleapis.com/auth/calendar"]
@@ -12,6 +26,8 @@ class Settings(BaseSettings):
 
     SERPER_API_KEY: str
 
+    REDIS_URL: str | None = None
+
     JWT_SECRET_KEY: str 
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
@@ -23,9 +39,102 @@ class Settings(BaseSettings):
     COMPANY_WORKING_START_HOUR: int = 10
     COMPANY_WORKING_END_HOUR: int = 18
     SLOT_CHECK_DURATION_MINUTES: int = 30
+    AVAILABILITY_SLOT_MINUTES: int = 5
+    COMMON_AVAILABILITY_USE_GOOGLE_FREEBUSY: bool = False
+    RECURRENCE_MAX_COUNT: int = 520
+    RECURRENCE_CONFLICT_HORIZON_DAYS: int = 90
+    RECURRENCE_LIST_WINDOW_DAYS: int = 30
+
+    EVENT_ARCHIVER_ENABLED: bool = False
+    EVENT_HOT_RETENTION_DAYS: int = 30
+    EVENT_ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    EVENT_ARCHIVE_BATCH_SIZE: int = 1000
+    EVENT_IMPORT_BATCH_SIZE: int = 500
+    EVENT_IMPORT_MAX_LINE_BYTES: int = 65536
+    EVENT_EXPORT_CHUNK_BYTES: int = 65536
+
+    REMINDERS_ENABLED: bool = False
+    REMINDER_LEAD_MINUTES: int = 15
+    REMINDER_HORIZON_MINUTES: int = 60
+    REMINDER_WINDOW_MINUTES: int = 5
+    REMINDER_LEASE_SECONDS: float = 90.0
+    REMINDER_RENEW_SECONDS: float = 30.0
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_SENDER: str = "app.services.reminder_service.LogReminderSender"
 
     ALLOWED_FRONTEND_URLS: List[str]
 
+    LLM_PRIMARY_MODEL: str = "gemini-2.5-flash"
+    # Failover, tiering and hedging change which model answers or how many calls are made;
+    # they are opt-in (see the README).
+    LLM_FALLBACK_MODEL: str | None = None
+    LLM_FAST_MODEL: str | None = None
+    LLM_TIERING_ENABLED: bool = False
+    LLM_FAST_TIER_MAX_TOOL_ROUNDS: int = 4
+    LLM_MAX_RETRIES: int = 2
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 8.0
+
+    AGENT_TOOL_OUTPUT_MAX_TOKENS: int = 1500
+    AGENT_TOOL_SNIPPET_MAX_CHARS: int = 300
+    AGENT_STALE_TOOL_TOKEN_BUDGET: int = 2000
+
+    LLM_MAX_INFLIGHT_CALLS: int = 8
+    LLM_QUEUE_MAX_SIZE: int = 64
+    LLM_QUEUE_MAX_PER_USER: int = 4
+    LLM_GLOBAL_CALLS_PER_MINUTE: int = 600
+    LLM_GLOBAL_BURST: int = 20
+    CHAT_STREAMS_PER_USER_PER_MINUTE: int = 10
+    CHAT_STREAMS_PER_USER_BURST: int = 5
+    ADMISSION_QUEUE_FULL_RETRY_AFTER_SECONDS: int = 5
+
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_COALESCE_WINDOW_SECONDS: float = 0.005
+    SSE_DISCONNECT_POLL_SECONDS: float = 1.0
+    WS_MAX_HISTORY_MESSAGES: int = 40
+    WS_AUTH_TIMEOUT_SECONDS: float = 10.0
+
+    # /metrics reports per-user and per-route data, so it is only served to requests whose
+    # `X-Metrics-Token` header matches; unset, the endpoint is disabled.
+    METRICS_TOKEN: str | None = None
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str | None = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    PROFILING_OUTPUT_DIR: str = "profiles"
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_FILE: str | None = "logs/app_logs.log"
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_QUEUE_MAX_SIZE: int = 10000
+
+    # Speculatively runs find_available_slots for dates in availability questions during the
+    # LLM call. Off by default: the prefetched queries are not subject to admission control.
+    AVAILABILITY_PREFETCH_ENABLED: bool = False
+    AVAILABILITY_PREFETCH_MAX_DATES: int = 2
+
+    # Ends a turn after this many tool steps in a row that only repeat earlier calls.
+    AGENT_LOOP_GUARD_ENABLED: bool = True
+    AGENT_LOOP_GUARD_MAX_STALE_STEPS: int = 2
+
+    AGENT_RECORDING_ENABLED: bool = False
+    AGENT_RECORDING_DIR: str = "recordings"
+
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.1
+    TRACING_EXPORT_PATH: str | None = "logs/traces.otlp.jsonl"
+    TRACING_OTLP_ENDPOINT: str | None = None
+    TRACING_EXPORT_INTERVAL_SECONDS: float = 1.0
+    TRACING_SERVICE_NAME: str = "singularity-scheduler"
+
+    STARTUP_WARMUP_ENABLED: bool = True
+    STARTUP_WARMUP_LLM: bool = True
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,8 +1,8 @@
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
 from app.core.exceptions import BaseAPIException
 from app.utils.formatters import capitalize_first
+from app.utils.responses import ORJSONResponse as JSONResponse
 
 async def custom_exception_handler(request: Request, exc: BaseAPIException) -> JSONResponse:
     """
@@ -13,7 +13,8 @@ async def custom_exception_handler(request: Request, exc: BaseAPIException) -> J
     """
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 
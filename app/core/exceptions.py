@@ -54,4 +54,13 @@ class InvalidDateException(BaseAPIException):
 class GoogleCalendarAPIError(BaseAPIException):
     """Raised for errors communicating with the Google Calendar API."""
     def __init__(self, detail="An error occurred with the Google Calendar service"):
-        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+# --- Capacity & Rate Limiting Exceptions (4xx) ---
+
+class TooManyRequestsException(BaseAPIException):
+    """Raised when a request is rejected by admission control or rate limiting."""
+    def __init__(self, retry_after: int = 1, detail="Too many requests. Please retry shortly."):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail)
+        self.headers = {"Retry-After": str(max(int(retry_after), 1))}
\ No newline at end of file
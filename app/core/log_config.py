@@ -1,24 +1,110 @@
+import atexit
 import logging
 import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
 
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+try:
+    from pythonjsonlogger.json import JsonFormatter
+except ImportError:  # python-json-logger < 3
+    from pythonjsonlogger.jsonlogger import JsonFormatter
 
-logger = logging.getLogger("app_logger")
-logger.setLevel(logging.DEBUG)
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Application code logs through `logger` (or `logging.getLogger(__name__)` under `app.`).
+# Records only pass through a queue on the calling thread; formatting, JSON encoding,
+# disk writes and file rotation all happen on the listener thread, off the event loop.
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Enqueues the record as is. The stock `prepare()` formats the message eagerly so
+    records can cross process boundaries; this queue is in-process, so formatting is
+    left to the listener thread.
+
+    The queue is bounded. When it is full, records below WARNING are dropped and counted
+    (`log_records_dropped_total`); warnings and errors wait up to a second for room.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=1.0)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("log_records_dropped_total", level=record.levelname)
+
+class SamplingFilter(logging.Filter):
+    """Keeps a `rate` fraction of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
 
-file_handler = RotatingFileHandler("logs/app_logs.log", maxBytes=10**6, backupCount=3)
-file_handler.setLevel(logging.DEBUG)
 
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.DEBUG)
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter(
+            "%(asctime)s %(name)s %(levelname)s %(message)s",
+            rename_fields={"asctime": "time", "levelname": "level", "name": "logger"},
+        )
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+def _build_handlers() -> List[logging.Handler]:
+    formatter = _formatter()
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        os.makedirs(os.path.dirname(settings.LOG_FILE) or ".", exist_ok=True)
+        handlers.append(RotatingFileHandler(settings.LOG_FILE, maxBytes=10**6, backupCount=3))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+_listener: Optional[QueueListener] = None
+
+def start_log_listener() -> None:
+    """Starts the thread that writes queued records, if it isn't running."""
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_log_queue, *_build_handlers(), respect_handler_level=True)
+        _listener.start()
+
+def stop_log_listener() -> None:
+    """Flushes queued records and stops the writer thread (at shutdown and process exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure_sampling(rates: Dict[str, float]) -> None:
+    """Applies `LOG_SAMPLE_RATES`: per-logger fractions of INFO/DEBUG records to keep."""
+    for name, rate in rates.items():
+        target = logging.getLogger(name)
+        target.filters = [f for f in target.filters if not isinstance(f, SamplingFilter)]
+        if rate < 1:
+            target.addFilter(SamplingFilter(rate))
+
+
+_queue_handler = _LocalQueueHandler(_log_queue)
+
+logger = logging.getLogger("app_logger")
+for _name in ("app_logger", "app"):
+    _app_logger = logging.getLogger(_name)
+    _app_logger.setLevel(settings.LOG_LEVEL.upper())
+    _app_logger.addHandler(_queue_handler)
+    _app_logger.propagate = False
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
\ No newline at end of file
+configure_sampling(settings.LOG_SAMPLE_RATES)
+start_log_listener()
+atexit.register(stop_log_listener)
@@ -0,0 +1,103 @@
+import bisect
+import random
+import threading
+from collections import defaultdict
+from typing import Dict, List
+
+# Number of observations kept per timer for percentile estimates (reservoir sampling).
+RESERVOIR_SIZE = 1024
+
+
+class _Timer:
+    """Tracks count/sum/max and a uniform sample of observations for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.samples) < RESERVOIR_SIZE:
+            bisect.insort(self.samples, value)
+            return
+        # Reservoir sampling: each observation has an equal chance of being kept.
+        slot = random.randrange(self.count)
+        if slot < RESERVOIR_SIZE:
+            del self.samples[slot]
+            bisect.insort(self.samples, value)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        index = min(int(q * len(self.samples)), len(self.samples) - 1)
+        return self.samples[index]
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else None,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """
+    A small in-process metrics registry of counters and timers.
+    Metrics are per worker process; labels are flattened into the metric key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timers: Dict[str, _Timer] = defaultdict(_Timer)
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> str:
+        if not labels:
+            return name
+        flat = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        return f"{name}{{{flat}}}"
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """Adds `value` to a counter."""
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Records an observation (usually seconds) on a timer."""
+        with self._lock:
+            self._timers[self._key(name, labels)].observe(value)
+
+    def percentile(self, name: str, q: float, **labels: str) -> float | None:
+        """Returns the q-th percentile of a timer, or None if it has no observations."""
+        with self._lock:
+            timer = self._timers.get(self._key(name, labels))
+            return timer.percentile(q) if timer else None
+
+    def timer_count(self, name: str, **labels: str) -> int:
+        """Returns how many observations a timer has recorded."""
+        with self._lock:
+            timer = self._timers.get(self._key(name, labels))
+            return timer.count if timer else 0
+
+    def counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Returns all counters and timer summaries."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timers": {key: timer.snapshot() for key, timer in self._timers.items()},
+            }
+
+
+metrics = MetricsRegistry()
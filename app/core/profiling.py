@@ -0,0 +1,188 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.log_config import logger
+
+# Sampled frames are grouped by where they spend time, so a slow turn's report says
+# directly whether it went to validation, timezone math, the graph runtime or waiting.
+_CATEGORIES = [
+    ("pydantic", "pydantic"),
+    ("pytz", "pytz"),
+    ("dateutil", "dateutil"),
+    ("langgraph", "langgraph"),
+    ("langchain", "langchain"),
+    ("motor", "mongo"),
+    ("pymongo", "mongo"),
+    ("googleapiclient", "google_api"),
+    ("httplib2", "google_api"),
+    ("orjson", "serialization"),
+    ("json", "serialization"),
+    ("starlette", "web"),
+    ("fastapi", "web"),
+    ("uvicorn", "web"),
+]
+
+def _category(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    if "/asyncio/" in path or path.endswith("/selectors.py"):
+        # The innermost Python frame is the event loop itself: the thread is waiting on I/O.
+        return "io_wait"
+    for marker, category in _CATEGORIES:
+        if f"/{marker}/" in path or path.endswith(f"/{marker}.py"):
+            return category
+    if "/app/" in path:
+        return "app"
+    return "other"
+
+
+class ProfileSession:
+    """
+    Profiles one request: a background thread samples the event loop thread's Python
+    stack every `interval` seconds, and graph nodes and tools record wall/CPU spans.
+
+    Samples cover the whole worker thread, so requests running concurrently on the
+    same worker show up too; profile on a quiet worker for a clean picture.
+    """
+
+    def __init__(self, label: str, interval: float):
+        self.label = label
+        self.interval = interval
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.spans: List[Dict] = []
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._cpu_started = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def start(self) -> None:
+        """Starts sampling the calling thread, which must be the event loop's."""
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        # Called from the loop thread, so thread_time() measures the same thread as start().
+        self.wall_seconds = time.perf_counter() - self._started
+        self.cpu_seconds = time.thread_time() - self._cpu_started
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            self.categories[_category(frame.f_code.co_filename)] += 1
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    @contextmanager
+    def span(self, kind: str, name: str) -> Iterator[None]:
+        """
+        Records the wall and thread CPU time of a graph node or tool call. CPU time is
+        that of the loop thread while the span was open, so it includes other coroutines
+        that ran during the span's awaits.
+        """
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "kind": kind,
+                "name": name,
+                "offset_seconds": round(started - self._started, 6),
+                "wall_seconds": round(time.perf_counter() - started, 6),
+                "cpu_seconds": round(time.thread_time() - cpu_started, 6),
+            })
+
+    def report(self) -> Dict:
+        """Summarizes the spans and samples: totals per node/tool and per time category."""
+        totals: Dict[str, Dict] = {}
+        for span in self.spans:
+            key = f"{span['kind']}:{span['name']}"
+            entry = totals.setdefault(key, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            entry["calls"] += 1
+            entry["wall_seconds"] += span["wall_seconds"]
+            entry["cpu_seconds"] += span["cpu_seconds"]
+        samples = sum(self.categories.values())
+        return {
+            "id": self.id,
+            "label": self.label,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "sample_interval_seconds": self.interval,
+            "samples": samples,
+            "categories": {
+                category: round(count / samples, 4) for category, count in self.categories.most_common()
+            } if samples else {},
+            "totals": totals,
+            "spans": self.spans,
+        }
+
+    def save(self, directory: str) -> str:
+        """
+        Writes `<id>.json` (the report) and `<id>.folded` (collapsed stacks, loadable in
+        speedscope or flamegraph.pl as a flamegraph) to `directory`; returns the base path.
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        with open(f"{base}.json", "wb") as f:
+            f.write(orjson.dumps(self.report(), option=orjson.OPT_INDENT_2))
+        with open(f"{base}.folded", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return base
+
+
+def start_request_profile(label: str, token: Optional[str]) -> Optional[ProfileSession]:
+    """
+    Decides whether to profile a request: when `PROFILING_ENABLED` is set, a request
+    carrying the admin `PROFILING_TOKEN` is always profiled, others with probability
+    `PROFILING_SAMPLE_RATE`. Returns None (and costs nothing more) otherwise.
+    """
+    if not settings.PROFILING_ENABLED:
+        return None
+    requested = bool(token and settings.PROFILING_TOKEN and hmac.compare_digest(token, settings.PROFILING_TOKEN))
+    if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+        return None
+    return ProfileSession(label, settings.PROFILING_INTERVAL_SECONDS)
+
+def profile_span(config: Optional[Dict], kind: str, name: str):
+    """Returns a span of the profile carried in a graph run's config, or a no-op context."""
+    session = ((config or {}).get("configurable") or {}).get("profile")
+    return session.span(kind, name) if session is not None else nullcontext()
+
+def save_profile(session: ProfileSession) -> None:
+    """Writes a finished profile to `PROFILING_OUTPUT_DIR`; failures are logged, never raised."""
+    try:
+        base = session.save(settings.PROFILING_OUTPUT_DIR)
+        logger.info(
+            f"Profile {session.id} ({session.label}): {session.wall_seconds:.3f}s wall, "
+            f"{session.cpu_seconds:.3f}s CPU, saved to {base}.json/.folded"
+        )
+    except Exception as e:
+        logger.warning(f"Could not save profile {session.id}: {e}")
@@ -0,0 +1,286 @@
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import orjson
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.log_config import logger
+
+# OTLP span kinds.
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class SpanContext(NamedTuple):
+    """The identity of a span, enough to parent children on it (also across tasks and state)."""
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    """One timed operation of a trace. Only sampled traces ever create spans."""
+
+    __slots__ = ("context", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status", "message")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict[str, Any]):
+        self.context = SpanContext(trace_id, os.urandom(8).hex())
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        _exporter.submit(self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.message} if self.message else {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# --- Export ---
+
+class _SpanExporter:
+    """
+    Writes finished spans from a background thread, so ending a span on the event loop
+    only costs a queue put. Spans are flushed in batches as OTLP/JSON
+    `ExportTraceServiceRequest` documents: one per line to `TRACING_EXPORT_PATH`
+    (readable by the collector's otlpjsonfile receiver) and/or POSTed to
+    `TRACING_OTLP_ENDPOINT` (an OTLP/HTTP `/v1/traces` URL).
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Dropping spans is preferable to slowing requests down.
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self) -> None:
+        while True:
+            span = self._queue.get()
+            if span is None:
+                return
+            batch = [span]
+            deadline = time.monotonic() + settings.TRACING_EXPORT_INTERVAL_SECONDS
+            while len(batch) < 512:
+                try:
+                    span = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if span is None:
+                    self._export(batch)
+                    return
+                batch.append(span)
+            self._export(batch)
+
+    def _export(self, spans: List[Span]) -> None:
+        payload = orjson.dumps({"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", settings.TRACING_SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+        }]})
+        try:
+            if settings.TRACING_EXPORT_PATH:
+                with open(settings.TRACING_EXPORT_PATH, "ab") as f:
+                    f.write(payload + b"\n")
+            if settings.TRACING_OTLP_ENDPOINT:
+                import requests
+                requests.post(
+                    settings.TRACING_OTLP_ENDPOINT, data=payload,
+                    headers={"Content-Type": "application/json"}, timeout=5,
+                )
+        except Exception as e:
+            logger.warning(f"Failed to export {len(spans)} spans: {e}")
+
+    def shutdown(self) -> None:
+        """Flushes queued spans; called at application shutdown and process exit."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+_exporter = _SpanExporter()
+
+def shutdown_tracing() -> None:
+    """Flushes spans that are still queued for export."""
+    _exporter.shutdown()
+
+
+# --- Span API ---
+
+_current_span: ContextVar[Optional[SpanContext]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[SpanContext]:
+    """Returns the active span's context, or None when the request is not being traced."""
+    return _current_span.get()
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes: Any) -> Optional[Span]:
+    """
+    Starts the root span of a request, or returns None if it is not sampled.
+
+    A valid W3C `traceparent` header continues the caller's trace and follows its sampling
+    decision; otherwise the trace is kept with probability `TRACING_SAMPLE_RATE`.
+    """
+    if not settings.TRACING_ENABLED:
+        return None
+    parts = traceparent.split("-") if traceparent else []
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        try:
+            sampled = int(parts[3], 16) & 1
+        except ValueError:
+            sampled = None
+        if sampled == 0:
+            return None
+        if sampled:
+            return Span(name, parts[1], parts[2], KIND_SERVER, attributes)
+    if random.random() >= settings.TRACING_SAMPLE_RATE:
+        return None
+    return Span(name, os.urandom(16).hex(), None, KIND_SERVER, attributes)
+
+def start_span(name: str, parent: Optional[SpanContext] = None, kind: int = KIND_INTERNAL, **attributes: Any) -> Optional[Span]:
+    """
+    Starts a child of `parent` (default: the active span) without making it active.
+    For spans that outlive a single task, such as one around a streamed response;
+    the caller must `end()` it. Returns None when there is nothing to parent on.
+    """
+    parent = parent or _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+@contextmanager
+def trace_span(
+    name: str, parent: Optional[SpanContext] = None, kind: int = KIND_INTERNAL, **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Runs the block in a child span of `parent` (default: the active span) and makes it
+    the active span, so Mongo commands and HTTP calls made inside nest under it.
+    Yields None, at the cost of a context variable lookup, when the trace isn't sampled.
+    """
+    span = start_span(name, parent, kind, **attributes)
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span.context)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+@contextmanager
+def activate(span: Optional[Span]) -> Iterator[None]:
+    """Makes an already started span (e.g. a request's root span) the active one."""
+    if span is None:
+        yield
+        return
+    token = _current_span.set(span.context)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+# --- Mongo ---
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Records a client span per Mongo command. Motor runs commands on its executor with a
+    copy of the caller's context, so the active span is visible here and the command
+    nests under the tool or node that issued it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        parent = _current_span.get()
+        if parent is None:
+            return
+        target = event.command.get(event.command_name)
+        span = Span(f"mongo.{event.command_name}", parent.trace_id, parent.span_id, KIND_CLIENT, {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+        })
+        if isinstance(target, str):
+            span.attributes["db.mongodb.collection"] = target
+        with self._lock:
+            self._inflight[(event.request_id, event.connection_id)] = span
+
+    def _finish(self, event, error: Optional[str] = None) -> None:
+        with self._lock:
+            span = self._inflight.pop((event.request_id, event.connection_id), None)
+        if span is None:
+            return
+        if error:
+            span.status, span.message = STATUS_ERROR, error
+        span.end()
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, str(event.failure))
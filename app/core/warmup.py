@@ -0,0 +1,84 @@
+import asyncio
+import importlib
+import time
+from typing import Dict
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.log_config import logger
+
+# Captured when this module is first imported, which main.py does before anything else.
+PROCESS_STARTED_AT = time.perf_counter()
+
+_startup_timings: Dict[str, float] = {}
+_first_booking_recorded = False
+
+
+def record_import_complete() -> None:
+    """Records how long importing the application module took."""
+    _startup_timings["import_app"] = time.perf_counter() - PROCESS_STARTED_AT
+
+
+async def _timed(step: str, coro) -> None:
+    """Runs a warm-up step, recording its duration. Failures are logged, never raised."""
+    started = time.perf_counter()
+    try:
+        await coro
+    except Exception as e:
+        logger.warning("Warm-up step '%s' failed, it will run lazily on first use: %s", step, e)
+    finally:
+        _startup_timings[step] = time.perf_counter() - started
+
+
+async def _import_agent() -> None:
+    # The agent graph pulls in LangChain, LangGraph and the Gemini SDK. Non-chat routes
+    # don't need it, so it is imported here rather than when main.py is loaded.
+    importlib.import_module("app.agent.graph")
+
+
+async def _warm_calendar_client() -> None:
+    from app.services.calendar_service import calendar_service_instance
+
+    await run_in_threadpool(calendar_service_instance.get_client)
+    await run_in_threadpool(calendar_service_instance.refresh_token)
+
+
+async def _prime_llm() -> None:
+    from app.agent.graph import fallback_llm, fast_llm, llm
+
+    # count_tokens is free; it resolves DNS, opens the TLS connection and validates the key.
+    # Each model has its own client, and call_model goes through the async one (a separate
+    # transport from the sync client), so that is the connection pool primed here.
+    models = [model for model in (llm, fast_llm, fallback_llm) if model is not None]
+    await asyncio.gather(*(model.async_client.models.count_tokens(model=model.model, contents="ping") for model in models))
+
+
+async def run_startup_warmup() -> None:
+    """
+    Pre-builds everything the first chat/booking request would otherwise pay for:
+    the agent graph import, the Google Calendar client and its OAuth token, and the
+    async Gemini connection of every configured model. The MongoDB pool is warmed separately by connect_to_mongo().
+    """
+    if not settings.STARTUP_WARMUP_ENABLED:
+        logger.info("Startup warm-up disabled.")
+        return
+
+    await _timed("import_agent", _import_agent())
+    await _timed("calendar_client", _warm_calendar_client())
+    if settings.STARTUP_WARMUP_LLM:
+        await _timed("llm_connection", _prime_llm())
+
+    _startup_timings["ready"] = time.perf_counter() - PROCESS_STARTED_AT
+    summary = ", ".join(f"{step}={seconds * 1000:.0f}ms" for step, seconds in _startup_timings.items())
+    logger.info("Startup warm-up complete: %s", summary)
+
+
+def record_first_booking() -> None:
+    """Logs the time from process start to the first successful booking, once per process."""
+    global _first_booking_recorded
+    if _first_booking_recorded:
+        return
+    _first_booking_recorded = True
+    elapsed = time.perf_counter() - PROCESS_STARTED_AT
+    logger.info("Time to first successful booking: %.2fs since process start.", elapsed)
@@ -1,5 +1,17 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.read_preferences import SecondaryPreferred
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import MongoTracingListener
 import logging
 
 log = logging.getLogger(__name__)
@@ -12,19 +24,121 @@ class MongoManager:
     """
     client: AsyncIOMotorClient = None
     database: AsyncIOMotorDatabase = None
+    # The same database with a secondaryPreferred read preference, when secondary reads are enabled.
+    secondary_database: AsyncIOMotorDatabase = None
 
 db_manager = MongoManager()
 
+# --- Per-request command tracking ---
+# Every command issued while serving a request is counted against it, so each endpoint's
+# Mongo round trips are visible (`mongo_commands_per_request`) and can be budgeted.
+#
+# The same bookkeeping drives read routing. Reads that tolerate a few seconds of
+# staleness (listing events, free slots, resolving the user of a token) can be served by
+# secondaries. A request that has written anything reads only from the primary from then
+# on, so it always sees its own writes.
+
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify", "bulkWrite"}
+
+class MongoRequestStats:
+    """The Mongo commands one request has issued, by name, and whether any was a write."""
+
+    def __init__(self):
+        self.commands: Counter = Counter()
+        self.wrote = False
+        self._lock = threading.Lock()
+
+    def record(self, command_name: str) -> None:
+        with self._lock:
+            self.commands[command_name] += 1
+            if command_name in WRITE_COMMANDS:
+                self.wrote = True
+
+    @property
+    def total(self) -> int:
+        return sum(self.commands.values())
+
+_request_stats: ContextVar[Optional[MongoRequestStats]] = ContextVar("mongo_request_stats", default=None)
+
+@contextmanager
+def mongo_request_scope() -> Iterator[MongoRequestStats]:
+    """
+    Counts the commands issued for the duration of a request (and the tasks it starts),
+    and lets `get_read_db` send every read after the first write to the primary.
+    """
+    stats = MongoRequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+class RequestCommandListener(monitoring.CommandListener):
+    """
+    Records each command against the current request's `MongoRequestStats`. Motor runs
+    commands on its executor with a copy of the caller's context, so the request's
+    stats object is visible (and shared) here.
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.record(event.command_name)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
 async def connect_to_mongo():
     """
     Connects to the MongoDB instance at application startup.
     This function is called by the startup event handler in main.py.
     """
     log.info("Connecting to MongoDB...")
-    db_manager.client = AsyncIOMotorClient(settings.MONGO_URI)
+    listeners = [RequestCommandListener()]
+    if settings.TRACING_ENABLED:
+        listeners.append(MongoTracingListener())
+    timeouts = {
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+    db_manager.client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        event_listeners=listeners,
+        **{option: value for option, value in timeouts.items() if value is not None},
+    )
     db_manager.database = db_manager.client.get_database(settings.DATABASE_NAME)
+    if settings.MONGO_SECONDARY_READS_ENABLED:
+        db_manager.secondary_database = db_manager.client.get_database(
+            settings.DATABASE_NAME,
+            read_preference=SecondaryPreferred(max_staleness=settings.MONGO_MAX_STALENESS_SECONDS),
+        )
+    await warm_mongo_pool()
     log.info("Successfully connected to MongoDB.")
 
+async def warm_mongo_pool():
+    """
+    Opens `MONGO_MIN_POOL_SIZE` connections up front by issuing concurrent pings,
+    so the first requests after a (re)start don't pay the TCP/TLS/auth handshake.
+    A failure here is logged but not fatal; the pool will fill lazily instead.
+    """
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            db_manager.database.command("ping")
+            for _ in range(max(settings.MONGO_MIN_POOL_SIZE, 1))
+        ))
+        log.info(f"MongoDB pool warmed in {(time.perf_counter() - started) * 1000:.1f} ms.")
+    except Exception as e:
+        log.warning(f"MongoDB pool warm-up failed, connections will be opened lazily: {e}")
+
 async def close_mongo_connection():
     """
 
@@ -52,4 +166,24 @@ def get_db() -> AsyncIOMotorDatabase:
         # without the startup event having run (e.g., in a script).
         # In a running FastAPI app, this should not be triggered.
         raise Exception("Database not initialized. Call connect_to_mongo() first.")
-    return db_manager.database
\ No newline at end of file
+    return db_manager.database
+
+def get_read_db(site: str) -> AsyncIOMotorDatabase:
+    """
+    Returns the database handle for a read that can tolerate replication lag.
+
+    `site` names the call site (e.g. "list_events"). Its reads go to a secondary no more
+    than `MONGO_MAX_STALENESS_SECONDS` behind when secondary reads are enabled and the site
+    is listed in `MONGO_SECONDARY_READ_SITES`, unless the current request has already
+    written. Otherwise this is the primary, same as `get_db()`. Conflict checks and
+    read-modify-write paths must use `get_db()`.
+    """
+    db = get_db()
+    if db_manager.secondary_database is None or site not in settings.MONGO_SECONDARY_READ_SITES:
+        return db
+    stats = _request_stats.get()
+    if stats is not None and stats.wrote:
+        metrics.increment("mongo_read_routing_total", site=site, target="primary_after_write")
+        return db
+    metrics.increment("mongo_read_routing_total", site=site, target="secondary")
+    return db_manager.secondary_database
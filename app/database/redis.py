@@ -1 +1,51 @@
-# Redis for caching/sessions (optional)
\ No newline at end of file
+import logging
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+class RedisManager:
+    """
+    Holds the optional Redis client shared across the application lifetime.
+    Redis backs cross-worker state such as rate limits; when `REDIS_URL` is not
+    set, callers fall back to per-process state.
+    """
+    client: Redis = None
+
+redis_manager = RedisManager()
+
+async def connect_to_redis():
+    """
+    Connects to Redis at application startup, if configured.
+    A failed connection is logged and the application continues without Redis.
+    """
+    if not settings.REDIS_URL:
+        log.info("REDIS_URL not set; cross-worker limits fall back to per-process state.")
+        return
+
+    log.info("Connecting to Redis...")
+    client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception as e:
+        log.warning(f"Could not connect to Redis, falling back to per-process state: {e}")
+        await client.aclose()
+        return
+    redis_manager.client = client
+    log.info("Successfully connected to Redis.")
+
+async def close_redis_connection():
+    """Closes the Redis connection at application shutdown."""
+    if redis_manager.client:
+        log.info("Closing Redis connection...")
+        await redis_manager.client.aclose()
+        redis_manager.client = None
+        log.info("Redis connection closed.")
+
+def get_redis() -> Redis | None:
+    """
+    Returns the shared Redis client, or None when Redis is not configured.
+    """
+    return redis_manager.client
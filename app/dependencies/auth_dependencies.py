@@ -6,21 +6,33 @@ from datetime import datetime
 
 from app.core.config import settings
 from app.core.exceptions import InvalidTokenException, UserNotFoundException
-from app.database.mongodb import get_db
+from app.database.mongodb import get_db, get_read_db
 from app.schemas.user import UserInDB, UserBase
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+def get_user_read_db():
+    """The database handle used to resolve the user of a token (may be a secondary)."""
+    return get_read_db("get_current_user")
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: AsyncIOMotorClient = Depends(get_db)
+    db: AsyncIOMotorClient = Depends(get_user_read_db)
 ) -> UserInDB:
     """
     Dependency to get the current user from a JWT token.
 
-    Verifies the token, decodes its payload, and retrieves the user
-    from the database.
+    Raises:
+        InvalidTokenException: If the token is invalid or expired.
+        UserNotFoundException: If the user from the token does not exist.
+    """
+    return await get_user_from_token(token, db)
+
+async def get_user_from_token(token: str, db: AsyncIOMotorClient) -> UserInDB:
+    """
+    Verifies a JWT token, decodes its payload, and retrieves the user
+    from the database. Shared by the HTTP dependency and the WebSocket handshake.
 
     Raises:
         InvalidTokenException: If the token is invalid or expired.
@@ -38,10 +50,14 @@ async def get_current_user(
         raise InvalidTokenException()
 
     user_doc = await db.users.find_one({"email": email})
+    if user_doc is None and db is not get_db():
+        # A lagging secondary may not have a just-registered user yet.
+        user_doc = await get_db().users.find_one({"email": email})
 
     if user_doc is None:
         raise UserNotFoundException(detail="User from token not found")
 
-    return UserInDB(**user_doc)
+    # The document comes from our own collection, so skip re-validating it on every request.
+    return UserInDB.model_construct(**user_doc)
 
 
@@ -6,6 +6,7 @@ from app.database.mongodb import get_db
 from app.services.auth_service import AuthService
 from app.services.calendar_service import CalendarService
 from app.services.chat_service import ChatService
+from app.services.event_transfer_service import EventTransferService
 from app.services.user_service import UserService
 
 
@@ -38,3 +39,9 @@ def get_chat_service() -> ChatService:
     """
     return ChatService()
 
+
+def get_event_transfer_service(db: AsyncIOMotorDatabase = Depends(get_db)) -> EventTransferService:
+    """
+    Returns an EventTransferService instance with database dependency.
+    """
+    return EventTransferService(db)
@@ -1,35 +1,65 @@
+import hmac
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI
+from app.core.warmup import record_import_complete, run_startup_warmup
+
+from fastapi import FastAPI, Header, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.error_handler import custom_exception_handler, validation_exception_handler
-from app.core.exceptions import BaseAPIException
-from app.core.log_config import logger
+from app.core.exceptions import BaseAPIException, InvalidTokenException
+from app.core.log_config import logger, stop_log_listener
 
-from app.database.mongodb import connect_to_mongo, close_mongo_connection
+from app.core.metrics import metrics
+from app.core.tracing import shutdown_tracing
+from app.database.mongodb import connect_to_mongo, close_mongo_connection, get_db
+from app.database.redis import connect_to_redis, close_redis_connection
+from app.middleware.mongo_request_middleware import MongoRequestMiddleware
 from app.middleware.timing_middleware import TimingMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.services.archive_service import start_event_archiver, stop_event_archiver
+from app.services.reminder_service import start_reminder_scheduler, stop_reminder_scheduler
+from app.services.event_transfer_service import ensure_event_transfer_indexes
+from app.services.recurrence_service import ensure_recurrence_indexes
+from app.utils.responses import ORJSONResponse
 
 from app.api import auth as auth_router
 from app.api import user as user_router
 from app.api import chat as chat_router
+from app.api import events as events_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Manages application startup and shutdown events.
-    - Connects to MongoDB on startup.
-    - Closes MongoDB connection on shutdown.
+    - Connects to MongoDB, warms its connection pool and ensures the series and import indexes on startup.
+    - Pre-builds the agent, Calendar client and LLM connection on startup.
+    - Connects to Redis, if configured, for cross-worker rate limits.
+    - Starts the background archiver that moves past events out of the hot collection.
+    - Starts this worker's share of the meeting reminder scheduler, if enabled.
+    - Closes MongoDB and Redis connections and flushes queued trace spans and log records on shutdown.
     """
     logger.info("Application startup...") 
     await connect_to_mongo()
+    await ensure_recurrence_indexes(get_db())
+    await ensure_event_transfer_indexes(get_db())
+    await connect_to_redis()
+    await run_startup_warmup()
+    await start_event_archiver(get_db())
+    await start_reminder_scheduler(get_db())
     yield
     logger.info("Application shutdown...")
+    await stop_reminder_scheduler()
+    await stop_event_archiver()
+    await close_redis_connection()
     await close_mongo_connection()
+    shutdown_tracing()
+    stop_log_listener()
 
 app = FastAPI(
     title="AI Booking Agent API",
@@ -39,6 +69,8 @@ app = FastAPI(
 )
 
 app.add_middleware(TimingMiddleware)
+app.add_middleware(MongoRequestMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_FRONTEND_URLS,  
@@ -55,8 +87,23 @@ logger.info("Attaching API routers...")
 app.include_router(auth_router.router, prefix="/api")
 app.include_router(user_router.router, prefix="/api")
 app.include_router(chat_router.router, prefix="/api")
+app.include_router(events_router.router, prefix="/api")
+
+record_import_complete()
 
-@app.get("/", tags=["Health Check"])
+@app.get("/", tags=["Health Check"], response_class=ORJSONResponse)
 async def read_root():
     """A simple health check endpoint."""
-    return {"status": "ok", "message": "Welcome to the AI Booking Agent API"} 
\ No newline at end of file
+    return {"status": "ok", "message": "Welcome to the AI Booking Agent API"}
+
+@app.get("/metrics", tags=["Health Check"], response_class=ORJSONResponse)
+async def read_metrics(x_metrics_token: Optional[str] = Header(None)):
+    """
+    Returns this worker's in-process counters and latency summaries.
+    Disabled unless `METRICS_TOKEN` is set; requests must send it as `X-Metrics-Token`.
+    """
+    if not settings.METRICS_TOKEN:
+        raise BaseAPIException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not (x_metrics_token and hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN)):
+        raise InvalidTokenException(detail="A valid X-Metrics-Token header is required.")
+    return metrics.snapshot() 
\ No newline at end of file
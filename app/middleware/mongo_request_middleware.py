@@ -0,0 +1,31 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.database.mongodb import mongo_request_scope
+
+class MongoRequestMiddleware:
+    """
+    Scopes Mongo command tracking to each HTTP request or WebSocket session: the number
+    of commands it issued is recorded per route in `mongo_commands_per_request`, and once
+    it has written, its later reads stay on the primary (see `get_read_db`).
+
+    Plain ASGI middleware, like `TracingMiddleware`, so the scope also covers the body of
+    a streamed response and the agent tasks it starts.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        with mongo_request_scope() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # The matched route's template (e.g. /api/users/{user_id}), not the raw path.
+                route = getattr(scope.get("route"), "path", scope["path"])
+                metrics.observe("mongo_commands_per_request", stats.total, route=route)
+                logger.debug("Mongo commands for %s: %s", route, dict(stats.commands))
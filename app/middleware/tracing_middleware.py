@@ -0,0 +1,48 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import activate, start_trace
+
+class TracingMiddleware:
+    """
+    Starts a trace for each sampled HTTP request or WebSocket session.
+
+    Written as plain ASGI middleware rather than `BaseHTTPMiddleware` so the root span
+    stays open until a streamed response has finished sending, not only until its
+    headers are ready. The trace ID is returned in an `X-Trace-Id` header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent")
+        span = start_trace(
+            f"{scope.get('method', 'WS')} {scope['path']}",
+            traceparent.decode("latin-1") if traceparent else None,
+            **{"http.method": scope.get("method", "WS"), "http.target": scope["path"]},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", span.context.trace_id.encode())
+                ]
+            await send(message)
+
+        try:
+            with activate(span):
+                await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
@@ -1,10 +1,46 @@
-from pydantic import BaseModel
+from datetime import datetime, timedelta
+
+import pytz
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import List, Optional
 
+from app.utils.timezones import get_zone
+
 class Event(BaseModel):
     """Schema for representing a calendar event to the agent and client."""
     google_event_id: Optional[str] = None
     title: str
     start_time: str
     end_time: str
-    attendees: List[str] = []
\ No newline at end of file
+    attendees: List[str] = []
+
+class EventImportRow(BaseModel):
+    """
+    Schema for one row of a bulk event import (an NDJSON line or an ICS VEVENT).
+    Naive datetimes are interpreted in `timezone`, or the importing user's timezone.
+    `google_event_id` is accepted so exports re-import cleanly, but is only used as a
+    fallback for `uid`: imported events are not linked to Google Calendar.
+    """
+    title: str = Field(min_length=1, max_length=500)
+    start_time: datetime
+    end_time: datetime
+    timezone: Optional[str] = None
+    attendees: List[EmailStr] = []
+    google_event_id: Optional[str] = None
+    uid: Optional[str] = Field(default=None, max_length=255)
+
+    @model_validator(mode="after")
+    def check_times(self):
+        if self.timezone is not None:
+            try:
+                get_zone(self.timezone)
+            except pytz.UnknownTimeZoneError:
+                raise ValueError(f"'{self.timezone}' is not a valid timezone.")
+        start, end = self.start_time, self.end_time
+        if (start.tzinfo is None) != (end.tzinfo is None):
+            raise ValueError("start_time and end_time must both include an offset, or neither.")
+        if end <= start:
+            raise ValueError("end_time must be after start_time.")
+        if end - start > timedelta(hours=24):
+            raise ValueError("Events longer than 24 hours are not supported.")
+        return self
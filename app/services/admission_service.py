@@ -0,0 +1,226 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsException
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.database.redis import get_redis
+
+# Atomic token bucket: refills at `rate` tokens/second up to `capacity`, then tries to
+# take `requested` tokens. Returns {allowed, seconds_until_enough_tokens}.
+_TOKEN_BUCKET_LUA = """
+local tokens_key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', tokens_key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= requested then
+  tokens = tokens - requested
+  allowed = 1
+else
+  retry_after = (requested - tokens) / rate
+end
+
+redis.call('HSET', tokens_key, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', tokens_key, math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets shared across workers through Redis, with a per-process fallback
+    when Redis is not configured or unreachable.
+    """
+
+    def __init__(self):
+        self._local: Dict[str, Tuple[float, float]] = {}
+
+    async def try_acquire(self, key: str, rate_per_minute: float, capacity: float) -> float:
+        """
+        Tries to take one token from bucket `key`.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        rate = rate_per_minute / 60.0
+        redis = get_redis()
+        if redis is not None:
+            try:
+                allowed, retry_after = await redis.eval(
+                    _TOKEN_BUCKET_LUA, 1, f"ratelimit:{key}", rate, capacity, time.time(), 1
+                )
+                return 0.0 if int(allowed) else float(retry_after)
+            except Exception as e:
+                logger.warning(f"Redis rate limit check failed for '{key}', using local bucket: {e}")
+        return self._try_acquire_local(key, rate, capacity)
+
+    def _try_acquire_local(self, key: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, last = self._local.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+        if tokens >= 1:
+            self._local[key] = (tokens - 1, now)
+            return 0.0
+        self._local[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+
+class FairScheduler:
+    """
+    Caps concurrent work at `capacity` slots and hands freed slots to waiting users
+    in round-robin order, so one user with many queued calls can't starve the others.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._turns: Deque[str] = deque()
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new `acquire` would have to wait."""
+        return self.in_use >= self.capacity or bool(self._turns)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def queued_for(self, user_id: str) -> int:
+        return len(self._waiters.get(user_id, ()))
+
+    async def acquire(self, user_id: str) -> None:
+        if self.in_use < self.capacity and not self._turns:
+            self.in_use += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        if user_id not in self._waiters:
+            self._waiters[user_id] = deque()
+            self._turns.append(user_id)
+        self._waiters[user_id].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us just as we were cancelled; pass it on.
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+
+    def release(self) -> None:
+        while self._turns:
+            user_id = self._turns.popleft()
+            queue = self._waiters[user_id]
+            future = queue.popleft()
+            if queue:
+                self._turns.append(user_id)
+            else:
+                del self._waiters[user_id]
+            if not future.done():
+                future.set_result(None)  # the slot moves to the waiter; in_use is unchanged
+                return
+        self.in_use -= 1
+
+    def _discard(self, user_id: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(user_id)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[user_id]
+                self._turns.remove(user_id)
+
+
+class AdmissionController:
+    """
+    Admission control for the chat agent.
+
+    - New chat streams are rate limited per user with a Redis token bucket and rejected
+      up front with a 429 + Retry-After when the user's bucket or the LLM queue is full.
+    - Every LLM call takes a slot from a per-worker fair scheduler, then a token from a
+      global, cross-worker bucket sized to the provider quota. A call that would queue
+      beyond `LLM_QUEUE_MAX_SIZE` (or `LLM_QUEUE_MAX_PER_USER`) is rejected instead,
+      since streams already admitted can make several calls each.
+    Queue wait and service time are recorded as separate metrics.
+    """
+
+    def __init__(self):
+        self.buckets = TokenBucketLimiter()
+        self.scheduler = FairScheduler(settings.LLM_MAX_INFLIGHT_CALLS)
+
+    async def admit_stream(self, user_id: str) -> None:
+        """
+        Decides whether a new chat stream may start.
+
+        Raises:
+            TooManyRequestsException: If the user is over their rate or the queue is full.
+        """
+        if (self.scheduler.queued >= settings.LLM_QUEUE_MAX_SIZE
+                or self.scheduler.queued_for(user_id) >= settings.LLM_QUEUE_MAX_PER_USER):
+            metrics.increment("admission_rejected_total", reason="queue_full")
+            raise TooManyRequestsException(retry_after=settings.ADMISSION_QUEUE_FULL_RETRY_AFTER_SECONDS)
+
+        retry_after = await self.buckets.try_acquire(
+            f"chat:user:{user_id}",
+            settings.CHAT_STREAMS_PER_USER_PER_MINUTE,
+            settings.CHAT_STREAMS_PER_USER_BURST,
+        )
+        if retry_after:
+            metrics.increment("admission_rejected_total", reason="user_rate")
+            raise TooManyRequestsException(retry_after=math.ceil(retry_after))
+        metrics.increment("admission_accepted_total")
+
+    @asynccontextmanager
+    async def llm_slot(self, user_id: str) -> AsyncIterator[None]:
+        """
+        Holds one LLM call slot for `user_id`, waiting fairly for it if needed.
+
+        Raises:
+            TooManyRequestsException: If the call would have to queue while the LLM queue,
+                or the user's share of it, is already full.
+        """
+        if self.scheduler.saturated and (
+            self.scheduler.queued >= settings.LLM_QUEUE_MAX_SIZE
+            or self.scheduler.queued_for(user_id) >= settings.LLM_QUEUE_MAX_PER_USER
+        ):
+            metrics.increment("admission_rejected_total", reason="llm_queue_full")
+            raise TooManyRequestsException(retry_after=settings.ADMISSION_QUEUE_FULL_RETRY_AFTER_SECONDS)
+        queued_at = time.perf_counter()
+        await self.scheduler.acquire(user_id)
+        started = None
+        try:
+            # The global token is taken by slot holders only, so it is granted in the
+            # scheduler's round-robin order, and a call cancelled while queued never takes one.
+            while True:
+                retry_after = await self.buckets.try_acquire(
+                    "llm:global", settings.LLM_GLOBAL_CALLS_PER_MINUTE, settings.LLM_GLOBAL_BURST
+                )
+                if not retry_after:
+                    break
+                await asyncio.sleep(retry_after)
+
+            started = time.perf_counter()
+            metrics.observe("llm_queue_wait_seconds", started - queued_at)
+            yield
+        finally:
+            self.scheduler.release()
+            if started is not None:
+                metrics.observe("llm_service_seconds", time.perf_counter() - started)
+
+
+admission_controller = AdmissionController()
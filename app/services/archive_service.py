@@ -0,0 +1,159 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReplaceOne
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.database.redis import get_redis
+from app.utils.timezones import as_utc
+
+ARCHIVE_COLLECTION = "events_archive"
+ARCHIVER_LOCK_KEY = "event-archiver:lock"
+
+def hot_boundary() -> datetime:
+    """
+    Returns the (naive UTC) time before which finished events may live in the archive.
+    Events ending after it are always in the hot `events` collection.
+    """
+    return datetime.utcnow() - timedelta(days=settings.EVENT_HOT_RETENTION_DAYS)
+
+
+class EventArchiveService:
+    """
+    Splits events into a hot collection (`events`: current, future and recently
+    finished meetings) and an archive (`events_archive`) of older ones.
+
+    Booking, conflict and availability queries only ever touch recent and future
+    time, so they run against the small hot collection. Reads that reach back past
+    the hot boundary go through `find_events`, which also reads the archive.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.events_collection = self.db.get_collection("events")
+        self.archive_collection = self.db.get_collection(ARCHIVE_COLLECTION)
+
+    async def ensure_indexes(self) -> None:
+        await self.archive_collection.create_index([("owner_user_id", ASCENDING), ("start_time_utc", ASCENDING)])
+        await self.archive_collection.create_index([("start_time_utc", ASCENDING), ("end_time_utc", ASCENDING)])
+        await self.archive_collection.create_index([("google_event_id", ASCENDING)])
+        # The archiver scans the hot collection by end time.
+        await self.events_collection.create_index([("end_time_utc", ASCENDING)])
+
+    async def find_events(
+        self, query: Dict, since_utc: Optional[datetime], projection: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Runs `query` against the hot collection and, when `since_utc` is before the hot
+        boundary, against the archive too. Results are sorted by start time. A document
+        caught mid-move can be in both collections, so duplicates are dropped by `_id`.
+        """
+        docs = await self.events_collection.find(query, projection).to_list(length=None)
+        if since_utc is not None and as_utc(since_utc).replace(tzinfo=None) < hot_boundary():
+            seen = {doc["_id"] for doc in docs}
+            archived = await self.archive_collection.find(query, projection).to_list(length=None)
+            docs.extend(doc for doc in archived if doc["_id"] not in seen)
+        docs.sort(key=lambda doc: doc["start_time_utc"])
+        return docs
+
+    async def find_one_event(
+        self, query: Dict, projection: Optional[Dict] = None
+    ) -> Tuple[Optional[Dict], Optional[AsyncIOMotorCollection]]:
+        """Finds one event in the hot collection, then the archive; returns it with its collection."""
+        for collection in (self.events_collection, self.archive_collection):
+            doc = await collection.find_one(query, projection)
+            if doc:
+                return doc, collection
+        return None, None
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int) -> int:
+        """
+        Moves up to `batch_size` events that ended before `cutoff` to the archive.
+        Pending events (a booking still being synced to Google) are left alone.
+
+        The copy is an upsert by `_id` and happens before the delete, so a crash or a
+        second worker running the same batch can only leave a duplicate that the next
+        run (and `find_events`) resolves, never lose an event.
+        """
+        docs = await self.events_collection.find(
+            {"end_time_utc": {"$lt": cutoff}, "status": {"$ne": "pending"}}
+        ).sort("end_time_utc", ASCENDING).limit(batch_size).to_list(length=None)
+        if not docs:
+            return 0
+        await self.archive_collection.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+        )
+        await self.events_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        return len(docs)
+
+    async def archive_past_events(self, cutoff: Optional[datetime] = None) -> int:
+        """Moves every archivable event to the archive in batches; returns how many moved."""
+        cutoff = cutoff or hot_boundary()
+        moved = 0
+        while True:
+            batch = await self.archive_batch(cutoff, settings.EVENT_ARCHIVE_BATCH_SIZE)
+            moved += batch
+            if batch < settings.EVENT_ARCHIVE_BATCH_SIZE:
+                break
+        if moved:
+            metrics.increment("events_archived_total", moved)
+            logger.info(f"Archived {moved} events that ended before {cutoff.isoformat()}.")
+        return moved
+
+
+# --- Background Archiver ---
+
+_archiver_task: Optional[asyncio.Task] = None
+
+async def _acquire_archiver_lock() -> bool:
+    # With several workers, Redis (when configured) makes a single one run each round.
+    # Without it every worker runs the archiver, which is safe because moves are idempotent.
+    redis = get_redis()
+    if redis is None:
+        return True
+    try:
+        return bool(await redis.set(
+            ARCHIVER_LOCK_KEY, "1", nx=True, ex=max(int(settings.EVENT_ARCHIVE_INTERVAL_SECONDS) - 1, 1)
+        ))
+    except Exception:
+        return True
+
+async def _archiver_loop(db: AsyncIOMotorDatabase) -> None:
+    service = EventArchiveService(db)
+    # Spread the first run so workers started together don't all scan at once.
+    await asyncio.sleep(random.uniform(0, min(settings.EVENT_ARCHIVE_INTERVAL_SECONDS, 60)))
+    while True:
+        try:
+            if await _acquire_archiver_lock():
+                await service.archive_past_events()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Event archiver run failed, retrying next interval: {e}")
+        await asyncio.sleep(settings.EVENT_ARCHIVE_INTERVAL_SECONDS)
+
+async def start_event_archiver(db: AsyncIOMotorDatabase) -> None:
+    """Ensures the archive indexes and starts the periodic archiver, if enabled."""
+    global _archiver_task
+    try:
+        await EventArchiveService(db).ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create events archive indexes: {e}")
+    if settings.EVENT_ARCHIVER_ENABLED and _archiver_task is None:
+        _archiver_task = asyncio.create_task(_archiver_loop(db))
+
+async def stop_event_archiver() -> None:
+    """Cancels the periodic archiver at shutdown."""
+    global _archiver_task
+    if _archiver_task is not None:
+        _archiver_task.cancel()
+        try:
+            await _archiver_task
+        except asyncio.CancelledError:
+            pass
+        _archiver_task = None
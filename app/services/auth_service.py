@@ -30,12 +30,12 @@ class AuthService:
         user_doc["hashed_password"] = hashed_password
         
         try:
+            # insert_one sets user_doc["_id"], so the stored document needs no re-read.
             await self.collection.insert_one(user_doc)
         except DuplicateKeyError:
             raise UserAlreadyExistsException(detail="User with this email already exists")
         
-        created_user_doc = await self.collection.find_one({"email": user_create.email})
-        return UserInDB(**created_user_doc)
+        return UserInDB(**user_doc)
 
     async def authenticate_user(self, email: str, password: str) -> UserInDB:
         """
@@ -0,0 +1,335 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytz
+from bson import ObjectId
+from bson.binary import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.services.archive_service import EventArchiveService
+from app.services.recurrence_service import RecurrenceService
+from app.utils.timezones import as_utc, get_zone
+
+# --- Bitmap Primitives ---
+# A company day is stored as a Python int used as a bitset: bit `i` is set when the
+# i-th slot (of AVAILABILITY_SLOT_MINUTES each) after company midnight is busy.
+# At 5-minute granularity a normal day is 288 bits, i.e. 36 bytes on disk.
+
+def _slot_delta() -> timedelta:
+    return timedelta(minutes=settings.AVAILABILITY_SLOT_MINUTES)
+
+def company_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    Returns the UTC start and end of a company-local day.
+    Computed through the company timezone so DST days get 23/25 hours.
+    """
+    company_tz = get_zone(settings.COMPANY_TIMEZONE)
+    start = company_tz.localize(datetime.combine(day, time.min)).astimezone(pytz.UTC)
+    end = company_tz.localize(datetime.combine(day + timedelta(days=1), time.min)).astimezone(pytz.UTC)
+    return start, end
+
+def slots_in_day(day: date) -> int:
+    """Returns the number of slots in a company day."""
+    start, end = company_day_bounds(day)
+    return int((end - start) / _slot_delta())
+
+def company_day_of(dt_utc: datetime) -> date:
+    """Returns the company-local date a UTC datetime falls on."""
+    company_tz = get_zone(settings.COMPANY_TIMEZONE)
+    return as_utc(dt_utc).astimezone(company_tz).date()
+
+def interval_mask(day: date, start_utc: datetime, end_utc: datetime) -> int:
+    """
+    Builds the bitmask of the slots of `day` touched by [start_utc, end_utc).
+    Partial slots are rounded outwards so the bitmap never under-reports busy time.
+    """
+    day_start, _ = company_day_bounds(day)
+    n_slots = slots_in_day(day)
+    slot = _slot_delta()
+
+    first = (as_utc(start_utc) - day_start) // slot
+    last_delta = as_utc(end_utc) - day_start
+    last = -(-last_delta // slot)  # ceiling division on timedeltas
+
+    first, last = max(first, 0), min(last, n_slots)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+def working_hours_mask(day: date) -> int:
+    """Returns the bitmask of the company's working hours on `day`."""
+    company_tz = get_zone(settings.COMPANY_TIMEZONE)
+    work_start = company_tz.localize(datetime.combine(day, time(settings.COMPANY_WORKING_START_HOUR)))
+    work_end = company_tz.localize(datetime.combine(day, time(settings.COMPANY_WORKING_END_HOUR)))
+    return interval_mask(day, work_start, work_end)
+
+def dilate(bitmap: int, width: int, n_slots: int) -> int:
+    """Grows every busy run by `width` slots on both sides (used to apply meeting buffers)."""
+    result = bitmap
+    for shift in range(1, width + 1):
+        result |= (bitmap << shift) | (bitmap >> shift)
+    return result & ((1 << n_slots) - 1)
+
+def free_run_starts(free: int, run_length: int) -> int:
+    """
+    Returns a bitmask whose bit `i` is set iff slots i..i+run_length-1 are all free.
+    This is a log-step AND-shift scan, so any duration costs O(log run_length) big-int ops.
+    """
+    if run_length <= 0:
+        return free
+    result, covered = free, 1
+    while covered < run_length:
+        step = min(covered, run_length - covered)
+        result &= result >> step
+        covered += step
+    return result
+
+def iter_set_bits(mask: int) -> Iterable[int]:
+    """Yields the indices of the set bits of `mask` in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def iter_runs(mask: int) -> Iterable[Tuple[int, int]]:
+    """Yields the (first, end) slot indices of each run of set bits of `mask`, in ascending order."""
+    while mask:
+        first = (mask & -mask).bit_length() - 1
+        shifted = mask >> first
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        yield first, first + length
+        mask &= ~(((1 << length) - 1) << first)
+
+def to_bytes(bitmap: int, n_slots: int) -> bytes:
+    return bitmap.to_bytes((n_slots + 7) // 8, "little")
+
+def from_bytes(raw: bytes) -> int:
+    return int.from_bytes(raw, "little")
+
+
+class AvailabilityService:
+    """
+    Maintains a materialized per-day availability bitmap of the shared calendar.
+
+    Each company day is one small document in the `availability` collection. Bitmaps
+    are rebuilt from the day's events and recurring-series occurrences whenever an event
+    on that day changes, and are materialized lazily the first time a day is read.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, read_db: Optional[AsyncIOMotorDatabase] = None):
+        self.db = db
+        self.collection = self.db.get_collection("availability")
+        # Stored bitmaps may be read from a secondary (`read_db`); a missing day is always
+        # rebuilt from the primary, so a lagging read is never persisted.
+        self.read_collection = (read_db or db).get_collection("availability")
+        self.events_collection = self.db.get_collection("events")
+
+    async def _series_busy(self, days: List[date]) -> List[Tuple[datetime, datetime]]:
+        """Expands the recurring-series occurrences covering `days` with a single series query."""
+        span_start, _ = company_day_bounds(min(days))
+        _, span_end = company_day_bounds(max(days))
+        return await RecurrenceService(self.db).busy_intervals(span_start, span_end)
+
+    async def _compute_day(self, day: date, series_busy: List[Tuple[datetime, datetime]]) -> int:
+        """Rebuilds the busy bitmap of a single day from its events and series occurrences."""
+        day_start, day_end = company_day_bounds(day)
+        # Past days (e.g. a busyness report on last quarter) may need the archive too.
+        events = await EventArchiveService(self.db).find_events(
+            {"start_time_utc": {"$lt": day_end}, "end_time_utc": {"$gt": day_start}},
+            since_utc=day_start,
+            projection={"start_time_utc": 1, "end_time_utc": 1},
+        )
+        bitmap = 0
+        for event in events:
+            bitmap |= interval_mask(day, event["start_time_utc"], event["end_time_utc"])
+        for start_utc, end_utc in series_busy:
+            bitmap |= interval_mask(day, start_utc, end_utc)
+        return bitmap
+
+    async def _store_day(self, day: date, bitmap: int, generation: ObjectId) -> bool:
+        """
+        Stores a day's bitmap only if the day still carries `generation`, the token its
+        rebuild claimed before reading events. Returns False if a later rebuild (or an
+        invalidation) has replaced the token, in which case this bitmap may be stale.
+        """
+        n_slots = slots_in_day(day)
+        result = await self.collection.update_one(
+            {"_id": day.isoformat(), "generation": generation},
+            {"$set": {
+                "bitmap": Binary(to_bytes(bitmap, n_slots)),
+                "slots": n_slots,
+                "busy_slots": bin(bitmap).count("1"),
+                "updated_at": datetime.utcnow(),
+            }},
+        )
+        return result.matched_count == 1
+
+    async def refresh_days(self, days: Iterable[date]) -> None:
+        """
+        Recomputes and stores the bitmaps of the given company days.
+
+        Concurrent refreshes of a day are ordered by a generation token: each refresh
+        claims the day's token before reading events, and stores its bitmap only if the
+        token is still its own, so a refresh that read events before a later write can
+        never overwrite the bitmap of the refresh that followed that write. Days that are
+        not materialized are left for the next read to build.
+        """
+        days = sorted(set(days))
+        if not days:
+            return
+        generation = ObjectId()
+        await self.collection.update_many(
+            {"_id": {"$in": [day.isoformat() for day in days]}}, {"$set": {"generation": generation}}
+        )
+        series_busy = await self._series_busy(days)
+        for day in days:
+            await self._store_day(day, await self._compute_day(day, series_busy), generation)
+
+    async def refresh_for_interval(self, start_utc: datetime, end_utc: datetime) -> None:
+        """
+        Recomputes every company day touched by an event interval.
+        Called after an event is created, moved or deleted.
+        """
+        await self.refresh_days(self.days_in_interval(start_utc, end_utc))
+
+    async def invalidate_from(self, start_utc: datetime, end_utc: Optional[datetime] = None) -> None:
+        """
+        Drops the stored bitmaps from the day of `start_utc` up to the day of `end_utc`
+        (or all later days). Used for recurring series, whose occurrences can span more
+        days than are worth rebuilding eagerly; the days are rebuilt on next read.
+        """
+        day_filter = {"$gte": company_day_of(start_utc).isoformat()}
+        if end_utc is not None:
+            day_filter["$lte"] = company_day_of(end_utc).isoformat()
+        await self.collection.delete_many({"_id": day_filter})
+
+    @staticmethod
+    def days_in_interval(start_utc: datetime, end_utc: datetime) -> Set[date]:
+        first, last = company_day_of(start_utc), company_day_of(end_utc)
+        return {first + timedelta(days=i) for i in range((last - first).days + 1)}
+
+    async def get_bitmaps(self, days: List[date]) -> Dict[date, int]:
+        """
+        Loads the busy bitmaps for `days` in one query, materializing any missing day.
+        A missing day is claimed with a fresh generation token first (see `refresh_days`),
+        so a write landing while it is being built discards the result instead of letting
+        it be stored; the day is then simply built again on the next read.
+        """
+        bitmaps: Dict[date, int] = {}
+        cursor = self.read_collection.find(
+            # A document without a bitmap is a claim by a build still in flight.
+            {"_id": {"$in": [d.isoformat() for d in days]}, "bitmap": {"$exists": True}},
+            {"bitmap": 1},
+        )
+        async for doc in cursor:
+            bitmaps[date.fromisoformat(doc["_id"])] = from_bytes(doc["bitmap"])
+
+        missing = [day for day in days if day not in bitmaps]
+        if missing:
+            generation = ObjectId()
+            for day in missing:
+                await self.collection.update_one(
+                    {"_id": day.isoformat()}, {"$set": {"generation": generation}}, upsert=True
+                )
+            series_busy = await self._series_busy(missing)
+            for day in missing:
+                bitmap = await self._compute_day(day, series_busy)
+                await self._store_day(day, bitmap, generation)
+                bitmaps[day] = bitmap
+        return bitmaps
+
+    async def find_free_slot_starts(
+        self, days: List[date], duration: timedelta, step_minutes: int
+    ) -> List[datetime]:
+        """
+        Returns the UTC start times, within working hours, where a meeting of
+        `duration` fits with the configured buffer on both sides.
+        Candidate starts are aligned to `step_minutes` from the start of the working day.
+        """
+        slot_minutes = settings.AVAILABILITY_SLOT_MINUTES
+        run_length = -(-int(duration.total_seconds()) // (slot_minutes * 60))
+        buffer_slots = -(-settings.MEETING_BUFFER_MINUTES // slot_minutes)
+        step_slots = max(step_minutes // slot_minutes, 1)
+
+        bitmaps = await self.get_bitmaps(days)
+        starts: List[datetime] = []
+        for day in days:
+            n_slots = slots_in_day(day)
+            work = working_hours_mask(day)
+            if not work:
+                continue
+            busy = dilate(bitmaps[day], buffer_slots, n_slots)
+            fits = free_run_starts(work & ~busy, run_length)
+
+            first_work_slot = (work & -work).bit_length() - 1
+            day_start, _ = company_day_bounds(day)
+            for index in iter_set_bits(fits):
+                if (index - first_work_slot) % step_slots == 0:
+                    starts.append(day_start + index * _slot_delta())
+        return starts
+
+    async def busy_intervals(self, days: List[date]) -> List[Tuple[datetime, datetime]]:
+        """
+        Returns the busy time of the shared calendar on `days` as naive UTC intervals
+        sorted by start, read from the same bitmaps `find_free_slot_starts` uses (so
+        rounded out to whole slots).
+        """
+        bitmaps = await self.get_bitmaps(days)
+        slot = _slot_delta()
+        intervals: List[Tuple[datetime, datetime]] = []
+        for day in sorted(days):
+            day_start = company_day_bounds(day)[0].replace(tzinfo=None)
+            for first, end in iter_runs(bitmaps[day]):
+                intervals.append((day_start + first * slot, day_start + end * slot))
+        return intervals
+
+    async def busy_summary(self, start_day: date, end_day: date) -> List[Dict]:
+        """
+        Summarizes how busy the team is for each day in [start_day, end_day],
+        reading only the per-day bitmaps instead of the underlying events.
+        """
+        days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+        bitmaps = await self.get_bitmaps(days)
+        slot_minutes = settings.AVAILABILITY_SLOT_MINUTES
+
+        summary = []
+        for day in days:
+            work = working_hours_mask(day)
+            working_slots = bin(work).count("1")
+            busy_slots = bin(bitmaps[day] & work).count("1")
+            summary.append({
+                "date": day.isoformat(),
+                "busy_minutes": busy_slots * slot_minutes,
+                "free_minutes": (working_slots - busy_slots) * slot_minutes,
+                "utilization": round(busy_slots / working_slots, 3) if working_slots else 0.0,
+            })
+        return summary
+
+
+async def refresh_availability(db: AsyncIOMotorDatabase, *intervals: Tuple[datetime, datetime]) -> None:
+    """
+    Best-effort refresh of the availability bitmaps touched by the given intervals.
+    A failure here must never fail the booking itself; the day is rebuilt on next read.
+    """
+    service = AvailabilityService(db)
+    days: Set[date] = set()
+    for start_utc, end_utc in intervals:
+        days |= service.days_in_interval(start_utc, end_utc)
+    try:
+        await service.refresh_days(days)
+    except Exception as e:
+        logger.warning(f"Failed to refresh availability bitmaps for {sorted(days)}: {e}")
+        try:
+            # Drop the stale days so the next read rebuilds them from events.
+            await service.collection.delete_many({"_id": {"$in": [d.isoformat() for d in days]}})
+        except Exception:
+            pass
+
+async def invalidate_series_availability(db: AsyncIOMotorDatabase, series: Dict) -> None:
+    """Best-effort invalidation of the availability bitmaps a recurring series covers."""
+    try:
+        await AvailabilityService(db).invalidate_from(series["series_start_utc"], series.get("series_end_utc"))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate availability for series {series.get('_id')}: {e}")
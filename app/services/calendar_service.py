@@ -4,19 +4,54 @@ import base64
 import json
 from functools import lru_cache
 
+from urllib.parse import urlsplit
+
+from google.auth.transport.requests import Request
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build, Resource
+from googleapiclient.http import build_http
 
 from app.core.config import settings
+from app.core.tracing import KIND_CLIENT, trace_span
+
+class TracedAuthorizedHttp(AuthorizedHttp):
+    """Authorized transport that records a client span for every Calendar API request."""
+
+    def request(self, uri, method="GET", *args, **kwargs):
+        parts = urlsplit(uri)
+        with trace_span(
+            f"http {method} {parts.netloc}", kind=KIND_CLIENT,
+            **{"http.method": method, "http.url": f"{parts.scheme}://{parts.netloc}{parts.path}"},
+        ) as span:
+            response, content = super().request(uri, method, *args, **kwargs)
+            if span is not None:
+                span.set_attribute("http.status_code", response.status)
+            return response, content
 
 class CalendarService:
     """A service to manage interactions with the Google Calendar API."""
 
+    @lru_cache(maxsize=1)
+    def get_credentials(self) -> service_account.Credentials:
+        """
+        Decodes the service account credentials once and caches them.
+
+        Returns:
+            service_account.Credentials: The scoped service account credentials.
+        """
+        creds_info = json.loads(base64.b64decode(settings.GOOGLE_CREDENTIALS_BASE64))
+        return service_account.Credentials.from_service_account_info(
+            creds_info, scopes=settings.GOOGLE_CALENDAR_SCOPES
+        )
+
     @lru_cache(maxsize=1)
     def get_client(self) -> Resource:
         """
         Initializes and returns a singleton instance of the Google Calendar service client.
-        The client is cached to avoid re-creating it multiple times.
+        The client is cached to avoid re-creating it multiple times, and is built from the
+        discovery document bundled with google-api-python-client, so no network fetch is needed.
+        With tracing enabled, its transport records a span per API request.
 
         Returns:
             Resource: The Google Calendar service client.
@@ -25,14 +60,26 @@ class CalendarService:
             ConnectionError: If the service client cannot be initialized.
         """
         try:
-            creds_info = json.loads(base64.b64decode(settings.GOOGLE_CREDENTIALS_BASE64))
-            creds = service_account.Credentials.from_service_account_info(
-                creds_info, scopes=settings.GOOGLE_CALENDAR_SCOPES
+            if settings.TRACING_ENABLED:
+                auth = {"http": TracedAuthorizedHttp(self.get_credentials(), http=build_http())}
+            else:
+                auth = {"credentials": self.get_credentials()}
+            return build(
+                'calendar', 'v3',
+                static_discovery=True,
+                cache_discovery=False,
+                **auth,
             )
-            return build('calendar', 'v3', credentials=creds)
         except Exception as e:
             raise ConnectionError(f"Failed to build Google Calendar service: {e}")
 
+    def refresh_token(self) -> None:
+        """
+        Fetches an OAuth access token ahead of time so the first API call doesn't have to.
+        The client refreshes it transparently once it expires.
+        """
+        self.get_credentials().refresh(Request())
+
 # We can keep a singleton instance available for easy use if needed,
 # but the primary access should be through the ServiceProvider.
 calendar_service_instance = CalendarService()
\ No newline at end of file
@@ -1,6 +1,8 @@
-import json
-from typing import AsyncGenerator, Dict, Any, List, Set
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncGenerator, Awaitable, Callable, Dict, Any, List, Optional, Set
 
+import orjson
 from langchain_core.messages import (
     BaseMessage,
     SystemMessage,
@@ -9,25 +11,92 @@ from langchain_core.messages import (
     ToolMessage
 )
 
-from app.agent.graph import agent_app, AgentState
+from app.agent.loop_guard import start_loop_guard
+from app.agent.prefetch import start_prefetch
 from app.agent.prompts.system_prompts import get_system_prompt
+from app.agent.recording import start_recording
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.profiling import ProfileSession, save_profile
+from app.core.tracing import start_span
 from app.schemas.chat import ChatRequest
 from app.schemas.user import UserInDB
 from app.utils.message_utils import parse_history
+from app.utils.sse import DONE_FRAME, cancel_on_disconnect, encode_sse
+
+if TYPE_CHECKING:
+    from app.agent.graph import AgentState
+
+
+def record_cancelled_turn(started: float) -> None:
+    """Counts a turn cancelled because its client went away, started at `started` (perf_counter)."""
+    metrics.increment("chat_turns_cancelled_total", reason="disconnect")
+    metrics.observe("chat_cancelled_turn_seconds", time.perf_counter() - started)
 
 
 class ChatService:
     """Service to manage and orchestrate chat interactions with the AI agent."""
 
     def __init__(self):
+        # Imported lazily so that loading the API doesn't pull in LangGraph and the Gemini SDK;
+        # the startup warm-up imports the graph before the first request arrives.
+        from app.agent.graph import agent_app
+
         self.agent_app = agent_app
         self.get_system_prompt = get_system_prompt
 
     async def stream_agent_response(
-        self, request: ChatRequest, current_user: UserInDB
-    ) -> AsyncGenerator[str, None]:
+        self,
+        request: ChatRequest,
+        current_user: UserInDB,
+        profile: Optional[ProfileSession] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Processes a chat request and streams the agent's response as encoded SSE frames.
+        With a `profile`, the whole turn is sampled and the profile is saved when it ends.
+        With `is_disconnected`, the turn runs in its own task and is cancelled when the
+        client goes away, so no further LLM calls or tools run for nobody.
+        """
+        frames = self._sse_frames(request, current_user, profile)
+        if is_disconnected is None:
+            async for frame in frames:
+                yield frame
+            return
+
+        started = time.perf_counter()
+        async for frame in cancel_on_disconnect(
+            frames, is_disconnected, settings.SSE_DISCONNECT_POLL_SECONDS, lambda: record_cancelled_turn(started)
+        ):
+            yield frame
+
+    async def _sse_frames(
+        self, request: ChatRequest, current_user: UserInDB, profile: Optional[ProfileSession]
+    ) -> AsyncGenerator[bytes, None]:
+        if profile is None:
+            async for chunk in self.stream_agent_events(request, current_user):
+                yield encode_sse(chunk)
+            yield DONE_FRAME
+            return
+
+        profile.start()
+        try:
+            async for chunk in self.stream_agent_events(request, current_user, profile):
+                yield encode_sse(chunk)
+            yield DONE_FRAME
+        finally:
+            profile.stop()
+            await asyncio.to_thread(save_profile, profile)
+
+    async def stream_agent_events(
+        self, request: ChatRequest, current_user: UserInDB, profile: Optional[ProfileSession] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         """
-        Processes a chat request and streams the agent's formatted response.
+        Processes a chat request and yields the agent's token/tool_start/tool_end
+        chunks as dictionaries, independent of the transport.
+        A `profile` travels in the graph config so nodes and tools can record spans;
+        so does a recorder of LLM and tool I/O when `AGENT_RECORDING_ENABLED` is set,
+        and the availability prefetcher started here, alongside the first model call.
         """
         system_prompt = self.get_system_prompt(current_user)
         history = parse_history(request.history)
@@ -43,82 +112,147 @@ class ChatService:
                 "email": current_user.email,
                 "timezone": current_user.timezone,
             },
+            "trace": None,
         }
 
         seen_tool_calls: Set[str] = set()
+        config: Dict[str, Any] = {"recursion_limit": 25, "configurable": {}}
+        if profile is not None:
+            config["configurable"]["profile"] = profile
+        recorder = start_recording(request.input, request.history, current_user.timezone)
+        if recorder is not None:
+            config["configurable"]["recorder"] = recorder
+        loop_guard = start_loop_guard()
+        if loop_guard is not None:
+            config["configurable"]["loop_guard"] = loop_guard
+        prefetcher = start_prefetch(request.input, request.history, initial_state["current_user"])
+        if prefetcher is not None:
+            config["configurable"]["prefetcher"] = prefetcher
+        started = time.perf_counter()
 
-        async for event in self.agent_app.astream(initial_state, {"recursion_limit": 25}):
-            formatted_event = self._format_stream_event(event, seen_tool_calls)
-            if formatted_event:
-                yield formatted_event
+        # Opened without becoming the active span: this generator resumes in a new task
+        # per chunk, so the span's context travels to the nodes in the graph state instead.
+        turn_span = start_span("chat.turn", history_messages=len(history))
+        if turn_span is not None:
+            initial_state["trace"] = turn_span.context
+        try:
+            async for event in self.agent_app.astream(initial_state, config):
+                chunk = self._format_stream_event(event, seen_tool_calls)
+                if chunk:
+                    yield chunk
+        finally:
+            if prefetcher is not None:
+                prefetcher.discard()
+            if turn_span is not None:
+                turn_span.end()
+            if recorder is not None:
+                await asyncio.to_thread(recorder.save, time.perf_counter() - started)
 
-        yield "data: [DONE]\n\n"
-
-    def _format_stream_event(self, event: Dict[str, Any], seen_tool_calls: Set[str]) -> str | None:
+    def _format_stream_event(self, event: Dict[str, Any], seen_tool_calls: Set[str]) -> Dict[str, Any] | None:
         """
-        Formats a single event chunk from the agent into an SSE-compatible string.
+        Formats a single event chunk from the agent into a client-facing chunk.
 
         Args:
             event (Dict[str, Any]): The event chunk from the agent.
             seen_tool_calls (Set[str]): A set of tool call IDs that have already been processed.
 
         Returns:
-            str | None: The formatted SSE string, or None if the event should be ignored.
+            Dict[str, Any] | None: The chunk, or None if the event should be ignored.
         """
         for key, value in event.items():
-            if key == "agent":
+            if key in ("agent", "loop_exit"):
                 return self._format_ai_message(value, seen_tool_calls)
             elif key == "tools":
                 return self._format_tool_message(value)
         return None
 
-    def _format_ai_message(self, value: Dict[str, Any], seen_tool_calls: Set[str]) -> str | None:
+    def _format_ai_message(self, value: Dict[str, Any], seen_tool_calls: Set[str]) -> Dict[str, Any] | None:
         """
-        Formats an AI message event into an SSE-compatible string.
+        Formats an AI message event into a token or tool_start chunk.
 
         Args:
             value (Dict[str, Any]): The AI message event.
             seen_tool_calls (Set[str]): A set of tool call IDs that have already been processed.
 
         Returns:
-            str | None: The formatted SSE string, or None if the event should be ignored.
+            Dict[str, Any] | None: The chunk, or None if the event should be ignored.
         """
         ai_message = value.get("messages", [])[-1]
         if isinstance(ai_message, AIMessage):
             if ai_message.content:
-                chunk = {"type": "token", "content": ai_message.content}
-                return f"data: {json.dumps(chunk)}\n\n"
+                return {"type": "token", "content": ai_message.content}
             if hasattr(ai_message, 'tool_calls') and ai_message.tool_calls:
                 tool_call = ai_message.tool_calls[0]
                 tool_call_id = tool_call.get('id')
                 if tool_call_id and tool_call_id not in seen_tool_calls:
                     seen_tool_calls.add(tool_call_id)
-                    chunk = {
+                    return {
                         "type": "tool_start",
                         "id": tool_call_id,
                         "name": tool_call.get('name', 'unknown'),
                         "args": tool_call.get('args', {})
                     }
-                    return f"data: {json.dumps(chunk)}\n\n"
         return None
 
-    def _format_tool_message(self, value: Dict[str, Any]) -> str | None:
+    def _format_tool_message(self, value: Dict[str, Any]) -> Dict[str, Any] | None:
         """
-        Formats a tool message event into an SSE-compatible string.
+        Formats a tool message event into a tool_end chunk.
 
         Args:
             value (Dict[str, Any]): The tool message event.
 
         Returns:
-            str | None: The formatted SSE string, or None if the event should be ignored.
+            Dict[str, Any] | None: The chunk, or None if the event should be ignored.
         """
         tool_message = value.get("messages", [])[-1]
         if isinstance(tool_message, ToolMessage):
-            chunk = {
+            return {
                 "type": "tool_end",
                 "tool_call_id": tool_message.tool_call_id,
                 "name": tool_message.name,
                 "output": tool_message.content
             }
-            return f"data: {json.dumps(chunk)}\n\n"
         return None
+
+
+class ChatSession:
+    """
+    Conversation state for a long-lived connection (e.g. a WebSocket).
+
+    Holds the resolved user and the running history so that each turn only
+    sends the new input, instead of re-authenticating and re-uploading history.
+    """
+
+    def __init__(self, chat_service: ChatService, current_user: UserInDB, max_history: int):
+        self.chat_service = chat_service
+        self.current_user = current_user
+        self.max_history = max_history
+        self.history: List[Dict[str, str]] = []
+
+    async def run_turn(self, user_input: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Runs one agent turn, yielding its chunks and recording the exchange in the history.
+        """
+        request = ChatRequest(input=user_input, history=self.history)
+        reply_parts: List[str] = []
+        async for chunk in self.chat_service.stream_agent_events(request, self.current_user):
+            if chunk["type"] == "token" and isinstance(chunk["content"], str):
+                reply_parts.append(chunk["content"])
+            elif chunk["type"] == "tool_end" and chunk["name"] == "update_user_timezone":
+                # Keep the cached user in sync so later turns use the new timezone.
+                self._sync_timezone(chunk["output"])
+            yield chunk
+
+        self.history.append({"type": "human", "content": user_input})
+        if reply_parts:
+            self.history.append({"type": "ai", "content": reply_parts[-1]})
+        del self.history[:-self.max_history]
+
+    def _sync_timezone(self, output: Any) -> None:
+        """Applies the timezone saved by a successful `update_user_timezone` call."""
+        try:
+            result = orjson.loads(output)
+        except (orjson.JSONDecodeError, TypeError):
+            return
+        if isinstance(result, dict) and result.get("status") == "success" and result.get("timezone"):
+            self.current_user = self.current_user.model_copy(update={"timezone": result["timezone"]})
@@ -0,0 +1,229 @@
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.services.availability_service import AvailabilityService
+from app.services.calendar_service import calendar_service_instance
+from app.services.recurrence_service import RecurrenceService
+from app.utils.timezones import as_utc, get_zone
+
+# All intervals in this module are (start, end) pairs of naive UTC datetimes, the same
+# representation Mongo returns, so the merge compares plain datetimes without tz lookups.
+Interval = Tuple[datetime, datetime]
+
+# The freebusy endpoint accepts at most this many calendars per query.
+FREEBUSY_MAX_ITEMS = 50
+
+def _naive_utc(dt: datetime) -> datetime:
+    return as_utc(dt).replace(tzinfo=None)
+
+def merge_busy_lists(busy_lists: Iterable[Sequence[Interval]]) -> List[Interval]:
+    """
+    K-way merges busy lists that are each sorted by start into one sorted list of
+    non-overlapping intervals.
+
+    The lists are concatenated and handed to `sorted`: timsort detects each input list
+    as an already-sorted run and only merges the k runs, which is O(n log k) like a heap
+    merge, but runs in C (about twice as fast as `heapq.merge` for 25+ attendees).
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(chain.from_iterable(busy_lists)):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def subtract_busy(windows: Sequence[Interval], busy: Sequence[Interval], min_duration: timedelta) -> List[Interval]:
+    """
+    Returns the parts of the sorted, disjoint `windows` not covered by the merged `busy`
+    list that are at least `min_duration` long. Both lists are walked once.
+    """
+    free: List[Interval] = []
+    index = 0
+    for window_start, window_end in windows:
+        while index < len(busy) and busy[index][1] <= window_start:
+            index += 1
+        cursor = window_start
+        scan = index
+        while scan < len(busy) and busy[scan][0] < window_end:
+            busy_start, busy_end = busy[scan]
+            if busy_start - cursor >= min_duration:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            scan += 1
+        if window_end - cursor >= min_duration:
+            free.append((cursor, window_end))
+    return free
+
+def working_windows(start_day: date, end_day: date) -> List[Interval]:
+    """Returns the company working hours of every day in [start_day, end_day] as UTC intervals."""
+    company_tz = get_zone(settings.COMPANY_TIMEZONE)
+    windows: List[Interval] = []
+    for offset in range((end_day - start_day).days + 1):
+        day = start_day + timedelta(days=offset)
+        work_start = company_tz.localize(datetime.combine(day, time(settings.COMPANY_WORKING_START_HOUR)))
+        work_end = company_tz.localize(datetime.combine(day, time(settings.COMPANY_WORKING_END_HOUR)))
+        windows.append((_naive_utc(work_start), _naive_utc(work_end)))
+    return windows
+
+def _with_buffer(intervals: Sequence[Interval], buffer: timedelta) -> List[Interval]:
+    # Widening every interval by the same amount keeps the list sorted by start.
+    return [(start - buffer, end + buffer) for start, end in intervals]
+
+
+class CommonAvailabilityService:
+    """
+    Finds the free time shared by several participants.
+
+    Busy intervals come from the events collection (events a participant owns or attends),
+    from the shared calendar's availability bitmaps (every booking is checked for
+    conflicts against the whole shared calendar, so its busy time blocks everyone) and,
+    optionally, from a single batched Google Calendar freebusy query over the
+    participants' own calendars. Every source yields lists sorted by start time, which
+    are k-way merged and subtracted from the company working hours.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.users_collection = self.db.get_collection("users")
+        self.events_collection = self.db.get_collection("events")
+
+    async def mongo_busy_lists(
+        self, emails: List[str], start_utc: datetime, end_utc: datetime
+    ) -> Tuple[Dict[str, List[Interval]], List[str]]:
+        """
+        Loads each participant's busy intervals (one-off events and recurring-series
+        occurrences) with one users query, one events query and one series query.
+
+        Returns:
+            A mapping of email to its busy intervals (events, then series occurrences,
+            each sorted by start), and the emails that have no account here.
+        """
+        owner_emails: Dict[object, str] = {}
+        async for user in self.users_collection.find({"email": {"$in": emails}}, {"email": 1}):
+            owner_emails[user["_id"]] = user["email"]
+        unknown = [email for email in emails if email not in owner_emails.values()]
+
+        busy: Dict[str, List[Interval]] = {email: [] for email in emails}
+        involves_participant = {"$or": [
+            {"owner_user_id": {"$in": list(owner_emails)}},
+            {"attendees": {"$in": emails}},
+        ]}
+
+        def add(interval: Interval, doc: Dict) -> None:
+            involved = set(doc.get("attendees") or []) & busy.keys()
+            owner_email = owner_emails.get(doc.get("owner_user_id"))
+            if owner_email:
+                involved.add(owner_email)
+            for email in involved:
+                busy[email].append(interval)
+
+        # Both sources are sorted by start, so each per-participant list stays made of
+        # two sorted runs, which the merge below handles at no extra cost.
+        cursor = self.events_collection.find(
+            {
+                "start_time_utc": {"$lt": _naive_utc(end_utc)},
+                "end_time_utc": {"$gt": _naive_utc(start_utc)},
+                **involves_participant,
+            },
+            {"owner_user_id": 1, "attendees": 1, "start_time_utc": 1, "end_time_utc": 1},
+        ).sort("start_time_utc", 1)
+        async for event in cursor:
+            add((_naive_utc(event["start_time_utc"]), _naive_utc(event["end_time_utc"])), event)
+        for interval, series in await RecurrenceService(self.db).occurrences(start_utc, end_utc, involves_participant):
+            add(interval, series)
+        return busy, unknown
+
+    async def google_busy_lists(
+        self, calendar_ids: List[str], start_utc: datetime, end_utc: datetime
+    ) -> Tuple[Dict[str, List[Interval]], List[str]]:
+        """
+        Queries Google Calendar freebusy for the given calendars in as few requests as
+        possible: one per FREEBUSY_MAX_ITEMS calendars. The requests run one after another
+        because the shared API client is not thread-safe.
+
+        Returns:
+            A mapping of calendar id to its busy list, and the calendar ids Google
+            could not answer for (not shared with the service account, not found, ...).
+        """
+        service = await run_in_threadpool(calendar_service_instance.get_client)
+        busy: Dict[str, List[Interval]] = {}
+        unavailable: List[str] = []
+        for i in range(0, len(calendar_ids), FREEBUSY_MAX_ITEMS):
+            body = {
+                "timeMin": as_utc(start_utc).isoformat(),
+                "timeMax": as_utc(end_utc).isoformat(),
+                "items": [{"id": calendar_id} for calendar_id in calendar_ids[i:i + FREEBUSY_MAX_ITEMS]],
+            }
+            response = await run_in_threadpool(service.freebusy().query(body=body).execute)
+            for calendar_id, calendar in response.get("calendars", {}).items():
+                if calendar.get("errors"):
+                    unavailable.append(calendar_id)
+                    continue
+                busy[calendar_id] = sorted(
+                    (
+                        _naive_utc(datetime.fromisoformat(period["start"].replace('Z', '+00:00'))),
+                        _naive_utc(datetime.fromisoformat(period["end"].replace('Z', '+00:00'))),
+                    )
+                    for period in calendar.get("busy", [])
+                )
+        return busy, unavailable
+
+    async def find_common_availability(
+        self,
+        emails: List[str],
+        start_day: date,
+        end_day: date,
+        duration: timedelta,
+        include_google: Optional[bool] = None,
+        not_before_utc: Optional[datetime] = None,
+    ) -> Dict:
+        """
+        Computes the windows within working hours, across the company days
+        [start_day, end_day], in which every participant is free for at least `duration`
+        (with the configured meeting buffer around each busy interval).
+
+        Returns:
+            A dict with `free_windows` (UTC interval list), `unknown_participants`
+            (emails without an account here) and `unverified_calendars` (calendars
+            Google could not report on; their busy time is only known from our events).
+        """
+        if include_google is None:
+            include_google = settings.COMMON_AVAILABILITY_USE_GOOGLE_FREEBUSY
+
+        windows = working_windows(start_day, end_day)
+        if not_before_utc is not None:
+            floor = _naive_utc(not_before_utc)
+            windows = [(max(start, floor), end) for start, end in windows if end > floor]
+        if not windows:
+            return {"free_windows": [], "unknown_participants": [], "unverified_calendars": []}
+        range_start, range_end = windows[0][0], windows[-1][1]
+
+        busy_by_source, unknown = await self.mongo_busy_lists(emails, range_start, range_end)
+        busy_lists = list(busy_by_source.values())
+        # A window is only bookable if it is also free on the shared calendar.
+        days = [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+        busy_lists.append(await AvailabilityService(self.db).busy_intervals(days))
+        unverified: List[str] = []
+        if include_google:
+            try:
+                google_busy, unverified = await self.google_busy_lists(emails, range_start, range_end)
+                busy_lists.extend(google_busy.values())
+            except Exception as e:
+                logger.warning(f"Google freebusy query failed, using local events only: {e}")
+                unverified = list(emails)
+
+        buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
+        merged = merge_busy_lists(_with_buffer(busy, buffer) for busy in busy_lists)
+        return {
+            "free_windows": subtract_busy(windows, merged, duration),
+            "unknown_participants": unknown,
+            "unverified_calendars": unverified,
+        }
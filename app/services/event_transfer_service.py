@@ -0,0 +1,292 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.schemas.event import EventImportRow
+from app.services.archive_service import EventArchiveService, hot_boundary
+from app.services.availability_service import AvailabilityService
+from app.services.common_availability_service import merge_busy_lists
+from app.services.recurrence_service import RecurrenceService, expand_series
+from app.services.reminder_service import notify_event_changed
+from app.utils.event_formats import ICS_FOOTER, ICS_HEADER, ParsedRow, encode_ndjson, encode_vevent
+from app.utils.timezones import as_utc, to_utc
+
+# Intervals are (start, end) pairs of naive UTC datetimes, as stored in Mongo.
+Interval = Tuple[datetime, datetime]
+
+DUPLICATE_KEY_ERROR = 11000
+
+def _naive_utc(dt: datetime) -> datetime:
+    return as_utc(dt).replace(tzinfo=None)
+
+def _clusters(intervals: List[Interval]) -> List[Interval]:
+    # Merges the sorted row intervals of a batch into disjoint ranges, so the conflict
+    # query covers only the time the batch occupies, however far apart its rows are.
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+class EventTransferService:
+    """
+    Bulk import and export of a user's events.
+
+    Both directions stream: imports are validated and written one batch of
+    `EVENT_IMPORT_BATCH_SIZE` rows at a time, and exports are encoded straight from
+    the Mongo cursors, so memory use does not grow with the number of events.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.events_collection = self.db.get_collection("events")
+        self.archive_service = EventArchiveService(db)
+        self.recurrence_service = RecurrenceService(db)
+
+    async def ensure_indexes(self) -> None:
+        # Makes re-running an import idempotent: a row whose UID the owner already
+        # imported is rejected by the unordered insert as a duplicate.
+        await self.events_collection.create_index(
+            [("owner_user_id", ASCENDING), ("import_uid", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"import_uid": {"$type": "string"}},
+        )
+
+    # --- Import ---
+
+    async def import_rows(
+        self, rows: AsyncIterator[ParsedRow], owner_id: ObjectId, user_timezone: str, allow_conflicts: bool = False
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Validates, conflict-checks and inserts parsed rows, yielding the per-row results
+        of each batch as it completes, then a final summary.
+
+        Each result is `{"row": n, "status": ...}` with status `created` (plus `id`),
+        `conflict`, `duplicate` or `invalid` (plus `error`). Naive row times are
+        interpreted in the row's `timezone`, or the user's.
+        """
+        counts = {"created": 0, "conflict": 0, "duplicate": 0, "invalid": 0, "error": 0}
+        results: List[Dict] = []
+        batch: List[Tuple[int, Dict]] = []
+
+        async for row, fields, error in rows:
+            if error is None:
+                try:
+                    batch.append((row, self._to_document(EventImportRow(**fields), owner_id, user_timezone)))
+                except ValidationError as e:
+                    error = _format_errors(e)
+            if error is not None:
+                results.append({"row": row, "status": "invalid", "error": error})
+            if len(batch) >= settings.EVENT_IMPORT_BATCH_SIZE:
+                results.extend(await self._write_batch(batch, allow_conflicts))
+                batch = []
+                yield self._counted(results, counts)
+                results = []
+
+        if batch:
+            results.extend(await self._write_batch(batch, allow_conflicts))
+        if results:
+            yield self._counted(results, counts)
+        metrics.increment("events_imported_total", counts["created"])
+        yield [{"summary": counts}]
+
+    @staticmethod
+    def _counted(results: List[Dict], counts: Dict[str, int]) -> List[Dict]:
+        for result in results:
+            counts[result["status"]] += 1
+        return results
+
+    @staticmethod
+    def _to_document(row: EventImportRow, owner_id: ObjectId, user_timezone: str) -> Dict:
+        # Imported events are local-only: they block time here but have no Google event.
+        # A client-supplied google_event_id is never stored as one, since delete_event and
+        # update_event act on Google by that id; it only serves as the UID if none is given.
+        zone_name = row.timezone or user_timezone
+        return {
+            "google_event_id": None,
+            "import_uid": row.uid or row.google_event_id,
+            "owner_user_id": owner_id,
+            "title": row.title,
+            "start_time_utc": _naive_utc(to_utc(row.start_time, zone_name)),
+            "end_time_utc": _naive_utc(to_utc(row.end_time, zone_name)),
+            "original_timezone": zone_name,
+            "attendees": [str(attendee) for attendee in row.attendees],
+            "created_at": datetime.utcnow(),
+            "status": "imported",
+        }
+
+    async def _busy_intervals(self, clusters: List[Interval]) -> List[Interval]:
+        """Returns the merged existing events and series occurrences overlapping the clusters."""
+        span_start, span_end = clusters[0][0], clusters[-1][1]
+        events = await self.archive_service.find_events(
+            {"$or": [{"start_time_utc": {"$lt": end}, "end_time_utc": {"$gt": start}} for start, end in clusters]},
+            since_utc=span_start,
+            projection={"start_time_utc": 1, "end_time_utc": 1},
+        )
+        busy_lists = [[(doc["start_time_utc"], doc["end_time_utc"]) for doc in events]]
+        for series in await self.recurrence_service.active_series(span_start, span_end):
+            busy_lists.append([
+                interval for start, end in clusters for interval in expand_series(series, start, end)
+            ])
+        return merge_busy_lists(busy_lists)
+
+    async def _write_batch(self, batch: List[Tuple[int, Dict]], allow_conflicts: bool) -> List[Dict]:
+        """
+        Conflict-checks one batch against existing events, series occurrences and the
+        batch's own earlier rows, then inserts the rest with a single unordered insert.
+        Overlaps are strict: imported meetings already happened or are already agreed,
+        so the booking buffer does not apply.
+        """
+        batch.sort(key=lambda item: item[1]["start_time_utc"])
+        intervals = [(doc["start_time_utc"], doc["end_time_utc"]) for _, doc in batch]
+        results: List[Dict] = []
+        accepted: List[Tuple[int, Dict]] = []
+
+        if allow_conflicts:
+            accepted = batch
+        else:
+            busy = await self._busy_intervals(_clusters(intervals))
+            busy_starts = [start for start, _ in busy]
+            busy_ends = [end for _, end in busy]
+            accepted_until: Optional[datetime] = None
+            for (row, doc), (start, end) in zip(batch, intervals):
+                # `busy` is merged and disjoint, so its end times are sorted as well.
+                index = bisect_right(busy_ends, start)
+                overlaps_existing = index < len(busy) and busy_starts[index] < end
+                overlaps_batch = accepted_until is not None and start < accepted_until
+                if overlaps_existing or overlaps_batch:
+                    results.append({"row": row, "status": "conflict", "error": "Overlaps an existing event."})
+                    continue
+                accepted.append((row, doc))
+                accepted_until = end if accepted_until is None else max(accepted_until, end)
+
+        if not accepted:
+            return results
+
+        failed: Dict[int, Dict] = {}
+        try:
+            await self.events_collection.insert_many([doc for _, doc in accepted], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error
+        for index, (row, doc) in enumerate(accepted):
+            write_error = failed.get(index)
+            if write_error is None:
+                results.append({"row": row, "status": "created", "id": str(doc["_id"])})
+            elif write_error.get("code") == DUPLICATE_KEY_ERROR:
+                results.append({"row": row, "status": "duplicate", "error": "This event was already imported."})
+            else:
+                results.append({"row": row, "status": "error", "error": write_error.get("errmsg", "Write failed.")})
+
+        if len(failed) < len(accepted):
+            await self._invalidate_availability(accepted)
+            for index, (_, doc) in enumerate(accepted):
+                if index not in failed:
+                    await notify_event_changed(doc["_id"], new_start_utc=doc["start_time_utc"])
+        return results
+
+    async def _invalidate_availability(self, accepted: List[Tuple[int, Dict]]) -> None:
+        # Best-effort, like every other availability update: the bitmaps of the touched
+        # days are dropped and rebuilt on next read instead of recomputed per row.
+        start = min(doc["start_time_utc"] for _, doc in accepted)
+        end = max(doc["end_time_utc"] for _, doc in accepted)
+        try:
+            await AvailabilityService(self.db).invalidate_from(start, end)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate availability after import ({start} to {end}): {e}")
+
+    # --- Export ---
+
+    async def _owner_events(
+        self, owner_id: ObjectId, start_utc: Optional[datetime], end_utc: Optional[datetime]
+    ) -> AsyncIterator[Dict]:
+        """
+        Streams the owner's events: the hot collection first, then the archive when the
+        range reaches past the hot boundary. An event the archiver moves mid-export can be
+        seen in both; only hot events older than the boundary can be, so just their ids
+        are remembered to skip the archived copy.
+        """
+        query: Dict = {"owner_user_id": owner_id}
+        if start_utc is not None:
+            query["end_time_utc"] = {"$gt": start_utc}
+        if end_utc is not None:
+            query["start_time_utc"] = {"$lt": end_utc}
+
+        boundary = hot_boundary()
+        moving_ids = set()
+        async for doc in self.events_collection.find(query).sort("start_time_utc", ASCENDING):
+            if doc["end_time_utc"] < boundary:
+                moving_ids.add(doc["_id"])
+            yield doc
+
+        if start_utc is not None and start_utc >= boundary:
+            return
+        archive_cursor = self.archive_service.archive_collection.find(query).sort("start_time_utc", ASCENDING)
+        async for doc in archive_cursor:
+            if doc["_id"] not in moving_ids:
+                yield doc
+
+    async def export_events(
+        self, owner_id: ObjectId, export_format: str,
+        start_utc: Optional[datetime] = None, end_utc: Optional[datetime] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Encodes the owner's events as NDJSON (one importable row per line) or an
+        iCalendar file, yielding chunks of about `EVENT_EXPORT_CHUNK_BYTES`.
+        """
+        start_utc = _naive_utc(start_utc) if start_utc else None
+        end_utc = _naive_utc(end_utc) if end_utc else None
+        chunk_bytes = settings.EVENT_EXPORT_CHUNK_BYTES
+        now = datetime.utcnow()
+        buffer = bytearray(ICS_HEADER.encode() if export_format == "ics" else b"")
+
+        async for doc in self._owner_events(owner_id, start_utc, end_utc):
+            uid = doc.get("import_uid") or doc.get("google_event_id") or str(doc["_id"])
+            if export_format == "ics":
+                buffer += encode_vevent(
+                    uid, doc.get("title"), doc["start_time_utc"], doc["end_time_utc"],
+                    doc.get("attendees", []), doc.get("created_at") or now,
+                ).encode()
+            else:
+                buffer += encode_ndjson({
+                    "uid": uid,
+                    "google_event_id": doc.get("google_event_id"),
+                    "title": doc.get("title"),
+                    "start_time": as_utc(doc["start_time_utc"]).isoformat(),
+                    "end_time": as_utc(doc["end_time_utc"]).isoformat(),
+                    "attendees": doc.get("attendees", []),
+                    "status": doc.get("status"),
+                })
+            if len(buffer) >= chunk_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+
+        if export_format == "ics":
+            buffer += ICS_FOOTER.encode()
+        if buffer:
+            yield bytes(buffer)
+
+
+async def ensure_event_transfer_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Creates the import de-duplication index at startup; a failure is logged and does not block startup."""
+    try:
+        await EventTransferService(db).ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create event import index: {e}")
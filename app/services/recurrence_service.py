@@ -0,0 +1,276 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+from dateutil.parser import parse as parse_datetime
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrule, rrulestr
+from fastapi.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.utils.timezones import as_utc, get_zone, to_utc
+
+# (start, end) pairs of naive UTC datetimes, the same representation Mongo returns.
+Interval = Tuple[datetime, datetime]
+
+# Sub-daily rules would turn a single series into thousands of occurrences per week.
+SUPPORTED_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+
+# Widens the local-time bounds of a window to cover UTC offset changes (at most 2h, at Troll).
+DST_SLACK = timedelta(hours=3)
+
+# --- Rule Handling ---
+# A series stores its RRULE text plus the first occurrence as a naive *local* datetime in
+# the series timezone, so occurrences keep their wall-clock time across DST changes.
+
+def _rule_parts(rule_text: str) -> Dict[str, str]:
+    return dict(part.split("=", 1) for part in rule_text.split(";") if "=" in part)
+
+def normalize_rule(rule_text: str) -> str:
+    """
+    Returns the canonical form of an RRULE (no 'RRULE:' prefix, upper-case).
+
+    Raises:
+        ValueError: If the rule is malformed, uses an unsupported frequency, or is
+            longer than RECURRENCE_MAX_COUNT occurrences.
+    """
+    text = rule_text.strip().upper()
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    parts = _rule_parts(text)
+    if parts.get("FREQ") not in SUPPORTED_FREQUENCIES:
+        raise ValueError(f"Recurrence frequency must be one of {', '.join(sorted(SUPPORTED_FREQUENCIES))}.")
+    if "COUNT" in parts and "UNTIL" in parts:
+        raise ValueError("A recurrence rule cannot have both COUNT and UNTIL.")
+    if "COUNT" in parts and not 0 < int(parts["COUNT"]) <= settings.RECURRENCE_MAX_COUNT:
+        raise ValueError(f"COUNT must be between 1 and {settings.RECURRENCE_MAX_COUNT}.")
+    rrulestr(_local_until(text, "UTC"), dtstart=datetime(2000, 1, 1))  # full syntax check
+    return text
+
+def _local_until(rule_text: str, zone_name: str) -> str:
+    # dateutil needs UNTIL to match the (naive, local) dtstart, so a UTC 'Z' value is
+    # rewritten to the series' local wall time.
+    parts = _rule_parts(rule_text)
+    until = parts.get("UNTIL", "")
+    if not until.endswith("Z"):
+        return rule_text
+    until_utc = datetime.strptime(until, "%Y%m%dT%H%M%SZ").replace(tzinfo=pytz.UTC)
+    parts["UNTIL"] = until_utc.astimezone(get_zone(zone_name)).strftime("%Y%m%dT%H%M%S")
+    return ";".join(f"{key}={value}" for key, value in parts.items())
+
+@lru_cache(maxsize=8192)
+def _parse(rule_text: str, zone_name: str, dtstart_local: datetime) -> rrule:
+    return rrulestr(_local_until(rule_text, zone_name), dtstart=dtstart_local, cache=False)
+
+@lru_cache(maxsize=8192)
+def _count_as_until(rule_text: str, zone_name: str, dtstart_local: datetime) -> str:
+    # COUNT is relative to the original start, so it blocks re-anchoring. Replacing it by an
+    # UNTIL at the last occurrence (computed once per series) describes the same occurrences.
+    last = _parse(rule_text, zone_name, dtstart_local)[-1]
+    parts = {key: value for key, value in _rule_parts(rule_text).items() if key != "COUNT"}
+    parts["UNTIL"] = last.strftime("%Y%m%dT%H%M%S")
+    return ";".join(f"{key}={value}" for key, value in parts.items())
+
+def rule_near(rule_text: str, zone_name: str, dtstart_local: datetime, local_from: datetime) -> rrule:
+    """
+    Returns the series rule re-anchored to a whole number of periods before `local_from`.
+
+    dateutil always iterates from dtstart, so a daily series that started two years ago
+    would walk ~700 occurrences to answer a one-day query. Moving dtstart forward by
+    whole periods (days/weeks for DAILY/WEEKLY, months for MONTHLY) yields exactly the
+    same occurrences after `local_from`. COUNT-limited rules are first rewritten with
+    an equivalent UNTIL. The anchor only changes once per period, so repeated queries
+    hit the parse cache.
+    """
+    parts = _rule_parts(rule_text)
+    frequency, interval = parts["FREQ"], int(parts.get("INTERVAL", 1))
+    anchor = dtstart_local
+    if local_from > dtstart_local and frequency in ("DAILY", "WEEKLY", "MONTHLY"):
+        if "COUNT" in parts:
+            rule_text = _count_as_until(rule_text, zone_name, dtstart_local)
+        if frequency in ("DAILY", "WEEKLY"):
+            # dtstart + k whole periods stays in phase with the original rule (same weekday,
+            # same INTERVAL alignment), and is never later than `local_from`.
+            period = timedelta(days=interval * (7 if frequency == "WEEKLY" else 1))
+            periods = (local_from - dtstart_local) // period
+            if periods > 0:
+                anchor = dtstart_local + periods * period
+        elif dtstart_local.day <= 28:
+            # Days 29-31 would be clamped by the month shift and change the default BYMONTHDAY.
+            # One period of margin, since the anchor day may fall after `local_from` in its month.
+            months = (local_from.year - dtstart_local.year) * 12 + local_from.month - dtstart_local.month
+            periods = months // interval - 1
+            if periods > 0:
+                anchor = dtstart_local + relativedelta(months=periods * interval)
+    return _parse(rule_text, zone_name, anchor)
+
+def _to_local_naive(dt_utc: datetime, zone_name: str) -> datetime:
+    return as_utc(dt_utc).astimezone(get_zone(zone_name)).replace(tzinfo=None)
+
+def _to_naive_utc(local: datetime, zone_name: str) -> datetime:
+    return to_utc(local, zone_name).replace(tzinfo=None)
+
+def expand_series(series: Dict, window_start_utc: datetime, window_end_utc: datetime) -> List[Interval]:
+    """
+    Expands the occurrences of one series that overlap [window_start_utc, window_end_utc),
+    iterating only over the window, never over the whole series.
+    """
+    zone_name = series["timezone"]
+    duration = timedelta(minutes=series["duration_minutes"])
+    # Pad the local bounds to absorb offset changes; the exact filter is done in UTC.
+    local_from = _to_local_naive(window_start_utc, zone_name) - duration - DST_SLACK
+    local_to = _to_local_naive(window_end_utc, zone_name) + DST_SLACK
+    rule = rule_near(series["rrule"], zone_name, series["dtstart_local"], local_from)
+
+    window_start, window_end = as_utc(window_start_utc).replace(tzinfo=None), as_utc(window_end_utc).replace(tzinfo=None)
+    occurrences: List[Interval] = []
+    for local_start in rule.between(local_from, local_to, inc=True):
+        # Occurrences keep their local start time; the duration is elapsed time.
+        start = _to_naive_utc(local_start, zone_name)
+        end = start + duration
+        if start < window_end and end > window_start:
+            occurrences.append((start, end))
+    return occurrences
+
+def _expand_all(series_list: List[Dict], window_start_utc: datetime, window_end_utc: datetime) -> List[Tuple[Interval, Dict]]:
+    found = []
+    for series in series_list:
+        for interval in expand_series(series, window_start_utc, window_end_utc):
+            found.append((interval, series))
+    found.sort(key=lambda item: item[0])
+    return found
+
+def _first_overlapping(series_list: List[Dict], window_start_utc: datetime, window_end_utc: datetime) -> Optional[Dict]:
+    for series in series_list:
+        if expand_series(series, window_start_utc, window_end_utc):
+            return series
+    return None
+
+def series_bounds(rule_text: str, zone_name: str, dtstart_local: datetime, duration: timedelta) -> Interval:
+    """
+    Returns the UTC start of the first occurrence and the UTC end of the last one
+    (None for a series without COUNT or UNTIL). Stored on the series document so
+    overlap queries can skip series that are not active in a window.
+    """
+    rule = _parse(rule_text, zone_name, dtstart_local)
+    first = rule.after(dtstart_local, inc=True)
+    if first is None:
+        raise ValueError("The recurrence rule produces no occurrences.")
+    last: Optional[datetime] = None
+    if "COUNT" in _rule_parts(rule_text):
+        last = rule[-1]
+    elif "UNTIL" in _rule_parts(rule_text):
+        until = parse_datetime(_rule_parts(_local_until(rule_text, zone_name))["UNTIL"])
+        last = rule_near(rule_text, zone_name, dtstart_local, until).before(until, inc=True)
+    series_end = _to_naive_utc(last, zone_name) + duration if last else None
+    return _to_naive_utc(first, zone_name), series_end
+
+
+class RecurrenceService:
+    """
+    Stores recurring meetings compactly as one document per series in `event_series`
+    and answers overlap queries by expanding occurrences only inside the queried window.
+
+    The series index (`series_start_utc`, `series_end_utc`) limits every query to the
+    series active in the window; an open-ended series has `series_end_utc: None`, so it
+    is active in every later window. Expanding the active series is CPU-bound (about
+    0.1 ms per series for a one-day window), so it runs in the thread pool rather than
+    on the event loop.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = self.db.get_collection("event_series")
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index([("series_start_utc", ASCENDING), ("series_end_utc", ASCENDING)])
+        await self.collection.create_index([("owner_user_id", ASCENDING)])
+        await self.collection.create_index([("google_event_id", ASCENDING)])
+
+    async def active_series(
+        self, window_start_utc: datetime, window_end_utc: datetime, extra_filter: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Loads the series that may have occurrences overlapping the window."""
+        query = {
+            "series_start_utc": {"$lt": as_utc(window_end_utc)},
+            "$or": [{"series_end_utc": None}, {"series_end_utc": {"$gt": as_utc(window_start_utc)}}],
+        }
+        if extra_filter:
+            query = {"$and": [query, extra_filter]}
+        return await self.collection.find(query).to_list(length=None)
+
+    async def occurrences(
+        self, window_start_utc: datetime, window_end_utc: datetime, extra_filter: Optional[Dict] = None
+    ) -> List[Tuple[Interval, Dict]]:
+        """Returns (interval, series) for every occurrence overlapping the window, sorted by start."""
+        series_list = await self.active_series(window_start_utc, window_end_utc, extra_filter)
+        if not series_list:
+            return []
+        return await run_in_threadpool(_expand_all, series_list, window_start_utc, window_end_utc)
+
+    async def busy_intervals(self, window_start_utc: datetime, window_end_utc: datetime) -> List[Interval]:
+        """Returns the sorted occurrence intervals of every series overlapping the window."""
+        return [interval for interval, _ in await self.occurrences(window_start_utc, window_end_utc)]
+
+    async def find_conflict(self, start_utc: datetime, end_utc: datetime) -> Optional[Dict]:
+        """
+        Returns a series with an occurrence overlapping [start_utc, end_utc), if any.
+        Callers pass the interval already widened by the meeting buffer.
+        """
+        series_list = await self.active_series(start_utc, end_utc)
+        if not series_list:
+            return None
+        return await run_in_threadpool(_first_overlapping, series_list, start_utc, end_utc)
+
+    async def first_conflict(
+        self, series: Dict, window_start_utc: datetime, window_end_utc: datetime, buffer: timedelta
+    ) -> Optional[Interval]:
+        """
+        Returns the first occurrence of a (not yet stored) series, within the window,
+        that overlaps an existing event or an occurrence of another series once the
+        buffer is applied. One events query and one series query cover the whole window,
+        and the sorted lists are compared in a single two-pointer pass.
+
+        This is a check, not a reservation: nothing stops a booking that lands between
+        it and the caller's insert, the same as for single events. Occurrences after
+        the window are not checked against existing events; later bookings are still
+        checked against the series by `find_conflict`.
+        """
+        candidates = expand_series(series, window_start_utc, window_end_utc)
+        if not candidates:
+            return None
+        busy_start, busy_end = candidates[0][0] - buffer, candidates[-1][1] + buffer
+
+        busy: List[Interval] = []
+        cursor = self.db.get_collection("events").find(
+            {"start_time_utc": {"$lt": busy_end}, "end_time_utc": {"$gt": busy_start}},
+            {"start_time_utc": 1, "end_time_utc": 1},
+        )
+        async for event in cursor:
+            busy.append((event["start_time_utc"], event["end_time_utc"]))
+        busy.extend(await self.busy_intervals(busy_start, busy_end))
+        busy.sort()
+
+        index = 0
+        for start, end in candidates:
+            while index < len(busy) and busy[index][1] <= start - buffer:
+                index += 1
+            # Busy intervals are sorted by start, not end, so scan forward until they start too late.
+            scan = index
+            while scan < len(busy) and busy[scan][0] < end + buffer:
+                if busy[scan][1] > start - buffer:
+                    return start, end
+                scan += 1
+        return None
+
+
+async def ensure_recurrence_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Creates the series index at startup; a failure is logged and does not block startup."""
+    try:
+        await RecurrenceService(db).ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create event_series indexes: {e}")
@@ -0,0 +1,471 @@
+import asyncio
+import heapq
+import importlib
+import os
+import random
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.core.config import settings
+from app.core.log_config import logger
+from app.core.metrics import metrics
+from app.services.recurrence_service import RecurrenceService, expand_series
+from app.utils.timezones import as_utc
+
+LEASE_COLLECTION = "reminder_leases"
+CLAIM_COLLECTION = "reminder_claims"
+# Claims only need to outlive the meeting they remind of.
+CLAIM_RETENTION_SECONDS = 7 * 24 * 3600
+
+# A reminder packed into one int: (start << 97) | (source _id << 1) | is_series.
+_SOURCE_BITS = 96
+_START_SHIFT = _SOURCE_BITS + 1
+_SOURCE_MASK = (1 << _SOURCE_BITS) - 1
+
+
+def _timestamp(dt: datetime) -> int:
+    return int(as_utc(dt).timestamp())
+
+def _naive_utc(timestamp: int) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+
+class ReminderQueue:
+    """
+    The reminders a worker has loaded, ordered by meeting start (the fire time is always
+    the start minus `REMINDER_LEAD_MINUTES`).
+
+    Each reminder is packed into a single int, (start << 97) | (source _id << 1) | is_series,
+    which is both its heap entry and its identity in the live set: 100k reminders take
+    about 10 MB, with no per-reminder tuple, datetime, ObjectId or dict. Cancelled entries
+    stay in the heap until they reach the top and are skipped; the heap is compacted when
+    they outnumber the live ones.
+    """
+
+    def __init__(self):
+        self._heap: List[int] = []
+        self._live: Set[int] = set()
+
+    @staticmethod
+    def pack(source_id: ObjectId, start: int, series: bool = False) -> int:
+        return (start << _START_SHIFT) | (int.from_bytes(source_id.binary, "big") << 1) | int(series)
+
+    @staticmethod
+    def unpack(entry: int) -> Tuple[ObjectId, int, bool]:
+        """Returns (source _id, start timestamp, is_series)."""
+        source = ObjectId(((entry >> 1) & _SOURCE_MASK).to_bytes(12, "big"))
+        return source, entry >> _START_SHIFT, bool(entry & 1)
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def add(self, source_id: ObjectId, start: int, series: bool = False) -> bool:
+        """Schedules a reminder; returns False when it is already scheduled."""
+        entry = self.pack(source_id, start, series)
+        if entry in self._live:
+            return False
+        self._live.add(entry)
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def cancel(self, source_id: ObjectId, start: int, series: bool = False) -> None:
+        self._live.discard(self.pack(source_id, start, series))
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._compact()
+
+    def next_start(self) -> Optional[int]:
+        """The meeting start of the earliest live reminder, if any."""
+        heap = self._heap
+        while heap and heap[0] not in self._live:
+            heapq.heappop(heap)
+        return heap[0] >> _START_SHIFT if heap else None
+
+    def pop_due(self, until_start: int, limit: int) -> List[int]:
+        """Removes and returns up to `limit` live reminders for meetings starting by `until_start`."""
+        due: List[int] = []
+        heap, live = self._heap, self._live
+        while heap and len(due) < limit and heap[0] >> _START_SHIFT <= until_start:
+            entry = heapq.heappop(heap)
+            if entry in live:
+                live.discard(entry)
+                due.append(entry)
+        return due
+
+    def retain(self, keep: Callable[[int], bool]) -> None:
+        """Drops every reminder whose meeting start doesn't satisfy `keep`."""
+        self._live = {entry for entry in self._live if keep(entry >> _START_SHIFT)}
+        self._compact()
+
+    def _compact(self) -> None:
+        self._heap = list(self._live)
+        heapq.heapify(self._heap)
+
+
+# --- Senders ---
+
+class ReminderSender(ABC):
+    """
+    Delivers due reminders. Set `REMINDER_SENDER` to the dotted path of a subclass to
+    plug in email, push or chat delivery. `send` must raise when delivery fails so the
+    reminder is released and retried.
+    """
+
+    @abstractmethod
+    async def send(self, reminder: Dict) -> None:
+        """Delivers one reminder; raises if it could not be delivered."""
+
+
+class LogReminderSender(ReminderSender):
+    """Local stand-in that writes each reminder to the application log."""
+
+    async def send(self, reminder: Dict) -> None:
+        logger.info(
+            "Reminder for user %s: '%s' starts at %sZ.",
+            reminder['owner_user_id'], reminder['title'], reminder['start_time_utc'].isoformat(),
+        )
+
+
+def load_sender(path: str) -> ReminderSender:
+    """Instantiates the sender class named by a dotted path."""
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# --- Scheduler ---
+
+class ReminderScheduler:
+    """
+    Fires a reminder `REMINDER_LEAD_MINUTES` before every meeting, from an in-memory
+    queue rather than by polling `events`.
+
+    - Sharding: fire time is cut into windows of `REMINDER_WINDOW_MINUTES`. Each worker
+      leases the windows of the next `REMINDER_HORIZON_MINUTES` that nobody else holds
+      (a `reminder_leases` document per window, renewed every `REMINDER_RENEW_SECONDS`)
+      and loads only their meetings, with one range query per window when it is acquired.
+    - Changes: every code path that writes events (the calendar tools and bulk imports)
+      reports bookings, moves and deletions through `notify_event_changed`. A change in
+      a window this worker holds updates its queue directly; one in a window held by
+      another worker is pushed onto that lease and picked up by its owner on renewal.
+      A held window is never reloaded, so a booking that is not reported gets no
+      reminder. Before sending, every due reminder is checked against the current
+      event, which only catches moves and deletions: it skips reminders that no longer
+      apply.
+    - At most once: a reminder is claimed by inserting its key into `reminder_claims`
+      before sending, so even a window taken over from a stalled worker can't send it
+      twice. A send that raises releases the claim and is retried on the next renewal,
+      but a worker that dies between claiming and sending loses that reminder.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, sender: ReminderSender):
+        self.db = db
+        self.sender = sender
+        self.events_collection = db.get_collection("events")
+        self.recurrence_service = RecurrenceService(db)
+        self.leases = db.get_collection(LEASE_COLLECTION)
+        self.claims = db.get_collection(CLAIM_COLLECTION)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.queue = ReminderQueue()
+        self.windows: Set[int] = set()
+        self._lead = int(settings.REMINDER_LEAD_MINUTES * 60)
+        self._window = int(settings.REMINDER_WINDOW_MINUTES * 60)
+        self._retries: List[int] = []
+        self._wakeup = asyncio.Event()
+
+    async def ensure_indexes(self) -> None:
+        await self.leases.create_index([("expires_at", ASCENDING)], expireAfterSeconds=3600)
+        await self.claims.create_index([("sent_at", ASCENDING)], expireAfterSeconds=CLAIM_RETENTION_SECONDS)
+        # Windows are loaded by meeting start.
+        await self.events_collection.create_index([("start_time_utc", ASCENDING), ("end_time_utc", ASCENDING)])
+
+    def window_of(self, start: int, now: Optional[float] = None) -> int:
+        """The lease window a meeting's reminder belongs to; overdue ones join the current window."""
+        now = time.time() if now is None else now
+        return max((start - self._lead) // self._window, int(now) // self._window)
+
+    # --- Changes ---
+
+    async def note(self, source_id: ObjectId, start_utc: datetime, add: bool, series: bool = False) -> None:
+        """Applies a booking (`add`) or a cancellation reported by this process."""
+        now = time.time()
+        start = _timestamp(start_utc)
+        if start <= now:
+            return
+        window = self.window_of(start, now)
+        if window in self.windows:
+            if add:
+                self.queue.add(source_id, start, series)
+                self._wakeup.set()
+            else:
+                self.queue.cancel(source_id, start, series)
+        elif window * self._window < now + settings.REMINDER_HORIZON_MINUTES * 60:
+            # Held (or about to be taken over) by another worker. A window nobody holds
+            # needs nothing: whoever leases it loads it from the events collection.
+            await self.leases.update_one(
+                {"_id": window}, {"$push": {"changes": [int(add), int(series), source_id, start]}}
+            )
+
+    def _apply_changes(self, changes: Iterable[List]) -> None:
+        for add, series, source_id, start in changes:
+            if add:
+                self.queue.add(source_id, start, bool(series))
+            else:
+                self.queue.cancel(source_id, start, bool(series))
+
+    # --- Leases ---
+
+    async def _acquire(self, window: int) -> Tuple[bool, bool]:
+        """
+        Takes or renews the lease on a window. Returns (held, renewed); on renewal the
+        changes other workers pushed onto the lease are applied and cleared atomically.
+        """
+        now = datetime.utcnow()
+        try:
+            before = await self.leases.find_one_and_update(
+                {"_id": window, "$or": [{"owner": self.worker_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {
+                    "owner": self.worker_id,
+                    "expires_at": now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS),
+                    "changes": [],
+                }},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            return False, False  # Another worker holds an unexpired lease.
+        renewed = before is not None and before.get("owner") == self.worker_id and window in self.windows
+        if renewed:
+            self._apply_changes(before.get("changes") or [])
+        return True, renewed
+
+    async def _load_window(self, window: int, now: float) -> int:
+        """Queues every meeting whose reminder falls in the window; returns how many."""
+        # The current window also catches up on meetings about to start whose fire time
+        # has passed unsent, e.g. after a restart; the claims drop any already sent.
+        fire_from = int(now) - self._lead if window == int(now) // self._window else window * self._window
+        start_from = _naive_utc(fire_from + self._lead)
+        start_to = _naive_utc((window + 1) * self._window + self._lead)
+        loaded = 0
+        cursor = self.events_collection.find(
+            {"start_time_utc": {"$gte": start_from, "$lt": start_to}, "status": {"$ne": "pending"}},
+            {"start_time_utc": 1},
+        )
+        async for doc in cursor:
+            loaded += self.queue.add(doc["_id"], _timestamp(doc["start_time_utc"]))
+        for (start, _), series in await self.recurrence_service.occurrences(start_from, start_to):
+            if start >= start_from and series.get("status") != "pending":
+                loaded += self.queue.add(series["_id"], _timestamp(start), True)
+        return loaded
+
+    async def renew(self) -> None:
+        """Takes, renews or gives up the windows of the horizon and loads the new ones."""
+        now = time.time()
+        current = int(now) // self._window
+        horizon = -(-int(settings.REMINDER_HORIZON_MINUTES * 60) // self._window)
+        held: Set[int] = set()
+        acquired: List[int] = []
+        for window in range(current, current + horizon + 1):
+            owned, renewed = await self._acquire(window)
+            if owned:
+                held.add(window)
+                if not renewed:
+                    acquired.append(window)
+
+        if self.windows - held:
+            self.queue.retain(lambda start: self.window_of(start, now) in held)
+        self.windows = held
+        loaded = 0
+        for window in acquired:
+            loaded += await self._load_window(window, now)
+        retries, self._retries = self._retries, []
+        for entry in retries:
+            source_id, start, series = ReminderQueue.unpack(entry)
+            if start > now and self.window_of(start, now) in held:
+                self.queue.add(source_id, start, series)
+        if acquired:
+            metrics.increment("reminder_windows_acquired_total", len(acquired))
+            logger.info("Reminder worker %s took %d window(s), %d reminder(s).", self.worker_id, len(acquired), loaded)
+        metrics.observe("reminders_scheduled", len(self.queue))
+        self._wakeup.set()
+
+    # --- Dispatch ---
+
+    async def dispatch(self, entries: List[int]) -> int:
+        """Checks, claims and sends due reminders; returns how many were sent."""
+        now = time.time()
+        decoded = [ReminderQueue.unpack(entry) for entry in entries]
+        event_ids = [source for source, _, series in decoded if not series]
+        series_ids = [source for source, _, series in decoded if series]
+        events = {doc["_id"]: doc async for doc in self.events_collection.find(
+            {"_id": {"$in": event_ids}}, {"title": 1, "owner_user_id": 1, "start_time_utc": 1, "status": 1}
+        )} if event_ids else {}
+        series_docs = {doc["_id"]: doc async for doc in self.recurrence_service.collection.find(
+            {"_id": {"$in": series_ids}}
+        )} if series_ids else {}
+
+        reminders: List[Dict] = []
+        for entry, (source, start, series) in zip(entries, decoded):
+            doc = (series_docs if series else events).get(source)
+            if doc is None or doc.get("status") == "pending" or start <= now:
+                metrics.increment("reminders_total", outcome="skipped")
+                continue
+            start_utc = _naive_utc(start)
+            if series:
+                current = [s for s, _ in expand_series(doc, start_utc, start_utc + timedelta(seconds=1))]
+                still_scheduled = start_utc in current
+            else:
+                still_scheduled = _timestamp(doc["start_time_utc"]) == start
+            if not still_scheduled:
+                metrics.increment("reminders_total", outcome="skipped")
+                continue
+            reminders.append({
+                "_entry": entry,
+                "key": f"{source}:{start}",
+                "event_id": str(source),
+                "series": series,
+                "title": doc.get("title"),
+                "owner_user_id": str(doc.get("owner_user_id")),
+                "start_time_utc": start_utc,
+            })
+        if not reminders:
+            return 0
+
+        claimed = await self._claim(reminders)
+        results = await asyncio.gather(*(self._send(reminder) for reminder in claimed))
+        return sum(results)
+
+    async def _claim(self, reminders: List[Dict]) -> List[Dict]:
+        """Claims the reminders in one unordered insert; returns those no one claimed before."""
+        sent_at = datetime.utcnow()
+        try:
+            await self.claims.insert_many(
+                [{"_id": r["key"], "worker": self.worker_id, "sent_at": sent_at} for r in reminders], ordered=False
+            )
+            return reminders
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            taken = {error["index"] for error in errors}
+            metrics.increment("reminders_total", len(taken), outcome="duplicate")
+            return [r for index, r in enumerate(reminders) if index not in taken]
+
+    async def _send(self, reminder: Dict) -> bool:
+        entry = reminder.pop("_entry")
+        try:
+            await self.sender.send(reminder)
+        except Exception as e:
+            logger.warning("Reminder %s could not be sent, retrying: %s", reminder['key'], e)
+            metrics.increment("reminders_total", outcome="failed")
+            await self.claims.delete_one({"_id": reminder["key"], "worker": self.worker_id})
+            self._retries.append(entry)
+            return False
+        metrics.increment("reminders_total", outcome="sent")
+        metrics.observe("reminder_delay_seconds", time.time() - (_timestamp(reminder["start_time_utc"]) - self._lead))
+        return True
+
+    async def run_dispatch(self) -> None:
+        """Sleeps until the next reminder is due (or the queue changes) and fires due batches."""
+        while True:
+            now = time.time()
+            next_start = self.queue.next_start()
+            wait = settings.REMINDER_RENEW_SECONDS if next_start is None else next_start - self._lead - now
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(wait, settings.REMINDER_RENEW_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            due = self.queue.pop_due(int(now) + self._lead, settings.REMINDER_BATCH_SIZE)
+            try:
+                await self.dispatch(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Reminder dispatch failed, retrying on the next renewal: %s", e)
+                self._retries.extend(due)
+
+    async def run_leases(self) -> None:
+        # Spread the first round so workers started together don't race for the same windows.
+        await asyncio.sleep(random.uniform(0, 2))
+        while True:
+            try:
+                await self.renew()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Reminder lease renewal failed, retrying next interval: %s", e)
+            await asyncio.sleep(settings.REMINDER_RENEW_SECONDS)
+
+
+# --- Background Scheduler ---
+
+_scheduler: Optional[ReminderScheduler] = None
+_scheduler_tasks: List[asyncio.Task] = []
+
+async def notify_event_changed(
+    event_id: ObjectId, old_start_utc: Optional[datetime] = None, new_start_utc: Optional[datetime] = None
+) -> None:
+    """
+    Tells the reminder scheduler an event was booked (`new_start_utc`), moved (both) or
+    deleted (`old_start_utc`). Does nothing when reminders are disabled; never raises.
+    """
+    if _scheduler is None or old_start_utc == new_start_utc:
+        return
+    try:
+        if old_start_utc is not None:
+            await _scheduler.note(event_id, old_start_utc, add=False)
+        if new_start_utc is not None:
+            await _scheduler.note(event_id, new_start_utc, add=True)
+    except Exception as e:
+        logger.warning("Could not update the reminder for event %s: %s", event_id, e)
+
+async def notify_series_booked(series_doc: Dict) -> None:
+    """Schedules the reminders of a new series' occurrences within the horizon."""
+    if _scheduler is None:
+        return
+    now = datetime.utcnow()
+    horizon_end = now + timedelta(minutes=settings.REMINDER_HORIZON_MINUTES + settings.REMINDER_LEAD_MINUTES)
+    try:
+        for start, _ in expand_series(series_doc, now, horizon_end):
+            await _scheduler.note(series_doc["_id"], start, add=True, series=True)
+    except Exception as e:
+        logger.warning("Could not schedule reminders for series %s: %s", series_doc.get('_id'), e)
+
+async def start_reminder_scheduler(db: AsyncIOMotorDatabase) -> None:
+    """Ensures the reminder indexes and starts this worker's scheduler, if enabled."""
+    global _scheduler
+    if not settings.REMINDERS_ENABLED or _scheduler is not None:
+        return
+    scheduler = ReminderScheduler(db, load_sender(settings.REMINDER_SENDER))
+    try:
+        await scheduler.ensure_indexes()
+    except Exception as e:
+        logger.warning("Could not create reminder indexes: %s", e)
+    _scheduler = scheduler
+    _scheduler_tasks.extend([
+        asyncio.create_task(scheduler.run_leases()),
+        asyncio.create_task(scheduler.run_dispatch()),
+    ])
+
+async def stop_reminder_scheduler() -> None:
+    """Cancels the scheduler at shutdown; its leases expire and other workers take over."""
+    global _scheduler
+    for task in _scheduler_tasks:
+        task.cancel()
+    for task in _scheduler_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _scheduler_tasks.clear()
+    _scheduler = None
@@ -0,0 +1,192 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+import pytz
+
+from app.utils.timezones import get_zone
+
+# Incremental parsers for event uploads. Both consume the request body chunk by chunk
+# and yield one (row_number, fields | error) pair at a time, so memory use is bounded by
+# the longest line (or VEVENT block), not by the size of the upload.
+
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+class LineTooLongError(ValueError):
+    pass
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Splits a byte stream into lines (without the newline), keeping only a partial line buffered."""
+    pending = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        if len(pending) > max_line_bytes:
+            raise LineTooLongError(f"A line exceeds {max_line_bytes} bytes.")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[ParsedRow]:
+    """Yields one parsed JSON object per non-blank line."""
+    row = 0
+    async for line in iter_lines(chunks, max_line_bytes):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            fields = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(fields, dict):
+            yield row, None, "Each line must be a JSON object."
+            continue
+        yield row, fields, None
+
+
+# --- iCalendar (RFC 5545) ---
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    # NAME;PARAM=VALUE;PARAM=VALUE:value  (a colon inside a quoted parameter is not the separator)
+    in_quotes, split_at = False, -1
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            split_at = index
+            break
+    if split_at < 0:
+        raise ValueError(f"Malformed line: {line[:60]}")
+    head, value = line[:split_at], line[split_at + 1:]
+    name, *raw_params = head.split(";")
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+def _unescape(value: str) -> str:
+    return value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+def _ics_datetime(value: str, params: Dict[str, str]) -> datetime:
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        raise ValueError("All-day events are not supported.")
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=pytz.UTC)
+    local = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    if "TZID" in params:
+        return get_zone(params["TZID"]).localize(local)
+    return local  # floating time: interpreted in the importing user's timezone
+
+def _vevent_fields(properties: List[Tuple[str, Dict[str, str], str]]) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {"attendees": []}
+    for name, params, value in properties:
+        if name == "SUMMARY":
+            fields["title"] = _unescape(value)
+        elif name == "DTSTART":
+            fields["start_time"] = _ics_datetime(value, params)
+        elif name == "DTEND":
+            fields["end_time"] = _ics_datetime(value, params)
+        elif name == "UID":
+            fields["uid"] = value
+        elif name == "ATTENDEE" and value.lower().startswith("mailto:"):
+            fields["attendees"].append(value[len("mailto:"):])
+        elif name in ("RRULE", "RDATE"):
+            raise ValueError("Recurring events cannot be imported; book them as a recurring series instead.")
+    return fields
+
+async def iter_ics_rows(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[ParsedRow]:
+    """
+    Yields one row per VEVENT. Folded lines are unfolded on the fly and only the
+    properties of the current VEVENT are held in memory.
+    """
+    row = 0
+    in_event = False
+    properties: List[Tuple[str, Dict[str, str], str]] = []
+    error: Optional[str] = None
+    logical: Optional[str] = None
+
+    def finish_line(text: str) -> Optional[ParsedRow]:
+        nonlocal in_event, properties, error, row
+        upper = text.upper()
+        if upper == "BEGIN:VEVENT":
+            in_event, properties, error = True, [], None
+            row += 1
+            return None
+        if upper == "END:VEVENT" and in_event:
+            in_event = False
+            if error:
+                return row, None, error
+            try:
+                return row, _vevent_fields(properties), None
+            except (ValueError, KeyError, pytz.UnknownTimeZoneError) as e:
+                return row, None, str(e)
+        if in_event and not error:
+            try:
+                properties.append(_split_property(text))
+            except ValueError as e:
+                error = str(e)
+        return None
+
+    async for raw in iter_lines(chunks, max_line_bytes):
+        line = raw.decode("utf-8", errors="replace")
+        if line[:1] in (" ", "\t") and logical is not None:
+            logical += line[1:]
+            continue
+        if logical is not None:
+            result = finish_line(logical)
+            if result:
+                yield result
+        logical = line
+    if logical is not None:
+        result = finish_line(logical)
+        if result:
+            yield result
+
+
+# --- Encoders ---
+
+def encode_ndjson(row: Dict[str, Any]) -> bytes:
+    return orjson.dumps(row, default=str) + b"\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line: str) -> str:
+    # Lines longer than 75 octets are folded with CRLF + space, without splitting a UTF-8 character.
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+def _ics_utc(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+ICS_HEADER = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Singularity Labs//Scheduling Concierge//EN\r\nCALSCALE:GREGORIAN\r\n"
+ICS_FOOTER = "END:VCALENDAR\r\n"
+
+def encode_vevent(uid: str, title: str, start_utc: datetime, end_utc: datetime, attendees: Iterable[str], stamp: datetime) -> str:
+    """Encodes one event as a VEVENT block; datetimes are naive UTC (as stored in Mongo)."""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{_ics_utc(stamp)}",
+        f"DTSTART:{_ics_utc(start_utc)}",
+        f"DTEND:{_ics_utc(end_utc)}",
+        f"SUMMARY:{_escape(title or '')}",
+    ]
+    lines.extend(f"ATTENDEE:mailto:{attendee}" for attendee in attendees)
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
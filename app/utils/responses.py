@@ -0,0 +1,14 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Used for routes that return plain dicts and for error responses; routes with a
+    `response_model` are already serialized straight to bytes by Pydantic.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
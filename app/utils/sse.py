@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import orjson
+
+# Constant frames are encoded once at import time.
+DONE_FRAME = b"data: [DONE]\n\n"
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+_DATA_PREFIX = b"data: "
+_END = object()
+_FRAME_END = b"\n\n"
+
+def encode_sse(payload: Dict[str, Any]) -> bytes:
+    """Encodes a payload as a single SSE `data:` frame."""
+    return _DATA_PREFIX + orjson.dumps(payload, default=str) + _FRAME_END
+
+async def sse_stream(
+    frames: AsyncIterator[bytes],
+    heartbeat_interval: float,
+    coalesce_window: float,
+    coalesce_max_bytes: int = 16384,
+) -> AsyncIterator[bytes]:
+    """
+    Wraps a source of SSE frames for transport.
+
+    - Frames that arrive within `coalesce_window` seconds of each other are joined into
+      one write (up to `coalesce_max_bytes`), so bursts of small chunks don't each cost a
+      socket send.
+    - If the source is silent for `heartbeat_interval` seconds, a comment frame is sent
+      so proxies and browsers keep the connection open during long tool calls.
+    """
+    iterator = frames.__aiter__()
+    next_frame = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_frame}, timeout=heartbeat_interval)
+            if not done:
+                yield HEARTBEAT_FRAME
+                continue
+            try:
+                batch = [next_frame.result()]
+            except StopAsyncIteration:
+                return
+
+            size = len(batch[0])
+            while size < coalesce_max_bytes:
+                next_frame = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({next_frame}, timeout=coalesce_window)
+                if not done:
+                    break
+                try:
+                    frame = next_frame.result()
+                except StopAsyncIteration:
+                    yield b"".join(batch)
+                    return
+                batch.append(frame)
+                size += len(frame)
+            else:
+                next_frame = asyncio.ensure_future(iterator.__anext__())
+            yield b"".join(batch)
+    finally:
+        if not next_frame.done():
+            next_frame.cancel()
+
+async def cancel_on_disconnect(
+    frames: AsyncIterator[bytes],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval: float,
+    on_disconnect: Optional[Callable[[], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Produces `frames` in a task of its own and cancels it once `is_disconnected()`
+    reports that the client went away (checked every `poll_interval` seconds).
+
+    When a client disconnects, the server may cancel the response while it is blocked
+    on a socket write. The frame generator is then left suspended, and whatever it had
+    started keeps running until it is garbage collected. Here the producer is cancelled
+    explicitly, whether the disconnect is noticed by the poll or by the response being
+    closed, and the cancellation reaches whatever it is awaiting.
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def produce() -> None:
+        async for frame in frames:
+            queue.put_nowait(frame)
+
+    async def watch() -> None:
+        while not producer.done():
+            await asyncio.sleep(poll_interval)
+            if not producer.done() and await is_disconnected():
+                producer.cancel()
+                if on_disconnect is not None:
+                    on_disconnect()
+                return
+
+    producer = asyncio.create_task(produce())
+    producer.add_done_callback(lambda _: queue.put_nowait(_END))
+    watcher = asyncio.create_task(watch())
+    try:
+        while (frame := await queue.get()) is not _END:
+            yield frame
+        if not producer.cancelled() and producer.exception() is not None:
+            raise producer.exception()
+    finally:
+        watcher.cancel()
+        producer.cancel()
@@ -0,0 +1,110 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import pytz
+
+@lru_cache(maxsize=512)
+def get_zone(name: str) -> tzinfo:
+    """
+    Returns the pytz zone for an IANA name, cached.
+
+    Raises:
+        pytz.UnknownTimeZoneError: If the name is not a valid timezone.
+    """
+    return pytz.timezone(name)
+
+def as_utc(dt: datetime) -> datetime:
+    """Treats naive datetimes as UTC (as Mongo returns them) and converts aware ones to UTC."""
+    return dt.replace(tzinfo=pytz.UTC) if dt.tzinfo is None else dt.astimezone(pytz.UTC)
+
+def to_utc(dt: datetime, zone_name: str) -> datetime:
+    """Localizes a naive datetime in `zone_name` (aware ones are kept) and converts it to UTC."""
+    if dt.tzinfo is None:
+        dt = get_zone(zone_name).localize(dt)
+    return dt.astimezone(pytz.UTC)
+
+def parse_to_utc(value: str, zone_name: str) -> datetime:
+    """
+    Parses an ISO-8601 string from the agent into an aware UTC datetime.
+    A trailing 'Z' is ignored and naive values are interpreted in `zone_name`.
+
+    Raises:
+        ValueError: If the string is not valid ISO-8601.
+    """
+    return to_utc(datetime.fromisoformat(value.replace('Z', '')), zone_name)
+
+
+class OffsetTable:
+    """
+    The UTC-offset transitions of one zone within a time window.
+
+    Built once per query window, it converts whole lists of UTC timestamps to local time
+    with table lookups and plain timedelta arithmetic, instead of a pytz `astimezone`
+    call per timestamp. The tzinfo attached to each result is the same pytz object
+    `astimezone` would attach, so DST handling and `isoformat()` output are identical.
+    """
+
+    def __init__(self, zone_name: str, window_start_utc: datetime, window_end_utc: datetime):
+        zone = get_zone(zone_name)
+        start = as_utc(window_start_utc).replace(tzinfo=None)
+        end = as_utc(window_end_utc).replace(tzinfo=None)
+
+        transitions = getattr(zone, "_utc_transition_times", None)
+        if not transitions:
+            # Fixed-offset zones (UTC, Etc/GMT+5, ...) have a single entry.
+            self.starts: List[datetime] = [datetime.min]
+            self.entries: List[Tuple[timedelta, tzinfo]] = [(zone.utcoffset(start), zone)]
+            return
+
+        first = max(bisect_right(transitions, start) - 1, 0)
+        last = max(bisect_right(transitions, end), first + 1)
+        self.starts = [datetime.min] + list(transitions[first + 1:last])
+        self.entries = [
+            (info[0], zone._tzinfos[info]) for info in zone._transition_info[first:last]
+        ]
+
+    def to_local(self, dt_utc: datetime) -> datetime:
+        """Converts one UTC datetime (naive or aware) to the zone's local time."""
+        naive = as_utc(dt_utc).replace(tzinfo=None) if dt_utc.tzinfo else dt_utc
+        offset, tz = self.entries[bisect_right(self.starts, naive) - 1]
+        return (naive + offset).replace(tzinfo=tz)
+
+    def to_local_many(self, datetimes_utc: Sequence[datetime]) -> List[datetime]:
+        """
+        Converts a list of UTC datetimes to local time.
+
+        Sorted input (as query results usually are) is split into one slice per offset
+        period with a bisect per transition, and each slice is shifted by its offset in a
+        single comprehension. Unsorted input falls back to a lookup per item.
+        """
+        return self._convert_naive(_naive_utc(datetimes_utc))
+
+    def _convert_naive(self, naive: List[datetime]) -> List[datetime]:
+        if any(later < earlier for earlier, later in zip(naive, naive[1:])):
+            return [self.to_local(dt) for dt in naive]
+
+        results: List[datetime] = []
+        bounds = [bisect_left(naive, start) for start in self.starts[1:]] + [len(naive)]
+        low = 0
+        for (offset, tz), high in zip(self.entries, bounds):
+            if high > low:
+                if offset:
+                    results.extend([(dt + offset).replace(tzinfo=tz) for dt in naive[low:high]])
+                else:
+                    results.extend([dt.replace(tzinfo=tz) for dt in naive[low:high]])
+                low = high
+        return results
+
+
+def _naive_utc(datetimes_utc: Sequence[datetime]) -> List[datetime]:
+    """Normalizes datetimes to naive UTC; naive inputs (as stored in Mongo) are already UTC."""
+    return [dt if dt.tzinfo is None else dt.astimezone(pytz.UTC).replace(tzinfo=None) for dt in datetimes_utc]
+
+def to_local_many(datetimes_utc: Sequence[datetime], zone_name: str) -> List[datetime]:
+    """Converts a batch of UTC datetimes to `zone_name` using a table sized to the batch."""
+    if not datetimes_utc:
+        return []
+    naive = _naive_utc(datetimes_utc)
+    return OffsetTable(zone_name, min(naive), max(naive))._convert_naive(naive)
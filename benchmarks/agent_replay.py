@@ -0,0 +1,199 @@
+"""
+Replays recorded agent turns offline and reports how much work each one takes, to
+catch efficiency regressions from prompt, tool or graph changes.
+
+Record a corpus by running the API with AGENT_RECORDING_ENABLED=true (turns are appended
+to AGENT_RECORDING_DIR/agent-YYYYMMDD.jsonl). Each turn is then re-executed through the
+real ChatService and graph, with:
+  - a scripted model that answers with the recorded responses in order (deterministic,
+    no network), counting calls and estimating prompt tokens from what it is sent;
+  - stand-in tools that return the recorded results for matching calls, so no MongoDB,
+    Google Calendar or Serper access is needed. Results still go through the current
+    `format_tool_output`, so output formatting changes show up in prompt tokens.
+
+Prompt and formatting changes show up as prompt-token deltas, and graph changes as
+LLM/tool call deltas. A turn that wants more LLM calls than were recorded is flagged
+as exhausted.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.agent_replay recordings/*.jsonl --write-baseline benchmarks/agent_baseline.json
+    python -m benchmarks.agent_replay recordings/*.jsonl --baseline benchmarks/agent_baseline.json
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+import orjson
+from bson import ObjectId
+from langchain_core.messages import AIMessage, messages_from_dict
+
+from app.agent import graph
+from app.agent.utils.message_budget import estimate_message_tokens, estimate_tokens
+from app.core.config import settings
+from app.schemas.chat import ChatRequest
+from app.schemas.user import UserInDB
+from app.services.chat_service import ChatService
+
+METRICS = ["llm_calls", "tool_calls", "prompt_tokens", "output_tokens"]
+
+
+class ScriptedModel:
+    """Stands in for every model tier: returns the recorded responses in order."""
+
+    def __init__(self, responses: List[AIMessage]):
+        self.responses = list(responses)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.exhausted = False
+
+    async def ainvoke(self, messages, *args, **kwargs) -> AIMessage:
+        self.calls += 1
+        prompt_tokens = estimate_message_tokens(messages)
+        self.prompt_tokens += prompt_tokens
+        if self.responses:
+            response = self.responses.pop(0)
+        else:
+            self.exhausted = True
+            response = AIMessage(content="[replay: no recorded response left]")
+        output_tokens = (response.usage_metadata or {}).get("output_tokens") or estimate_tokens(str(response.content))
+        self.output_tokens += output_tokens
+        return response.model_copy(update={"usage_metadata": {
+            "input_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+        }})
+
+
+class RecordedTool:
+    """Stands in for a tool: replays recorded results, preferring a call with the same arguments."""
+
+    def __init__(self, name: str, recorded: List[Dict]):
+        self.name = name
+        self.recorded = list(recorded)
+        self.calls = 0
+
+    async def ainvoke(self, args: Dict):
+        self.calls += 1
+        args = {key: value for key, value in args.items() if key != "current_user"}
+        for index, step in enumerate(self.recorded):
+            if step["args"] == args:
+                return self.recorded.pop(index)["result"]
+        if self.recorded:
+            return self.recorded.pop(0)["result"]
+        return {"error": f"replay: no recorded result for {self.name}"}
+
+
+async def replay_task(chat_service: ChatService, task: Dict) -> Dict:
+    steps = task["steps"]
+    model = ScriptedModel([
+        messages_from_dict([step["response"]])[0] for step in steps if step["type"] == "llm"
+    ])
+    stand_ins = [
+        RecordedTool(tool.name, [step for step in steps if step["type"] == "tool" and step["name"] == tool.name])
+        for tool in original_tools
+    ]
+    graph.models_by_tier = {tier: model for tier in original_tiers}
+    graph.model_with_tools = model
+    graph.tools = stand_ins
+
+    user = UserInDB(
+        _id=str(ObjectId()), email="replay@example.com", username="replay",
+        timezone=task.get("user_timezone"), hashed_password="",
+    )
+    started = time.perf_counter()
+    async for _ in chat_service.stream_agent_events(ChatRequest(input=task["input"], history=task["history"]), user):
+        pass
+    return {
+        "input": task["input"][:60],
+        "llm_calls": model.calls,
+        "tool_calls": sum(tool.calls for tool in stand_ins),
+        "prompt_tokens": model.prompt_tokens,
+        "output_tokens": model.output_tokens,
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        "exhausted": model.exhausted,
+    }
+
+
+def load_tasks(paths: List[str]) -> List[Dict]:
+    tasks = []
+    for path in paths:
+        with open(path, "rb") as f:
+            tasks.extend(orjson.loads(line) for line in f if line.strip())
+    return tasks
+
+
+def print_report(results: Dict[str, Dict], baseline: Dict[str, Dict] | None, token_tolerance: float) -> List[str]:
+    """Prints a row per task (with deltas against the baseline) and returns the regressions."""
+    regressions = []
+    print(f"{'task':>10} {'llm':>7} {'tools':>7} {'prompt tok':>14} {'output tok':>12} {'wall ms':>9}  input")
+    for task_id, result in results.items():
+        before = (baseline or {}).get(task_id)
+        cells = []
+        for metric in METRICS:
+            value = result[metric]
+            if before is None:
+                cells.append(str(value))
+                continue
+            delta = value - before[metric]
+            cells.append(f"{value}({delta:+d})" if delta else str(value))
+            if metric in ("llm_calls", "tool_calls") and delta > 0:
+                regressions.append(f"{task_id}: {metric} {before[metric]} -> {value}")
+            elif metric == "prompt_tokens" and value > before[metric] * (1 + token_tolerance):
+                regressions.append(f"{task_id}: prompt_tokens {before[metric]} -> {value}")
+        flag = "  [exhausted]" if result["exhausted"] else ""
+        print(f"{task_id[:10]:>10} {cells[0]:>7} {cells[1]:>7} {cells[2]:>14} {cells[3]:>12} {result['wall_ms']:>9.1f}  {result['input']}{flag}")
+
+    totals = {metric: sum(result[metric] for result in results.values()) for metric in METRICS}
+    line = ", ".join(f"{metric}={value}" for metric, value in totals.items())
+    if baseline:
+        common = [task_id for task_id in results if task_id in baseline]
+        before = {metric: sum(baseline[task_id][metric] for task_id in common) for metric in METRICS}
+        line += "  (baseline over the same tasks: " + ", ".join(f"{m}={v}" for m, v in before.items()) + ")"
+    print(f"\n{len(results)} tasks: {line}")
+    return regressions
+
+
+async def main():
+    tasks = load_tasks(args.recordings)
+    if not tasks:
+        sys.exit("No recorded turns found.")
+    chat_service = ChatService()
+    results = {}
+    for task in tasks:
+        results[task["id"]] = await replay_task(chat_service, task)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "rb") as f:
+            baseline = orjson.loads(f.read())
+    regressions = print_report(results, baseline, args.token_tolerance)
+
+    if args.write_baseline:
+        with open(args.write_baseline, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+        print(f"Baseline written to {args.write_baseline}")
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help="JSONL files written by the recorder")
+    parser.add_argument("--baseline", help="JSON report of a previous run to diff against")
+    parser.add_argument("--write-baseline", help="write this run's report here")
+    parser.add_argument("--token-tolerance", type=float, default=0.05,
+                        help="allowed relative prompt-token growth per task before it counts as a regression")
+    args = parser.parse_args()
+
+    # Replays must not record, trace or profile themselves.
+    settings.AGENT_RECORDING_ENABLED = False
+    settings.TRACING_ENABLED = False
+    settings.PROFILING_ENABLED = False
+    settings.AVAILABILITY_PREFETCH_ENABLED = False
+    original_tools = list(graph.tools)
+    original_tiers = list(graph.models_by_tier)
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Benchmarks the joint free-time computation for large meetings: the run merge in
+app.services.common_availability_service against a `heapq.merge` k-way merge, and
+checks that both produce the same free windows.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.common_availability --attendees 25 --weeks 4
+"""
+import argparse
+import heapq
+import random
+import timeit
+from datetime import date, timedelta
+
+from app.services.common_availability_service import merge_busy_lists, subtract_busy, working_windows
+
+
+def random_busy_lists(attendees: int, windows, meetings_per_day: int, seed: int):
+    rng = random.Random(seed)
+    busy_lists = []
+    for _ in range(attendees):
+        busy = []
+        for window_start, window_end in windows:
+            minutes = int((window_end - window_start).total_seconds() // 60)
+            for _ in range(meetings_per_day):
+                start = window_start + timedelta(minutes=rng.randrange(0, minutes, 5))
+                busy.append((start, start + timedelta(minutes=rng.choice([15, 30, 45, 60]))))
+        busy_lists.append(sorted(busy))
+    return busy_lists
+
+
+def heap_merge(busy_lists):
+    # The baseline: a heap holding one head per attendee, O(n log k) in pure Python.
+    merged = []
+    for start, end in heapq.merge(*busy_lists):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attendees", type=int, default=25)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--meetings-per-day", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    start_day = date(2026, 11, 2)
+    windows = working_windows(start_day, start_day + timedelta(weeks=args.weeks, days=-1))
+    busy_lists = random_busy_lists(args.attendees, windows, args.meetings_per_day, seed=11)
+    duration = timedelta(minutes=30)
+
+    merged = merge_busy_lists(busy_lists)
+    assert merged == heap_merge(busy_lists)
+    free = subtract_busy(windows, merged, duration)
+
+    run_seconds = timeit.timeit(lambda: subtract_busy(windows, merge_busy_lists(busy_lists), duration), number=args.repeat) / args.repeat
+    heap_seconds = timeit.timeit(lambda: subtract_busy(windows, heap_merge(busy_lists), duration), number=args.repeat) / args.repeat
+
+    total = sum(len(busy) for busy in busy_lists)
+    print(f"{args.attendees} attendees, {len(windows)} days, {total} busy intervals -> {len(free)} free windows")
+    print(f"run merge: {run_seconds * 1000:.2f} ms   heapq.merge: {heap_seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
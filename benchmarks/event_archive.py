@@ -0,0 +1,125 @@
+"""
+Reports index size and latency of the hot-path event queries before and after
+moving past events to the archive collection.
+
+Seeds a scratch database (`<DATABASE_NAME>_archive_bench`, dropped afterwards) with
+years of past meetings plus upcoming ones, then times the queries behind
+`confirm_and_book_event` (overlap check), `find_available_slots` (day range scan)
+and `list_events` (owner scan of upcoming events).
+
+Usage (from the project root, with a populated .env and a reachable MONGO_URI):
+    python -m benchmarks.event_archive --past-years 3 --events-per-day 40
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+
+from app.core.config import settings
+from app.services.archive_service import EventArchiveService
+
+
+async def seed(db, past_years: int, future_days: int, events_per_day: int, owners: list) -> None:
+    rng = random.Random(5)
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start_day = now - timedelta(days=365 * past_years)
+    batch = []
+    for day in range((now - start_day).days + future_days):
+        day_start = start_day + timedelta(days=day)
+        for _ in range(events_per_day):
+            start = day_start + timedelta(minutes=rng.randrange(0, 24 * 60, 15))
+            batch.append({
+                "google_event_id": f"bench-{ObjectId()}",
+                "owner_user_id": rng.choice(owners),
+                "title": "Benchmark meeting",
+                "start_time_utc": start,
+                "end_time_utc": start + timedelta(minutes=rng.choice([30, 60])),
+                "attendees": [],
+                "status": "confirmed",
+            })
+        if len(batch) >= 10000:
+            await db.events.insert_many(batch)
+            batch = []
+    if batch:
+        await db.events.insert_many(batch)
+
+
+async def timed(coro_factory, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def measure(db, owner, repeat: int) -> dict:
+    now = datetime.utcnow()
+    slot_start = now + timedelta(days=3, hours=2)
+    day_start = now.replace(hour=0, minute=0) + timedelta(days=3)
+    stats = await db.command("collStats", "events")
+    return {
+        "hot documents": stats["count"],
+        "hot index MB": stats["totalIndexSize"] / 1e6,
+        "overlap check ms": await timed(lambda: db.events.find_one({
+            "start_time_utc": {"$lt": slot_start + timedelta(minutes=45)},
+            "end_time_utc": {"$gt": slot_start - timedelta(minutes=15)},
+        }), repeat),
+        "day scan ms": await timed(lambda: db.events.find(
+            {"start_time_utc": {"$lt": day_start + timedelta(days=1)}, "end_time_utc": {"$gt": day_start}},
+            {"start_time_utc": 1, "end_time_utc": 1},
+        ).to_list(length=None), repeat),
+        "owner scan ms": await timed(lambda: db.events.find(
+            {"owner_user_id": owner, "start_time_utc": {"$gte": now}}
+        ).sort("start_time_utc", 1).to_list(length=None), repeat),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--past-years", type=int, default=3)
+    parser.add_argument("--future-days", type=int, default=90)
+    parser.add_argument("--events-per-day", type=int, default=40)
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client.get_database(f"{settings.DATABASE_NAME}_archive_bench")
+    await client.drop_database(db.name)
+    try:
+        owners = [ObjectId() for _ in range(args.owners)]
+        await seed(db, args.past_years, args.future_days, args.events_per_day, owners)
+        await db.events.create_index([("start_time_utc", ASCENDING), ("end_time_utc", ASCENDING)])
+        await db.events.create_index([("owner_user_id", ASCENDING), ("start_time_utc", ASCENDING)])
+        service = EventArchiveService(db)
+        await service.ensure_indexes()
+
+        before = await measure(db, owners[0], args.repeat)
+        started = time.perf_counter()
+        moved = await service.archive_past_events()
+        archive_seconds = time.perf_counter() - started
+        try:
+            # Reclaims the freed index pages so totalIndexSize reflects the smaller collection.
+            await db.command("compact", "events")
+        except Exception as e:
+            print(f"compact not permitted ({e}); index sizes may not shrink until WiredTiger reuses pages")
+        after = await measure(db, owners[0], args.repeat)
+
+        print(f"archived {moved} events in {archive_seconds:.1f}s")
+        print(f"{'':>18} {'before':>10} {'after':>10}")
+        for key in before:
+            print(f"{key:>18} {before[key]:>10.2f} {after[key]:>10.2f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Simulates hedged LLM calls against a fake model with a heavy latency tail, and
+compares tail latency and extra load with hedging on and off.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.hedging_simulation --calls 2000 --slow-fraction 0.05
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.agent.llm import HedgedModel
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class FakeSlowModel:
+    """Answers after ~`base` seconds, but `slow_fraction` of calls take `slow` seconds."""
+
+    def __init__(self, base: float, slow: float, slow_fraction: float):
+        self.base, self.slow, self.slow_fraction = base, slow, slow_fraction
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        slow = random.random() < self.slow_fraction
+        await asyncio.sleep(self.slow if slow else random.uniform(0.5, 1.5) * self.base)
+        return "ok"
+
+
+async def run(calls: int, concurrency: int, hedging: bool, model: FakeSlowModel) -> list[float]:
+    settings.LLM_HEDGING_ENABLED = hedging
+    hedged = HedgedModel(primary=model, primary_name=f"fake-{'hedged' if hedging else 'plain'}")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await hedged.ainvoke([])
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(latencies)
+
+
+def describe(label: str, latencies: list[float], model_calls: int, calls: int) -> None:
+    p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+    print(f"{label:>8}: p50={p(0.5):7.1f}ms p95={p(0.95):7.1f}ms p99={p(0.99):7.1f}ms "
+          f"mean={statistics.mean(latencies) * 1000:7.1f}ms load={model_calls / calls:.3f}x")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--base", type=float, default=0.05, help="typical latency in seconds")
+    parser.add_argument("--slow", type=float, default=1.0, help="tail latency in seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    args = parser.parse_args()
+
+    settings.LLM_HEDGE_MIN_DELAY_SECONDS = 0.0
+    settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS = args.base * 2
+
+    plain_model = FakeSlowModel(args.base, args.slow, args.slow_fraction)
+    describe("plain", await run(args.calls, args.concurrency, False, plain_model), plain_model.calls, args.calls)
+
+    hedged_model = FakeSlowModel(args.base, args.slow, args.slow_fraction)
+    describe("hedged", await run(args.calls, args.concurrency, True, hedged_model), hedged_model.calls, args.calls)
+
+    counters = metrics.snapshot()["counters"]
+    hedges = counters.get("llm_hedges_total{model=fake-hedged}", 0)
+    wins = counters.get("llm_hedge_wins_total{model=fake-hedged}", 0)
+    print(f"hedge rate={hedges / args.calls:.3f} win rate={wins / hedges if hedges else 0:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Measures event-loop lag while request handlers log heavily, with the previous setup
+(eager f-strings straight into a RotatingFileHandler and a stream handler on the loop
+thread) against the queued pipeline of app.core.log_config (lazy arguments, JSON
+formatting and file I/O on the listener thread).
+
+A probe task sleeps 1 ms in a loop and records how late it wakes up, while producer
+tasks emit `--rate` log lines per second in total, like TimingMiddleware does under load.
+Log files go to a temporary directory and rotate at 1 MB, as in production. Stdout is
+simulated by a stream that stalls for `--stall-ms` every 200 writes, as a pipe to a
+busy log collector does.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.logging_lag --rate 5000 --stall-ms 5 --seconds 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from app.core.config import settings
+from app.core.log_config import JsonFormatter, _LocalQueueHandler
+from app.core.metrics import metrics
+
+PROBE_INTERVAL = 0.001
+
+
+class StallingStream:
+    """A write-only stream that blocks for `stall` seconds every `every` writes."""
+
+    def __init__(self, stall: float, every: int = 200):
+        self.stall, self.every, self.writes = stall, every, 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        if self.stall and self.writes % self.every == 0:
+            time.sleep(self.stall)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def file_handlers(directory: str, formatter: logging.Formatter, stall: float) -> list:
+    stream = logging.StreamHandler(StallingStream(stall))
+    rotating = RotatingFileHandler(os.path.join(directory, "bench.log"), maxBytes=10**6, backupCount=3)
+    for handler in (stream, rotating):
+        handler.setFormatter(formatter)
+    return [stream, rotating]
+
+
+async def run(logger: logging.Logger, eager: bool, producers: int, rate: float, seconds: float) -> tuple[list, int]:
+    lags: list = []
+    emitted = 0
+    deadline = time.perf_counter() + seconds
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+    async def producer(index: int):
+        nonlocal emitted
+        path = f"/api/chat/stream/{index}"
+        interval = producers / rate
+        while time.perf_counter() < deadline:
+            elapsed = 0.0123
+            if eager:
+                logger.info(f"Request to {path} took {elapsed:.4f} seconds.")
+            else:
+                logger.info("Request to %s took %.4f seconds.", path, elapsed)
+            emitted += 1
+            await asyncio.sleep(interval)
+
+    await asyncio.gather(probe(), *(producer(i) for i in range(producers)))
+    return lags, emitted
+
+
+def report(label: str, lags: list, emitted: int, seconds: float) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[min(int(len(lags_ms) * 0.99), len(lags_ms) - 1)]
+    print(f"{label:>8} {emitted / seconds:>12.0f} {statistics.median(lags_ms):>9.2f} {p99:>9.2f} {lags_ms[-1]:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--producers", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=5000, help="log lines per second, across producers")
+    parser.add_argument("--stall-ms", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    stall = args.stall_ms / 1000
+
+    print(f"{'':>8} {'records/s':>12} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}  (ms)")
+    with tempfile.TemporaryDirectory() as directory:
+        sync_logger = logging.getLogger("bench.sync")
+        sync_logger.propagate = False
+        sync_logger.setLevel(logging.INFO)
+        text = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        for handler in file_handlers(directory, text, stall):
+            sync_logger.addHandler(handler)
+        lags, emitted = asyncio.run(run(sync_logger, True, args.producers, args.rate, args.seconds))
+        report("sync", lags, emitted, args.seconds)
+
+        queued_logger = logging.getLogger("bench.queued")
+        queued_logger.propagate = False
+        queued_logger.setLevel(logging.INFO)
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+        queued_logger.addHandler(_LocalQueueHandler(log_queue))
+        json_dir = os.path.join(directory, "queued")
+        os.makedirs(json_dir)
+        listener = QueueListener(log_queue, *file_handlers(json_dir, JsonFormatter("%(asctime)s %(name)s %(levelname)s %(message)s"), stall))
+        listener.start()
+        lags, emitted = asyncio.run(run(queued_logger, False, args.producers, args.rate, args.seconds))
+        report("queued", lags, emitted, args.seconds)
+        started = time.perf_counter()
+        listener.stop()
+        print(f"listener drained its backlog in {time.perf_counter() - started:.2f}s after the run")
+        dropped = metrics.snapshot()["counters"].get("log_records_dropped_total{level=INFO}", 0)
+        print(f"{dropped:.0f} INFO records dropped at the {settings.LOG_QUEUE_MAX_SIZE}-record queue bound")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Counts the MongoDB commands behind each endpoint and calendar tool, and fails if any
+exceeds its round-trip budget.
+
+Each scenario runs inside the same per-request scope the API uses
+(`mongo_request_scope`), against a scratch database (`<DATABASE_NAME>_round_trips`,
+dropped afterwards). Google Calendar is replaced by an in-memory stub, so only
+MongoDB needs to be reachable. Lower a budget when a change saves a round trip.
+
+tests/test_mongo_round_trips.py runs the same scenarios against an in-memory stand-in
+for Motor on every test run, and requires the counts to match the budgets exactly.
+
+Usage (from the project root, with a populated .env and a reachable MONGO_URI):
+    python -m benchmarks.mongo_round_trips
+"""
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from app.agent.tools import calendar_tools
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database import mongodb
+from app.dependencies.auth_dependencies import get_user_from_token
+from app.schemas.user import UserCreate
+from app.services.auth_service import AuthService
+
+# Commands per scenario. Refreshing the availability bitmap of one day costs 4
+# (generation claim, series query, the day's events, guarded bitmap update).
+BUDGETS: Dict[str, int] = {
+    "register_user": 1,
+    "authenticate_user": 1,
+    "get_current_user": 1,
+    "confirm_and_book_event": 8,
+    "update_event (rename)": 1,
+    "update_event (reschedule)": 8,
+    "delete_event": 6,
+}
+
+
+class _Request:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class StubEvents:
+    """An in-memory stand-in for `service.events()` of the Google Calendar client."""
+
+    def __init__(self):
+        self.events: Dict[str, Dict] = {}
+
+    def insert(self, calendarId, body):
+        event = dict(body, id=uuid.uuid4().hex, htmlLink="https://calendar.example/event")
+        self.events[event["id"]] = event
+        return _Request(event)
+
+    def get(self, calendarId, eventId):
+        return _Request({**self.events[eventId], "start": dict(self.events[eventId]["start"]),
+                         "end": dict(self.events[eventId]["end"])})
+
+    def update(self, calendarId, eventId, body):
+        self.events[eventId] = body
+        return _Request(body)
+
+    def delete(self, calendarId, eventId):
+        return _Request(self.events.pop(eventId, None))
+
+
+class StubCalendar:
+    def __init__(self):
+        self._events = StubEvents()
+
+    def events(self):
+        return self._events
+
+
+async def measure(label: str, coro) -> Dict:
+    with mongodb.mongo_request_scope() as stats:
+        result = await coro
+    return {"label": label, "total": stats.total, "commands": dict(stats.commands), "result": result}
+
+
+async def run_scenarios(calendar: StubCalendar) -> List[Dict]:
+    """Runs every scenario against the connected database (`get_db()`); returns the counts."""
+    calendar_tools.calendar_service_instance.get_client = lambda: calendar
+    db = mongodb.get_db()
+    auth = AuthService(db)
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    runs = [await measure("register_user", auth.register_user(
+        UserCreate(email=email, username="bench", password="benchmark1")
+    ))]
+    user = runs[0]["result"]
+    runs.append(await measure("authenticate_user", auth.authenticate_user(email, "benchmark1")))
+    runs.append(await measure("get_current_user", get_user_from_token(create_access_token(subject=email), db)))
+
+    current_user = {"id": str(user.id), "email": email, "timezone": "UTC"}
+    start = (datetime.utcnow() + timedelta(days=7)).replace(hour=15, minute=0, second=0, microsecond=0)
+    runs.append(await measure("confirm_and_book_event", calendar_tools.confirm_and_book_event.ainvoke({
+        "summary": "Round trips", "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=30)).isoformat(), "current_user": current_user,
+    })))
+    event_id = next(iter(calendar.events().events))
+    runs.append(await measure("update_event (rename)", calendar_tools.update_event.ainvoke({
+        "event_id": event_id, "new_summary": "Renamed", "current_user": current_user,
+    })))
+    runs.append(await measure("update_event (reschedule)", calendar_tools.update_event.ainvoke({
+        "event_id": event_id, "new_start_time": (start + timedelta(hours=2)).isoformat(),
+        "current_user": current_user,
+    })))
+    runs.append(await measure("delete_event", calendar_tools.delete_event.ainvoke({
+        "event_id": event_id, "current_user": current_user,
+    })))
+    return runs
+
+
+def over_budget(runs: List[Dict]) -> List[str]:
+    return [run["label"] for run in runs if run["total"] > BUDGETS[run["label"]]]
+
+
+async def main() -> int:
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_round_trips"
+    settings.AVAILABILITY_PREFETCH_ENABLED = False
+    await mongodb.connect_to_mongo()
+    try:
+        runs = await run_scenarios(StubCalendar())
+    finally:
+        await mongodb.db_manager.client.drop_database(settings.DATABASE_NAME)
+        await mongodb.close_mongo_connection()
+
+    print(f"{'scenario':<28} {'commands':>8} {'budget':>7}  breakdown")
+    for run in runs:
+        budget = BUDGETS[run["label"]]
+        flag = "" if run["total"] <= budget else "  OVER BUDGET"
+        breakdown = ", ".join(f"{name} x{count}" for name, count in sorted(run["commands"].items()))
+        print(f"{run['label']:<28} {run['total']:>8} {budget:>7}  {breakdown}{flag}")
+        if isinstance(run["result"], str) and run["result"].startswith(("Error", "An ")):
+            print(f"    {run['result']}")
+    over = over_budget(runs)
+    if over:
+        print(f"\nRound-trip regressions: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
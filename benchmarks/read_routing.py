@@ -0,0 +1,105 @@
+"""
+Checks and times the read routing of app.database.mongodb against a replica set.
+
+Seeds a scratch database (`<DATABASE_NAME>_routing_bench`, dropped afterwards) and:
+  - runs `--reads` reads through `get_read_db` and the primary handle, reporting which
+    members served them and the latency of each;
+  - inside a request scope, writes and then reads through `get_read_db`, and checks
+    that the read went to the primary.
+
+A local single-host replica set is enough for the checks; with no secondary available
+the tolerant reads fall back to the primary:
+    mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017 &
+    mongosh --eval 'rs.initiate()'
+    MONGO_URI="mongodb://localhost:27017/?replicaSet=rs0" python -m benchmarks.read_routing
+With a three-member local set (`--port 27018/27019`, added with `rs.add`), the tolerant
+reads spread over the secondaries.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.database import mongodb
+
+
+class ServedBy(monitoring.CommandListener):
+    """Remembers the member that served each `find`."""
+
+    def __init__(self):
+        self.servers: Counter = Counter()
+        self.last = None
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name == "find":
+            self.last = event.connection_id
+            self.servers[event.connection_id] += 1
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+async def timed_reads(db, reads: int) -> list:
+    latencies = []
+    for i in range(reads):
+        started = time.perf_counter()
+        await db.get_collection("events").find_one({"n": i % 100})
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(reads: int) -> int:
+    served_by = ServedBy()
+    monitoring.register(served_by)
+    settings.MONGO_SECONDARY_READS_ENABLED = True
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_routing_bench"
+    settings.MONGO_SECONDARY_READ_SITES = ["bench"]
+    await mongodb.connect_to_mongo()
+    primary = mongodb.get_db()
+    try:
+        await primary.get_collection("events").insert_many([{"n": n} for n in range(100)])
+        # Give secondaries a moment to replicate the seed data.
+        await asyncio.sleep(1)
+        hello = await primary.command("hello")
+        print(f"replica set {hello.get('setName')!r}: primary {hello.get('primary')}, "
+              f"{len(hello.get('hosts', [])) - 1} other data-bearing member(s)")
+
+        print(f"\n{'route':>10} {'reads':>7} {'p50 ms':>8} {'p95 ms':>8}  served by")
+        for label, db in (("primary", primary), ("tolerant", mongodb.get_read_db("bench"))):
+            served_by.servers.clear()
+            latencies = sorted(await timed_reads(db, reads))
+            members = ", ".join(f"{host}:{port} x{count}" for (host, port), count in served_by.servers.items())
+            print(f"{label:>10} {reads:>7} {statistics.median(latencies):>8.2f} "
+                  f"{latencies[int(len(latencies) * 0.95)]:>8.2f}  {members}")
+
+        with mongodb.mongo_request_scope():
+            before = mongodb.get_read_db("bench")
+            await primary.get_collection("events").insert_one({"n": "written"})
+            after = mongodb.get_read_db("bench")
+            await after.get_collection("events").find_one({"n": "written"})
+            read_from = served_by.last
+        primary_host = tuple(hello["primary"].rsplit(":", 1)) if hello.get("primary") else None
+        ok = before is mongodb.db_manager.secondary_database and after is primary
+        print(f"\nread after write in the same request: routed to "
+              f"{'primary' if after is primary else 'secondary'}, served by {read_from[0]}:{read_from[1]}"
+              + ("" if primary_host is None else f" (primary is {primary_host[0]}:{primary_host[1]})"))
+        print("OK" if ok else "FAILED: a read after a write was not routed to the primary")
+        return 0 if ok else 1
+    finally:
+        await mongodb.db_manager.client.drop_database(settings.DATABASE_NAME)
+        await mongodb.close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.reads)))
@@ -0,0 +1,95 @@
+"""
+Benchmarks windowed expansion of thousands of active recurring series, as done for
+every conflict check and availability rebuild: app.services.recurrence_service
+(re-anchored rules, parse cache) against expanding each rule from its original start
+with dateutil. Both must produce identical occurrences.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.recurring_series --series 5000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from dateutil.rrule import rrulestr
+
+from app.services.recurrence_service import _parse, _to_local_naive, _to_naive_utc, expand_series, normalize_rule
+
+RULES = [
+    "FREQ=DAILY",
+    "FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR",
+    "FREQ=WEEKLY",
+    "FREQ=WEEKLY;BYDAY=MO,WE",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=TH",
+    "FREQ=MONTHLY;BYMONTHDAY=15",
+    "FREQ=MONTHLY;BYDAY=1TU",
+    "FREQ=WEEKLY;COUNT=200",
+    "FREQ=DAILY;UNTIL=20280101T000000Z",
+]
+ZONES = ["Asia/Kolkata", "America/New_York", "Europe/London"]
+
+
+def random_series(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    series = []
+    for _ in range(count):
+        dtstart = datetime(2024, 1, 1, 9) + timedelta(days=rng.randrange(900), minutes=30 * rng.randrange(16))
+        series.append({
+            "rrule": normalize_rule(rng.choice(RULES)),
+            "timezone": rng.choice(ZONES),
+            "dtstart_local": dtstart,
+            "duration_minutes": rng.choice([30, 45, 60]),
+        })
+    return series
+
+
+def expand_from_start(series: dict, window_start: datetime, window_end: datetime):
+    # The baseline: dateutil walks every occurrence since the series started.
+    duration = timedelta(minutes=series["duration_minutes"])
+    zone_name = series["timezone"]
+    rule = rrulestr(_parse(series["rrule"], zone_name, series["dtstart_local"]).__str__(), cache=False)
+    local_from = _to_local_naive(window_start, zone_name) - duration - timedelta(days=1)
+    local_to = _to_local_naive(window_end, zone_name) + timedelta(days=1)
+    occurrences = []
+    for local_start in rule.between(local_from, local_to, inc=True):
+        start = _to_naive_utc(local_start, zone_name)
+        end = start + duration
+        if start < window_end and end > window_start:
+            occurrences.append((start, end))
+    return occurrences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    series = random_series(args.series, args.seed)
+    window_start = datetime(2026, 10, 19)
+    print(f"{args.series} active series")
+    print(f"{'window':>8} {'occurrences':>12} {'from start ms':>14} {'cold ms':>9} {'warm ms':>9}")
+    for label, span in [("1 day", timedelta(days=1)), ("2 weeks", timedelta(weeks=2)), ("90 days", timedelta(days=90))]:
+        window_end = window_start + span
+
+        started = time.perf_counter()
+        expected = [expand_from_start(s, window_start, window_end) for s in series]
+        baseline = time.perf_counter() - started
+
+        _parse.cache_clear()
+        started = time.perf_counter()
+        actual = [expand_series(s, window_start, window_end) for s in series]
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        [expand_series(s, window_start, window_end) for s in series]
+        warm = time.perf_counter() - started
+
+        assert actual == expected, "windowed expansion diverged from full expansion"
+        total = sum(len(occurrences) for occurrences in actual)
+        print(f"{label:>8} {total:>12} {baseline * 1000:>14.1f} {cold * 1000:>9.1f} {warm * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Measures the reminder queue of app.services.reminder_service and, optionally, checks
+that several scheduler workers fire each reminder exactly once.
+
+In memory (no services needed), for `--reminders` reminders (100k by default):
+  - the memory held by `ReminderQueue` next to a straightforward heap of
+    (datetime, ObjectId, dict) tuples;
+  - the time to schedule them all, cancel a tenth, and pop them in order.
+
+With `--mongo`, against a scratch database (`<DATABASE_NAME>_reminders`, dropped
+afterwards): seeds `--events` meetings whose reminders fall due within the next
+`--spread` seconds, runs `--workers` schedulers in this process with a counting sender,
+and checks that every reminder was sent once and only once.
+
+Usage (from the project root):
+    python -m benchmarks.reminder_scheduler
+    python -m benchmarks.reminder_scheduler --mongo --workers 3 --events 2000
+"""
+import argparse
+import asyncio
+import heapq
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.reminder_service import ReminderQueue, ReminderScheduler, ReminderSender
+
+
+def measure(build) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, size, elapsed
+
+
+def run_in_memory(count: int) -> None:
+    now = int(time.time())
+    ids = [ObjectId() for _ in range(count)]
+    starts = [now + random.randint(0, 3600) for _ in range(count)]
+
+    def build_queue():
+        queue = ReminderQueue()
+        for source, start in zip(ids, starts):
+            queue.add(source, start)
+        return queue
+
+    def build_naive():
+        heap: List = []
+        for source, start in zip(ids, starts):
+            heapq.heappush(heap, (datetime.utcfromtimestamp(start), source, {"event_id": source, "cancelled": False}))
+        return heap
+
+    # The ObjectIds themselves are shared input, so only the structures are measured.
+    queue, queue_bytes, queue_seconds = measure(build_queue)
+    naive, naive_bytes, _ = measure(build_naive)
+    del naive
+
+    started = time.perf_counter()
+    for source, start in zip(ids[::10], starts[::10]):
+        queue.cancel(source, start)
+    cancel_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    popped = 0
+    while True:
+        due = queue.pop_due(now + 3600, 500)
+        if not due:
+            break
+        popped += len(due)
+    pop_seconds = time.perf_counter() - started
+
+    print(f"{count} reminders")
+    print(f"  ReminderQueue    {queue_bytes / 2**20:7.1f} MB  ({queue_bytes / count:.0f} B each)")
+    print(f"  tuple heap       {naive_bytes / 2**20:7.1f} MB  ({naive_bytes / count:.0f} B each)")
+    print(f"  schedule {queue_seconds * 1000:.0f} ms, cancel {count // 10} in {cancel_seconds * 1000:.0f} ms, "
+          f"pop {popped} in {pop_seconds * 1000:.0f} ms")
+
+
+class CountingSender(ReminderSender):
+    def __init__(self, sent: Counter):
+        self.sent = sent
+
+    async def send(self, reminder: Dict) -> None:
+        self.sent[reminder["key"]] += 1
+
+
+async def run_mongo(workers: int, events: int, spread: int) -> int:
+    from app.database import mongodb
+
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_reminders"
+    settings.REMINDER_RENEW_SECONDS = 2.0
+    settings.REMINDER_LEASE_SECONDS = 6.0
+    await mongodb.connect_to_mongo()
+    db = mongodb.get_db()
+    sent: Counter = Counter()
+    tasks: List[asyncio.Task] = []
+    try:
+        first = datetime.utcnow() + timedelta(minutes=settings.REMINDER_LEAD_MINUTES, seconds=5)
+        await db.events.insert_many([{
+            "owner_user_id": ObjectId(), "title": f"Meeting {n}", "status": "confirmed",
+            "start_time_utc": first + timedelta(seconds=spread * n / events),
+            "end_time_utc": first + timedelta(seconds=spread * n / events, minutes=30),
+        } for n in range(events)])
+
+        schedulers = [ReminderScheduler(db, CountingSender(sent)) for _ in range(workers)]
+        await schedulers[0].ensure_indexes()
+        for scheduler in schedulers:
+            tasks += [asyncio.create_task(scheduler.run_leases()), asyncio.create_task(scheduler.run_dispatch())]
+        await asyncio.sleep(spread + 15)
+
+        leases = Counter(doc["owner"] async for doc in db.get_collection("reminder_leases").find())
+        duplicates = sum(1 for count in sent.values() if count > 1)
+        print(f"{workers} workers, {events} reminders: {len(sent)} sent, {duplicates} sent twice, "
+              f"{events - len(sent)} missed")
+        print("windows held: " + ", ".join(f"{owner} x{count}" for owner, count in leases.items()))
+        ok = len(sent) == events and duplicates == 0
+        print("OK" if ok else "FAILED")
+        return 0 if ok else 1
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await mongodb.db_manager.client.drop_database(settings.DATABASE_NAME)
+        await mongodb.close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reminders", type=int, default=100_000)
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--spread", type=int, default=20)
+    args = parser.parse_args()
+    run_in_memory(args.reminders)
+    sys.exit(asyncio.run(run_mongo(args.workers, args.events, args.spread)) if args.mongo else 0)
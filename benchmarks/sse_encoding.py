@@ -0,0 +1,49 @@
+"""
+Microbenchmark of the per-chunk cost of encoding SSE frames: the previous
+json.dumps + f-string path versus the orjson encoder in app.utils.sse.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.sse_encoding --iterations 200000
+"""
+import argparse
+import json
+import timeit
+
+from app.utils.sse import encode_sse
+
+SAMPLE_CHUNKS = {
+    "token": {"type": "token", "content": "Confirmed — your orbital systems sync is booked for Tuesday at 10 AM."},
+    "tool_start": {
+        "type": "tool_start", "id": "call_3f9c", "name": "find_available_slots",
+        "args": {"date": "2026-10-22", "user_timezone": "America/New_York", "duration_minutes": 30},
+    },
+    "tool_end": {
+        "type": "tool_end", "tool_call_id": "call_3f9c", "name": "list_events",
+        "output": json.dumps([
+            {"google_event_id": f"evt{i}", "title": f"Propulsion review {i}",
+             "start_time": "2026-10-22T10:00:00+05:30", "end_time": "2026-10-22T10:30:00+05:30", "attendees": []}
+            for i in range(20)
+        ]),
+    },
+}
+
+
+def legacy_encode(chunk: dict) -> bytes:
+    # What ChatService did before: json.dumps, an f-string, then Starlette's str -> bytes encode.
+    return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'chunk':>10} {'legacy ns':>10} {'orjson ns':>10} {'speedup':>8}")
+    for name, chunk in SAMPLE_CHUNKS.items():
+        legacy = timeit.timeit(lambda: legacy_encode(chunk), number=args.iterations) / args.iterations
+        fast = timeit.timeit(lambda: encode_sse(chunk), number=args.iterations) / args.iterations
+        print(f"{name:>10} {legacy * 1e9:>10.0f} {fast * 1e9:>10.0f} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmarks bulk UTC -> local conversion of event timestamps with the offset-table
+path in app.utils.timezones against a per-timestamp pytz `astimezone` loop, and
+cross-checks every converted value against pytz (including across DST changes).
+
+Usage (from the project root):
+    python -m benchmarks.timezone_conversion --count 100000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.utils.timezones import get_zone, to_local_many
+
+ZONES = ["Asia/Kolkata", "America/New_York", "Europe/London", "Australia/Lord_Howe", "America/Sao_Paulo", "UTC"]
+
+
+def random_timestamps(count: int, seed: int) -> list[datetime]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    span = int(timedelta(days=3 * 365).total_seconds())
+    # Naive UTC, sorted, as events come back from Mongo.
+    return sorted(start + timedelta(seconds=rng.randrange(span)) for _ in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    timestamps = random_timestamps(args.count, args.seed)
+    print(f"{'zone':>20} {'pytz ms':>10} {'table ms':>10} {'speedup':>8} {'mismatches':>11}")
+    for zone_name in ZONES:
+        zone = get_zone(zone_name)
+
+        started = time.perf_counter()
+        expected = [ts.replace(tzinfo=pytz.UTC).astimezone(zone) for ts in timestamps]
+        pytz_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        converted = to_local_many(timestamps, zone_name)
+        table_seconds = time.perf_counter() - started
+
+        mismatches = sum(
+            1 for a, b in zip(expected, converted)
+            if a.isoformat() != b.isoformat() or a.tzname() != b.tzname()
+        )
+        print(f"{zone_name:>20} {pytz_seconds * 1000:>10.1f} {table_seconds * 1000:>10.1f} "
+              f"{pytz_seconds / table_seconds:>7.1f}x {mismatches:>11}")
+
+
+if __name__ == "__main__":
+    main()
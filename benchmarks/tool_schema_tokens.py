@@ -0,0 +1,45 @@
+"""
+Measures the tool declarations the agent binds to the model, which are sent with every
+`call_model` request.
+
+Each tool is formatted exactly as `ChatGoogleGenerativeAI.bind_tools` formats it
+(`convert_to_openai_tool`, built from the tool's model-facing `tool_call_schema`) and
+sized with the agent's token estimate. The `exposed` column is what the declaration
+would cost if the runtime-injected arguments (`current_user`) were part of the schema,
+as they were before they were declared with `InjectedToolArg`.
+
+Usage (from the project root, with a populated .env):
+    python -m benchmarks.tool_schema_tokens
+"""
+import json
+import sys
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.agent.graph import INJECTED_ARGS, tools
+from app.agent.utils.message_budget import estimate_tokens
+
+
+def declaration_tokens(tool, include_injected: bool) -> int:
+    declaration = convert_to_openai_tool(tool)
+    if include_injected and INJECTED_ARGS.get(tool.name):
+        # Format the full input schema the same way, injected arguments included.
+        declaration["function"]["parameters"] = convert_to_openai_tool(tool.get_input_schema())["function"]["parameters"]
+    return estimate_tokens(json.dumps(declaration, separators=(",", ":")))
+
+
+def main() -> int:
+    print(f"{'tool':<26} {'bound':>6} {'exposed':>8}  hidden arguments")
+    bound_total = exposed_total = 0
+    for tool in tools:
+        bound, exposed = declaration_tokens(tool, False), declaration_tokens(tool, True)
+        bound_total += bound
+        exposed_total += exposed
+        print(f"{tool.name:<26} {bound:>6} {exposed:>8}  {', '.join(sorted(INJECTED_ARGS.get(tool.name, ()))) or '-'}")
+    print(f"{'total per call_model':<26} {bound_total:>6} {exposed_total:>8}")
+    print(f"\nHiding injected arguments saves ~{exposed_total - bound_total} tokens per call_model.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
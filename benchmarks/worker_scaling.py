@@ -0,0 +1,98 @@
+"""
+Measures how request throughput scales with the number of gunicorn workers.
+
+For each worker count, the app is started with gunicorn.conf.py, warmed up and then
+hit with a fixed number of concurrent clients for a fixed duration.
+
+Usage (from the project root, with a populated .env and a reachable MongoDB):
+    python benchmarks/worker_scaling.py --workers 1 2 4 8 --path / --concurrency 64 --duration 15
+
+Pass an auth token with --token to benchmark an authenticated endpoint such as /api/auth/me.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become ready in {timeout}s")
+
+
+def run_load(url: str, concurrency: int, duration: float, token: str | None) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def client():
+        nonlocal errors
+        local_latencies, local_errors = [], 0
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=10).read()
+                local_latencies.append(time.perf_counter() - started)
+            except Exception:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--token", default=None)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for worker_count in args.workers:
+        env = {**os.environ, "WEB_CONCURRENCY": str(worker_count), "PORT": str(args.port), "GUNICORN_LOG_LEVEL": "warning"}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app.main:app"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(f"http://127.0.0.1:{args.port}/")
+            run_load(url, args.concurrency, 2.0, args.token)  # warm-up
+            result = run_load(url, args.concurrency, args.duration, args.token)
+            print(f"{worker_count:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f} {result['errors']:>8}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Gunicorn configuration for the production serving mode.
+# Usage: gunicorn -c gunicorn.conf.py app.main:app
+import multiprocessing
+import os
+
+# --- Binding & Workers ---
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# The app is I/O bound and async, so one uvicorn worker per core is enough.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# --- Timeouts ---
+# Chat responses are long-lived SSE streams that can run several LLM round trips.
+# With uvicorn workers `timeout` is a heartbeat check, but keep it generous so a
+# busy event loop isn't killed mid-stream, and give streams time to drain on reload.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "120"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# The app is not preloaded: each worker must create its own Motor client in the lifespan.
+preload_app = False
+
+# --- Logging ---
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+# Settings are read from the environment when app.core.config is imported; tests never
+# reach MongoDB, Google or Serper, so placeholders are enough.
+for key, value in {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "test",
+    "CALENDAR_ID": "test-calendar",
+    "GOOGLE_CREDENTIALS_BASE64": "e30=",
+    "GOOGLE_API_KEY": "test",
+    "SERPER_API_KEY": "test",
+    "JWT_SECRET_KEY": "test-secret",
+    "ALLOWED_FRONTEND_URLS": '["http://localhost"]',
+}.items():
+    os.environ.setdefault(key, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
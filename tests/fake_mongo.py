@@ -0,0 +1,404 @@
+"""
+An in-memory stand-in for the parts of a Motor database the app uses.
+
+Every operation records the command the driver would send (`find`, `insert`,
+`findAndModify`, ...) against the current `mongo_request_scope`, exactly as
+`RequestCommandListener` does for a real client, so round-trip counts can be checked
+without a MongoDB server. Documents go through a BSON-like round trip on the way in
+(aware datetimes become naive UTC), and queries support the operators the app uses.
+"""
+import copy
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pytz
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.database import mongodb
+
+_MISSING = object()
+
+
+def _record(command_name: str) -> None:
+    stats = mongodb._request_stats.get()
+    if stats is not None:
+        stats.record(command_name)
+
+
+def _to_bson(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {key: _to_bson(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_bson(item) for item in value]
+    return value
+
+
+def _get(doc: Dict, path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set(doc: Dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc: Dict, path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part, {})
+    doc.pop(parts[-1], None)
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if value is _MISSING or value is None or operand is None:
+        return False
+    try:
+        return {
+            "$lt": value < operand, "$lte": value <= operand,
+            "$gt": value > operand, "$gte": value >= operand,
+        }[op]
+    except TypeError:
+        return False
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    if expected is None:
+        return value is _MISSING or value is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value is not _MISSING and value == expected
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op in ("$lt", "$lte", "$gt", "$gte"):
+                candidates = value if isinstance(value, list) else [value]
+                if not any(_compare(item, op, operand) for item in candidates):
+                    return False
+            elif op == "$ne":
+                if _equals(value, operand):
+                    return False
+            elif op == "$in":
+                if not any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$nin":
+                if any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif op == "$type":
+                if operand != "string" or not isinstance(value, str):
+                    return False
+            elif op == "$regex":
+                if not isinstance(value, str) or not re.search(operand, value, re.I if "i" in condition.get("$options", "") else 0):
+                    return False
+            elif op == "$options":
+                continue
+            else:
+                raise NotImplementedError(f"fake_mongo does not support {op}")
+        return True
+    return _equals(value, condition)
+
+
+def matches(doc: Dict, query: Optional[Dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif not _match_condition(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    if included:
+        result = {}
+        for key in included:
+            value = _get(doc, key)
+            if value is not _MISSING:
+                _set(result, key, copy.deepcopy(value))
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    result = copy.deepcopy(doc)
+    for key, flag in projection.items():
+        if not flag:
+            _unset(result, key)
+    return result
+
+
+def _apply_update(doc: Dict, update: Dict, inserting: bool) -> None:
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            value = _to_bson(value)
+            if op in ("$set", "$setOnInsert"):
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$inc":
+                current = _get(doc, path)
+                _set(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$push":
+                current = _get(doc, path)
+                _set(doc, path, ([] if current is _MISSING else current) + [value])
+            elif op == "$addToSet":
+                current = _get(doc, path)
+                current = [] if current is _MISSING else current
+                _set(doc, path, current if value in current else current + [value])
+            else:
+                raise NotImplementedError(f"fake_mongo does not support {op}")
+
+
+def _sort_key(spec: List[Tuple[str, int]]):
+    def key(doc: Dict):
+        parts = []
+        for field, direction in spec:
+            value = _get(doc, field)
+            rank = (0, None) if value is _MISSING or value is None else (1, value)
+            parts.append(_Reversed(rank) if direction < 0 else rank)
+        return parts
+    return key
+
+
+class _Reversed:
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query: Optional[Dict], projection: Optional[Dict]):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._results: Optional[List[Dict]] = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "FakeCursor":
+        self._sort = list(key_or_list) if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self._limit = count
+        return self
+
+    def _execute(self) -> List[Dict]:
+        if self._results is None:
+            _record("find")
+            docs = [doc for doc in self.collection.docs if matches(doc, self.query)]
+            if self._sort:
+                docs.sort(key=_sort_key(self._sort))
+            if self._limit:
+                docs = docs[: self._limit]
+            self._results = [_project(doc, self.projection) for doc in docs]
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        results = self._execute()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._execute())
+        return self
+
+    async def __anext__(self) -> Dict:
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[Dict] = []
+        self.unique_indexes: List[Tuple[List[str], Optional[Dict]]] = []
+
+    # --- Helpers ---
+
+    def _check_unique(self, candidate: Dict, ignore: Optional[Dict] = None) -> None:
+        keys_to_check = [(["_id"], None)] + self.unique_indexes
+        for fields, partial in keys_to_check:
+            if partial and not matches(candidate, partial):
+                continue
+            key = tuple(_get(candidate, field) for field in fields)
+            for doc in self.docs:
+                if doc is ignore or (partial and not matches(doc, partial)):
+                    continue
+                if tuple(_get(doc, field) for field in fields) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key in {self.name}: {key}")
+
+    def _first(self, query: Optional[Dict], sort=None) -> Optional[Dict]:
+        docs = [doc for doc in self.docs if matches(doc, query)]
+        if sort:
+            docs.sort(key=_sort_key(sort))
+        return docs[0] if docs else None
+
+    def _upsert_doc(self, query: Dict, update: Dict) -> Dict:
+        doc = {key: copy.deepcopy(value) for key, value in _to_bson(query).items()
+               if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value))}
+        _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return doc
+
+    def _update_doc(self, doc: Dict, update: Dict) -> None:
+        updated = copy.deepcopy(doc)
+        _apply_update(updated, update, inserting=False)
+        self._check_unique(updated, ignore=doc)
+        doc.clear()
+        doc.update(updated)
+
+    # --- Motor API ---
+
+    async def create_index(self, keys, unique: bool = False, partialFilterExpression: Optional[Dict] = None, **kwargs) -> str:
+        _record("createIndexes")
+        fields = [keys] if isinstance(keys, str) else [field for field, _ in keys]
+        if unique:
+            self.unique_indexes.append((fields, partialFilterExpression))
+        return "_".join(fields)
+
+    async def insert_one(self, document: Dict) -> _Result:
+        _record("insert")
+        document.setdefault("_id", ObjectId())
+        doc = _to_bson(copy.deepcopy(document))
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return _Result(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: Iterable[Dict], ordered: bool = True) -> _Result:
+        _record("insert")
+        ids = []
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            doc = _to_bson(copy.deepcopy(document))
+            self._check_unique(doc)
+            self.docs.append(doc)
+            ids.append(document["_id"])
+        return _Result(inserted_ids=ids)
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, **kwargs) -> Optional[Dict]:
+        _record("find")
+        doc = self._first(_to_bson(query), kwargs.get("sort"))
+        return _project(doc, projection) if doc is not None else None
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> FakeCursor:
+        return FakeCursor(self, _to_bson(query), projection)
+
+    async def count_documents(self, query: Dict, **kwargs) -> int:
+        _record("aggregate")
+        return sum(1 for doc in self.docs if matches(doc, _to_bson(query)))
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False) -> _Result:
+        _record("update")
+        doc = self._first(_to_bson(query))
+        if doc is not None:
+            self._update_doc(doc, update)
+            return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            return _Result(matched_count=0, modified_count=0, upserted_id=self._upsert_doc(query, update)["_id"])
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query: Dict, update: Dict) -> _Result:
+        _record("update")
+        docs = [doc for doc in self.docs if matches(doc, _to_bson(query))]
+        for doc in docs:
+            self._update_doc(doc, update)
+        return _Result(matched_count=len(docs), modified_count=len(docs))
+
+    async def find_one_and_update(
+        self, query: Dict, update: Dict, projection: Optional[Dict] = None, upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE, **kwargs
+    ) -> Optional[Dict]:
+        _record("findAndModify")
+        doc = self._first(_to_bson(query), kwargs.get("sort"))
+        if doc is None:
+            if not upsert:
+                return None
+            doc = self._upsert_doc(query, update)
+            return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+        before = copy.deepcopy(doc)
+        self._update_doc(doc, update)
+        return _project(doc if return_document == ReturnDocument.AFTER else before, projection)
+
+    async def find_one_and_delete(self, query: Dict, projection: Optional[Dict] = None, **kwargs) -> Optional[Dict]:
+        _record("findAndModify")
+        doc = self._first(_to_bson(query), kwargs.get("sort"))
+        if doc is None:
+            return None
+        self.docs.remove(doc)
+        return _project(doc, projection)
+
+    async def delete_one(self, query: Dict) -> _Result:
+        _record("delete")
+        doc = self._first(_to_bson(query))
+        if doc is not None:
+            self.docs.remove(doc)
+        return _Result(deleted_count=int(doc is not None))
+
+    async def delete_many(self, query: Dict) -> _Result:
+        _record("delete")
+        docs = [doc for doc in self.docs if matches(doc, _to_bson(query))]
+        for doc in docs:
+            self.docs.remove(doc)
+        return _Result(deleted_count=len(docs))
+
+
+class FakeDatabase:
+    def __init__(self, name: str = "fake"):
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def get_collection(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    async def command(self, name: str, *args, **kwargs) -> Dict:
+        _record(name)
+        return {"ok": 1}
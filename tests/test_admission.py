@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import BaseAPIException, InvalidTokenException, TooManyRequestsException
+from app.services.admission_service import FairScheduler, admission_controller
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_GLOBAL_CALLS_PER_MINUTE", 6000)
+    monkeypatch.setattr(settings, "LLM_QUEUE_MAX_SIZE", 2)
+    monkeypatch.setattr(settings, "LLM_QUEUE_MAX_PER_USER", 1)
+    monkeypatch.setattr(admission_controller, "scheduler", FairScheduler(1))
+
+
+def test_llm_slot_rejects_calls_beyond_the_queue_bounds(one_slot):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold(user_id):
+            async with admission_controller.llm_slot(user_id):
+                await release.wait()
+
+        holder = asyncio.create_task(hold("a"))
+        waiter = asyncio.create_task(hold("b"))
+        await asyncio.sleep(0.01)
+        assert admission_controller.scheduler.queued == 1
+
+        with pytest.raises(TooManyRequestsException):
+            async with admission_controller.llm_slot("b"):  # b already has its one queued call
+                pass
+        other = asyncio.create_task(hold("c"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(TooManyRequestsException):
+            async with admission_controller.llm_slot("d"):  # the queue holds its maximum of two
+                pass
+
+        release.set()
+        await asyncio.gather(holder, waiter, other)
+        assert admission_controller.scheduler.in_use == 0
+
+    asyncio.run(scenario())
+
+
+def test_metrics_require_the_configured_token(monkeypatch):
+    from app.main import read_metrics
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    with pytest.raises(BaseAPIException) as disabled:
+        asyncio.run(read_metrics(x_metrics_token="anything"))
+    assert disabled.value.status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    with pytest.raises(InvalidTokenException):
+        asyncio.run(read_metrics(x_metrics_token="wrong"))
+    assert isinstance(asyncio.run(read_metrics(x_metrics_token="s3cret")), dict)
+
+
+def test_a_call_cancelled_while_queued_takes_no_global_token(one_slot, monkeypatch):
+    taken = []
+
+    async def try_acquire(key, rate_per_minute, capacity):
+        taken.append(key)
+        return 0.0
+
+    monkeypatch.setattr(admission_controller.buckets, "try_acquire", try_acquire)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold(user_id):
+            async with admission_controller.llm_slot(user_id):
+                await release.wait()
+
+        holder = asyncio.create_task(hold("a"))
+        waiter = asyncio.create_task(hold("b"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+        assert admission_controller.scheduler.in_use == 0
+
+    asyncio.run(scenario())
+    assert taken == ["llm:global"]
@@ -0,0 +1,168 @@
+import asyncio
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+import pytz
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.availability_service import (
+    AvailabilityService, dilate, free_run_starts, interval_mask, iter_set_bits, slots_in_day
+)
+from app.utils.timezones import get_zone
+from tests.fake_mongo import FakeDatabase
+
+
+def _company(day: date, hour: int, minute: int = 0) -> datetime:
+    return get_zone(settings.COMPANY_TIMEZONE).localize(datetime.combine(day, time(hour, minute))).astimezone(pytz.UTC)
+
+
+def _bits(mask: int):
+    return list(iter_set_bits(mask))
+
+
+def test_interval_mask_rounds_partial_slots_outwards_and_clips_to_the_day():
+    day = date(2030, 1, 7)
+    assert _bits(interval_mask(day, _company(day, 10), _company(day, 10, 5))) == [120]
+    assert _bits(interval_mask(day, _company(day, 10, 2), _company(day, 10, 7))) == [120, 121]
+    assert interval_mask(day, _company(day, 10), _company(day, 10)) == 0
+    # An event spanning midnight only covers this day's part of it.
+    spanning = interval_mask(day, _company(day, 23, 50), _company(day, 23, 50) + timedelta(hours=1))
+    assert _bits(spanning) == [286, 287]
+    assert interval_mask(day, _company(day, 0) - timedelta(hours=2), _company(day, 0)) == 0
+
+
+@pytest.mark.parametrize("day, hours", [(date(2030, 3, 10), 23), (date(2030, 11, 3), 25), (date(2030, 6, 3), 24)])
+def test_dst_days_have_23_or_25_hours_of_slots(monkeypatch, day, hours):
+    monkeypatch.setattr(settings, "COMPANY_TIMEZONE", "America/New_York")
+    assert slots_in_day(day) == hours * 60 // settings.AVAILABILITY_SLOT_MINUTES
+    # 03:00 local comes after the 01:00-03:00 transition: 2 elapsed hours on the
+    # spring-forward day, 4 on the fall-back day.
+    three_am = interval_mask(day, _company(day, 3), _company(day, 3, 5))
+    assert _bits(three_am) == [(3 + hours - 24) * 60 // settings.AVAILABILITY_SLOT_MINUTES]
+
+
+def test_dilate_grows_runs_on_both_sides_within_the_day():
+    assert _bits(dilate(1 << 5, 2, 10)) == [3, 4, 5, 6, 7]
+    assert _bits(dilate((1 << 0) | (1 << 9), 1, 10)) == [0, 1, 8, 9]
+    assert dilate(0b1010, 0, 10) == 0b1010
+
+
+def test_free_run_starts_matches_a_naive_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        n_slots = rng.randint(1, 120)
+        free = rng.getrandbits(n_slots) | rng.choice([0, (1 << n_slots) - 1])
+        run_length = rng.randint(1, 40)
+        expected = sum(
+            1 << i for i in range(n_slots - run_length + 1)
+            if all(free >> j & 1 for j in range(i, i + run_length))
+        )
+        assert free_run_starts(free, run_length) == expected
+    assert free_run_starts(0b110, 0) == 0b110
+
+
+def test_slot_starts_are_aligned_to_the_step_from_the_working_day_start():
+    day = date.today() + timedelta(days=7)
+    starts = asyncio.run(AvailabilityService(FakeDatabase()).find_free_slot_starts([day], timedelta(minutes=30), 30))
+
+    hours = settings.COMPANY_WORKING_END_HOUR - settings.COMPANY_WORKING_START_HOUR
+    expected = [_company(day, settings.COMPANY_WORKING_START_HOUR) + timedelta(minutes=30 * n) for n in range(hours * 2)]
+    assert starts == expected
+
+
+def _linear_scan(day, events, duration, step_minutes, buffer):
+    """The slot scan the bitmaps replaced: every step-aligned start, checked against every event."""
+    slot = _company(day, settings.COMPANY_WORKING_START_HOUR)
+    work_end = _company(day, settings.COMPANY_WORKING_END_HOUR)
+    starts = []
+    while slot + duration <= work_end:
+        if not any(slot < end + buffer and slot + duration > start - buffer for start, end in events):
+            starts.append(slot)
+        slot += timedelta(minutes=step_minutes)
+    return starts
+
+
+def _random_events(rng, day, granularity):
+    work_start, work_end = _company(day, settings.COMPANY_WORKING_START_HOUR), _company(day, settings.COMPANY_WORKING_END_HOUR)
+    # Events clustered around working hours so their edges are exercised.
+    events = []
+    for _ in range(rng.randint(0, 8)):
+        start = work_start + timedelta(minutes=granularity * rng.randint(-120 // granularity, ((work_end - work_start).seconds + 3600) // (60 * granularity)))
+        events.append((start, start + timedelta(minutes=granularity * rng.randint(1, 120 // granularity))))
+    events += rng.choice([[], [(work_start - timedelta(hours=1), work_start)], [(work_end, work_end + timedelta(hours=1))]])
+    return events
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_slot_starts_match_the_linear_scan(monkeypatch, seed):
+    rng = random.Random(seed)
+    buffer_minutes = rng.choice([0, 5, 15, 30])
+    monkeypatch.setattr(settings, "MEETING_BUFFER_MINUTES", buffer_minutes)
+    day = date.today() + timedelta(days=10)
+    # Slot-aligned events and buffers: the bitmaps are exact.
+    events = _random_events(rng, day, settings.AVAILABILITY_SLOT_MINUTES)
+    db = FakeDatabase()
+    for start, end in events:
+        asyncio.run(db.events.insert_one({"owner_user_id": ObjectId(), "title": "Busy", "start_time_utc": start, "end_time_utc": end}))
+    duration = timedelta(minutes=rng.choice([5, 15, 30, 45, 60, 90]))
+    step_minutes = rng.choice([5, 15, 30])
+
+    starts = asyncio.run(AvailabilityService(db).find_free_slot_starts([day], duration, step_minutes))
+
+    assert starts == _linear_scan(day, events, duration, step_minutes, timedelta(minutes=buffer_minutes))
+
+
+def test_stale_refresh_does_not_overwrite_a_later_one():
+    db = FakeDatabase()
+    service = AvailabilityService(db)
+    day = date.today() + timedelta(days=7)
+    start = get_zone(settings.COMPANY_TIMEZONE).localize(datetime.combine(day, time(10)))
+    compute_day = service._compute_day
+
+    async def scenario():
+        assert await service.get_bitmaps([day]) == {day: 0}
+
+        # The first refresh reads the day before the booking lands and stores last.
+        read_before_booking = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_compute(day, series_busy):
+            bitmap = await compute_day(day, series_busy)
+            read_before_booking.set()
+            await release.wait()
+            return bitmap
+
+        service._compute_day = slow_compute
+        stale = asyncio.create_task(service.refresh_days([day]))
+        await read_before_booking.wait()
+        service._compute_day = compute_day
+
+        await db.events.insert_one({
+            "owner_user_id": ObjectId(), "title": "Booked",
+            "start_time_utc": start, "end_time_utc": start + timedelta(hours=1),
+        })
+        await service.refresh_days([day])
+        release.set()
+        await stale
+        return await service.get_bitmaps([day])
+
+    assert asyncio.run(scenario())[day] != 0
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_unaligned_events_never_free_a_slot_the_linear_scan_rejects(seed):
+    rng = random.Random(1000 + seed)
+    day = date.today() + timedelta(days=10)
+    # Minute-granular events are rounded out to whole slots, which may only hide starts.
+    events = _random_events(rng, day, 1)
+    db = FakeDatabase()
+    for start, end in events:
+        asyncio.run(db.events.insert_one({"owner_user_id": ObjectId(), "title": "Busy", "start_time_utc": start, "end_time_utc": end}))
+    duration = timedelta(minutes=rng.choice([15, 30, 60]))
+
+    starts = asyncio.run(AvailabilityService(db).find_free_slot_starts([day], duration, 15))
+
+    buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
+    assert set(starts) <= set(_linear_scan(day, events, duration, 15, buffer))
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.agent import graph
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.chat_service import ChatService
+from app.utils.sse import cancel_on_disconnect
+
+
+def _counter(key):
+    return metrics.snapshot()["counters"].get(key, 0)
+
+
+class BlockingTool:
+    def __init__(self, name):
+        self.name = name
+        self.release = asyncio.Event()
+        self.outcome = None
+
+    async def ainvoke(self, args):
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.outcome = "cancelled"
+            raise
+        self.outcome = "completed"
+        return "ok"
+
+
+def _cancel_mid_call(tool):
+    async def scenario():
+        call = asyncio.create_task(graph._invoke_tool(tool, {}))
+        await asyncio.sleep(0)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        tool.release.set()
+        await asyncio.gather(*graph._background_tools)
+    asyncio.run(scenario())
+
+
+def test_a_shielded_write_tool_completes_after_the_turn_is_cancelled():
+    before = _counter("agent_shielded_tools_total{tool=confirm_and_book_event}")
+    tool = BlockingTool("confirm_and_book_event")
+
+    _cancel_mid_call(tool)
+
+    assert tool.outcome == "completed"
+    assert _counter("agent_shielded_tools_total{tool=confirm_and_book_event}") == before + 1
+
+
+def test_a_read_tool_is_cancelled_with_the_turn():
+    key = "agent_cancelled_calls_total{kind=tool,tool=list_events}"
+    before = _counter(key)
+    tool = BlockingTool("list_events")
+
+    _cancel_mid_call(tool)
+
+    assert tool.outcome == "cancelled"
+    assert _counter(key) == before + 1
+
+
+def test_disconnect_cancels_the_producer_and_closes_its_generator():
+    closed = []
+    disconnected = asyncio.Event()
+
+    async def frames():
+        try:
+            yield b"first"
+            await asyncio.sleep(60)
+            yield b"never"
+        finally:
+            closed.append(True)
+
+    async def is_disconnected():
+        return disconnected.is_set()
+
+    async def scenario():
+        received = []
+        async for frame in cancel_on_disconnect(frames(), is_disconnected, 0.01, lambda: received.append("disconnect")):
+            received.append(frame)
+            disconnected.set()
+        return received
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5)) == [b"first", "disconnect"]
+    assert closed == [True]
+
+
+def test_a_disconnected_chat_turn_is_counted(monkeypatch):
+    monkeypatch.setattr(settings, "SSE_DISCONNECT_POLL_SECONDS", 0.01)
+
+    class SlowChatService(ChatService):
+        def __init__(self):
+            pass
+
+        async def stream_agent_events(self, request, current_user):
+            yield {"type": "token", "content": "Checking"}
+            await asyncio.sleep(60)
+
+    async def is_disconnected():
+        return True
+
+    async def scenario():
+        return [frame async for frame in SlowChatService().stream_agent_response(None, None, None, is_disconnected)]
+
+    before = _counter("chat_turns_cancelled_total{reason=disconnect}")
+
+    frames = asyncio.run(asyncio.wait_for(scenario(), 5))
+
+    assert len(frames) <= 1
+    assert _counter("chat_turns_cancelled_total{reason=disconnect}") == before + 1
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+
+from app.schemas.user import UserInDB
+from app.services.chat_service import ChatSession
+
+
+class ScriptedChatService:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream_agent_events(self, request, current_user):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _run(session, user_input):
+    async def consume():
+        return [chunk async for chunk in session.run_turn(user_input)]
+    return asyncio.run(consume())
+
+
+def _user():
+    return UserInDB(_id=str(ObjectId()), email="a@example.com", username="a", timezone="UTC", hashed_password="")
+
+
+def test_timezone_follows_a_successful_update_without_a_tool_start():
+    output = json.dumps({"status": "success", "message": "Timezone updated successfully to Asia/Kolkata.",
+                         "timezone": "Asia/Kolkata", "current_user_time": "2030-01-01 10:00 AM"})
+    session = ChatSession(ScriptedChatService([
+        {"type": "tool_end", "tool_call_id": "1", "name": "update_user_timezone", "output": output},
+        {"type": "token", "content": "Done."},
+    ]), _user(), 10)
+
+    _run(session, "I'm in India")
+
+    assert session.current_user.timezone == "Asia/Kolkata"
+    assert session.history[-1] == {"type": "ai", "content": "Done."}
+
+
+def test_timezone_is_kept_when_the_update_failed():
+    session = ChatSession(ScriptedChatService([
+        {"type": "tool_end", "tool_call_id": "1", "name": "update_user_timezone",
+         "output": json.dumps({"status": "error", "message": "Invalid timezone name."})},
+    ]), _user(), 10)
+
+    _run(session, "I'm on Mars")
+
+    assert session.current_user.timezone == "UTC"
+
+
+def _websocket_client(monkeypatch, chat_service):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import chat
+    from app.core.exceptions import InvalidTokenException
+    from app.database.mongodb import get_db
+    from app.dependencies.service_dependencies import get_chat_service
+
+    async def user_from_token(token, db):
+        if token != "t":
+            raise InvalidTokenException()
+        return _user()
+
+    async def admit(user_id):
+        return None
+
+    monkeypatch.setattr(chat, "get_user_from_token", user_from_token)
+    monkeypatch.setattr(chat.admission_controller, "admit_stream", admit)
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_chat_service] = lambda: chat_service
+    return TestClient(app)
+
+
+def test_websocket_turn_failure_sends_an_error_frame_and_keeps_the_session(monkeypatch):
+    class FailingChatService:
+        async def stream_agent_events(self, request, current_user):
+            yield {"type": "token", "content": "Let me check"}
+            raise RuntimeError("model backend unavailable")
+
+    client = _websocket_client(monkeypatch, FailingChatService())
+    with client.websocket_connect("/chat/ws", headers={"Authorization": "Bearer t"}) as websocket:
+        for _ in range(2):
+            websocket.send_text(json.dumps({"type": "message", "input": "hi"}))
+            assert websocket.receive_json()["type"] == "token"
+            assert websocket.receive_json()["type"] == "error"
+
+
+def test_websocket_authenticates_with_a_first_frame_and_ignores_the_query_string(monkeypatch):
+    from starlette.websockets import WebSocketDisconnect
+
+    client = _websocket_client(monkeypatch, ScriptedChatService([{"type": "token", "content": "Hello"}]))
+    with client.websocket_connect("/chat/ws") as websocket:
+        websocket.send_text(json.dumps({"type": "auth", "token": "t"}))
+        websocket.send_text(json.dumps({"type": "message", "input": "hi"}))
+        assert websocket.receive_json() == {"type": "token", "content": "Hello"}
+        assert websocket.receive_json() == {"type": "done"}
+
+    with client.websocket_connect("/chat/ws?token=t") as websocket:
+        websocket.send_text(json.dumps({"type": "message", "input": "hi"}))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+        assert closed.value.code == 1008
+
+
+def test_websocket_answers_pings_mid_turn_and_cancels_the_turn_on_close(monkeypatch):
+    import threading
+
+    from app.core.metrics import metrics
+
+    cancelled = threading.Event()
+
+    class SlowChatService:
+        async def stream_agent_events(self, request, current_user):
+            yield {"type": "token", "content": "Checking your calendar"}
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield {"type": "token", "content": "Done."}
+
+    client = _websocket_client(monkeypatch, SlowChatService())
+    before = metrics.snapshot()["counters"].get("chat_turns_cancelled_total{reason=disconnect}", 0)
+    with client.websocket_connect("/chat/ws", headers={"Authorization": "Bearer t"}) as websocket:
+        websocket.send_text(json.dumps({"type": "message", "input": "am I free?"}))
+        assert websocket.receive_json()["type"] == "token"
+        websocket.send_text(json.dumps({"type": "ping"}))
+        assert websocket.receive_json() == {"type": "pong"}
+        websocket.send_text(json.dumps({"type": "message", "input": "and tomorrow?"}))
+        assert websocket.receive_json()["type"] == "error"
+
+    assert cancelled.wait(5)
+    after = metrics.snapshot()["counters"].get("chat_turns_cancelled_total{reason=disconnect}", 0)
+    assert after == before + 1
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.availability_service import iter_runs
+from app.services.common_availability_service import CommonAvailabilityService
+from app.utils.timezones import get_zone
+from tests.fake_mongo import FakeDatabase
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+def _company_utc(day: date, hour: int) -> datetime:
+    local = get_zone(settings.COMPANY_TIMEZONE).localize(datetime.combine(day, time(hour)))
+    return local.astimezone(get_zone("UTC")).replace(tzinfo=None)
+
+
+def test_iter_runs():
+    assert list(iter_runs(0)) == []
+    assert list(iter_runs(0b1110_0110_0001)) == [(0, 1), (5, 7), (9, 12)]
+
+
+def test_shared_calendar_events_block_common_windows(db):
+    day = date.today() + timedelta(days=7)
+    start_hour = settings.COMPANY_WORKING_START_HOUR
+    asyncio.run(db.users.insert_many([{"email": "a@example.com"}, {"email": "b@example.com"}]))
+    # Booked by someone who is not a participant: booking would still reject the slot.
+    asyncio.run(db.events.insert_one({
+        "owner_user_id": ObjectId(), "attendees": [], "title": "All hands",
+        "start_time_utc": _company_utc(day, start_hour + 1), "end_time_utc": _company_utc(day, start_hour + 2),
+    }))
+
+    result = asyncio.run(CommonAvailabilityService(db).find_common_availability(
+        ["a@example.com", "b@example.com"], day, day, timedelta(minutes=30), include_google=False,
+    ))
+
+    busy_start, busy_end = _company_utc(day, start_hour + 1), _company_utc(day, start_hour + 2)
+    buffer = timedelta(minutes=settings.MEETING_BUFFER_MINUTES)
+    assert result["free_windows"]
+    for start, end in result["free_windows"]:
+        assert end <= busy_start - buffer or start >= busy_end + buffer
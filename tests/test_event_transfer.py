@@ -0,0 +1,54 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.agent.tools import calendar_tools
+from app.database import mongodb
+from app.schemas.event import EventImportRow
+from app.services.event_transfer_service import EventTransferService
+from tests.fake_mongo import FakeDatabase
+
+
+def test_imported_rows_never_reference_a_google_event():
+    row = EventImportRow(
+        title="Review", start_time="2030-01-07T10:00:00", end_time="2030-01-07T11:00:00",
+        google_event_id="someone-elses-event",
+    )
+
+    doc = EventTransferService._to_document(row, ObjectId(), "UTC")
+
+    assert doc["google_event_id"] is None
+    assert doc["import_uid"] == "someone-elses-event"
+
+
+def test_imported_events_can_be_listed_and_deleted(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(mongodb.db_manager, "database", db)
+    monkeypatch.setattr(mongodb.db_manager, "secondary_database", None)
+
+    def no_google():
+        raise AssertionError("local-only events must not reach Google Calendar")
+
+    monkeypatch.setattr(calendar_tools.calendar_service_instance, "get_client", no_google)
+    owner = ObjectId()
+    user = {"id": str(owner), "timezone": "UTC"}
+    row = EventImportRow(title="Review", start_time="2030-01-07T10:00:00", end_time="2030-01-07T11:00:00", uid="r-1")
+    asyncio.run(db.events.insert_one(EventTransferService._to_document(row, owner, "UTC")))
+
+    listed = asyncio.run(calendar_tools.list_events.ainvoke({"current_user": user}))
+    assert [event["title"] for event in listed] == ["Review"]
+    event_id = listed[0]["event_id"]
+
+    stranger = {"id": str(ObjectId()), "timezone": "UTC"}
+    denied = asyncio.run(calendar_tools.delete_event.ainvoke({"event_id": event_id, "current_user": stranger}))
+    assert denied.startswith("Error: Permission Denied")
+
+    renamed = asyncio.run(calendar_tools.update_event.ainvoke(
+        {"event_id": event_id, "current_user": user, "new_summary": "Retro"}
+    ))
+    assert renamed == "Event 'Retro' updated successfully."
+
+    message = asyncio.run(calendar_tools.delete_event.ainvoke({"event_id": event_id, "current_user": user}))
+
+    assert message == "Event 'Retro' deleted successfully."
+    assert asyncio.run(db.events.count_documents({})) == 0
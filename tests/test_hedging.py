@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.agent.llm import HedgedModel
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.admission_service import FairScheduler, admission_controller
+
+
+class SlowThenFastModel:
+    """The first call hangs for `first_delay` seconds; later calls answer at once."""
+
+    def __init__(self, first_delay: float):
+        self.first_delay = first_delay
+        self.calls = 0
+        self.peak_slots = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.peak_slots = max(self.peak_slots, admission_controller.scheduler.in_use)
+        if self.calls == 1:
+            await asyncio.sleep(self.first_delay)
+        return f"answer {self.calls}"
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "LLM_GLOBAL_CALLS_PER_MINUTE", 6000)
+    monkeypatch.setattr(admission_controller, "scheduler", FairScheduler(4))
+
+
+def test_each_hedge_attempt_takes_its_own_admission_slot(hedging):
+    model = SlowThenFastModel(first_delay=5)
+    hedged = HedgedModel(primary=model, primary_name="fake-slots")
+
+    assert asyncio.run(hedged.ainvoke(["hi"], user_id="user-1")) == "answer 2"
+    assert model.peak_slots == 2
+    assert admission_controller.scheduler.in_use == 0
+
+
+def test_a_hedge_waits_for_a_free_slot(hedging, monkeypatch):
+    monkeypatch.setattr(admission_controller, "scheduler", FairScheduler(1))
+    model = SlowThenFastModel(first_delay=0.3)
+    hedged = HedgedModel(primary=model, primary_name="fake-capped")
+
+    # With one slot the hedge queues behind the first attempt, which then wins.
+    assert asyncio.run(hedged.ainvoke(["hi"], user_id="user-1")) == "answer 1"
+    assert model.peak_slots == 1
+    assert admission_controller.scheduler.in_use == 0
+
+
+def test_cancelled_attempts_are_timed(hedging):
+    model = SlowThenFastModel(first_delay=5)
+    hedged = HedgedModel(primary=model, primary_name="fake-timing")
+
+    asyncio.run(hedged.ainvoke(["hi"]))
+
+    # Both the hedge that won and the slow attempt it cancelled are counted.
+    assert metrics.timer_count("llm_attempt_seconds", model="fake-timing") == 2
+    assert metrics.percentile("llm_attempt_seconds", 1.0, model="fake-timing") >= 0.05
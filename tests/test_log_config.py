@@ -0,0 +1,25 @@
+import logging
+import queue
+
+from app.core.log_config import _LocalQueueHandler
+from app.core.metrics import metrics
+
+
+def test_a_full_queue_drops_and_counts_info_records_but_keeps_errors():
+    log_queue = queue.Queue(maxsize=1)
+    handler = _LocalQueueHandler(log_queue)
+    test_logger = logging.getLogger("tests.log_queue")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(handler)
+    key = "log_records_dropped_total{level=INFO}"
+    before = metrics.snapshot()["counters"].get(key, 0)
+
+    test_logger.warning("kept")
+    test_logger.info("dropped")
+    assert metrics.snapshot()["counters"].get(key, 0) == before + 1
+
+    log_queue.get_nowait()
+    test_logger.error("room again")
+    assert log_queue.get_nowait().getMessage() == "room again"
+    test_logger.removeHandler(handler)
@@ -0,0 +1,39 @@
+from langchain_core.messages import ToolMessage
+
+from app.agent.loop_guard import ToolLoopGuard
+
+LOOKUP = ("list_events", {"date": "2030-01-07"})
+
+
+def _step(guard, *calls):
+    for index, (name, args) in enumerate(calls):
+        guard.cached(name, args, f"{name}-{index}-{guard.stale_steps}")
+        guard.remember(name, args, "[]")
+    return guard.end_step()
+
+
+def test_repeated_lookups_trip_the_guard():
+    guard = ToolLoopGuard(max_stale_steps=2)
+    assert not _step(guard, LOOKUP)
+    assert not _step(guard, LOOKUP)
+    assert _step(guard, LOOKUP)
+
+
+def test_a_write_makes_the_next_lookup_progress():
+    guard = ToolLoopGuard(max_stale_steps=1)
+    _step(guard, LOOKUP)
+    _step(guard, ("delete_event", {"event_id": "abc"}))
+
+    assert not _step(guard, LOOKUP)
+
+
+def test_recalling_an_elided_result_is_not_stale():
+    guard = ToolLoopGuard(max_stale_steps=1)
+    guard.cached(*LOOKUP, "call-1")
+    guard.remember(*LOOKUP, "[]")
+    guard.end_step()
+
+    guard.forget_elided([ToolMessage(content="[Earlier list_events result elided]", tool_call_id="call-1",
+                                     additional_kwargs={"summarized": True})])
+
+    assert not _step(guard, LOOKUP)
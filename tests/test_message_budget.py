@@ -0,0 +1,48 @@
+import json
+import random
+
+from app.agent.utils.message_budget import estimate_tokens, format_tool_output
+
+
+def test_an_oversized_dict_stays_valid_json():
+    result = {"status": "ok", "free_windows": [[f"2030-01-07T{h:02d}:00", f"2030-01-07T{h:02d}:30"] for h in range(24)] * 20,
+              "busy": {f"user{i}@example.com": ["x" * 200] * 5 for i in range(40)}}
+
+    text = format_tool_output(result, max_tokens=200)
+
+    parsed = json.loads(text)
+    assert estimate_tokens(text) <= 200
+    assert parsed["status"] == "ok"
+
+
+def test_an_oversized_json_string_is_cut_structurally():
+    text = format_tool_output(json.dumps({"status": "success", "message": "m" * 5000}), max_tokens=100)
+
+    parsed = json.loads(text)
+    assert parsed["status"] == "success" and parsed["message"].endswith("…[truncated]")
+
+
+def test_plain_text_is_cut_at_the_budget():
+    assert format_tool_output("Error: " + "e" * 1000, max_tokens=20).endswith("…[truncated]")
+
+
+def test_random_results_always_fit_as_valid_json():
+    rng = random.Random(3)
+
+    def generate(depth):
+        kind = rng.random()
+        if depth > 3 or kind < 0.3:
+            return "x" * rng.randint(0, 2000)
+        if kind < 0.6:
+            return [generate(depth + 1) for _ in range(rng.randint(0, 8))]
+        if kind < 0.7:
+            return rng.randint(0, 10**9)
+        return {f"field{i}": generate(depth + 1) for i in range(rng.randint(0, 8))}
+
+    for _ in range(200):
+        result, max_tokens = generate(0), rng.choice([50, 200, 1500])
+        if not isinstance(result, (dict, list)):
+            continue
+        text = format_tool_output(result, max_tokens)
+        json.loads(text)
+        assert estimate_tokens(text) <= max_tokens
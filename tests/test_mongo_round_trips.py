@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.database import mongodb
+from app.services import auth_service
+from benchmarks.mongo_round_trips import BUDGETS, StubCalendar, over_budget, run_scenarios
+from tests.fake_mongo import FakeDatabase
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(mongodb.db_manager, "database", db)
+    monkeypatch.setattr(mongodb.db_manager, "secondary_database", None)
+    monkeypatch.setattr(settings, "AVAILABILITY_PREFETCH_ENABLED", False)
+    # Hashing costs no round trips; a trivial hash keeps the test independent of the bcrypt backend.
+    monkeypatch.setattr(auth_service, "get_password_hash", lambda password: f"hashed:{password}")
+    monkeypatch.setattr(auth_service, "verify_password", lambda password, hashed: hashed == f"hashed:{password}")
+    return db
+
+
+def test_every_scenario_succeeds_within_its_round_trip_budget(fake_db):
+    runs = asyncio.run(run_scenarios(StubCalendar()))
+
+    assert {run["label"] for run in runs} == set(BUDGETS)
+    for run in runs:
+        result = run["result"]
+        assert not (isinstance(result, str) and result.startswith(("Error", "An "))), (run["label"], result)
+    assert over_budget(runs) == [], {run["label"]: dict(run["commands"]) for run in runs}
+
+
+def test_budgets_are_tight(fake_db):
+    # A budget above the measured count would let a regression through unnoticed.
+    runs = asyncio.run(run_scenarios(StubCalendar()))
+
+    assert {run["label"]: run["total"] for run in runs} == BUDGETS
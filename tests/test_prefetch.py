@@ -0,0 +1,12 @@
+from app.agent.prefetch import AVAILABILITY_QUESTION, AvailabilityPrefetcher
+
+
+def test_only_availability_questions_are_prefetched():
+    assert AVAILABILITY_QUESTION.search("Anything free Thursday?")
+    assert AVAILABILITY_QUESTION.search("When can we meet next Friday for 45 minutes?")
+    assert not AVAILABILITY_QUESTION.search("List my events for tomorrow")
+    assert not AVAILABILITY_QUESTION.search("Move my meeting to Friday")
+
+    prefetcher = AvailabilityPrefetcher({"id": "u", "timezone": "UTC"})
+    prefetcher.start("List my events for tomorrow", [])
+    assert prefetcher._tasks == {}
@@ -0,0 +1,38 @@
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.agent.recording import ConversationRecorder
+
+
+def test_llm_steps_store_only_new_messages_and_no_email():
+    recorder = ConversationRecorder("book a call", [], "UTC")
+    system = SystemMessage(content="You are Orion.\n- User Email: jane.doe+work@example.co.uk\n- User's Timezone: UTC")
+    call = AIMessage(content="", tool_calls=[{"name": "list_events", "args": {}, "id": "call-1"}])
+    request = [system, HumanMessage(content="book a call")]
+
+    recorder.record_llm("fast", request, call, 0.1)
+    request += [call, ToolMessage(content="[]", tool_call_id="call-1")]
+    recorder.record_llm("fast", request, AIMessage(content="Done."), 0.1)
+
+    first, second = recorder.record["steps"]
+    assert first["request_prefix"] == 0 and len(first["request"]) == 2
+    assert second["request_prefix"] == 2 and [m["type"] for m in second["request"]] == ["ai", "tool"]
+    system_prompt = first["request"][0]["data"]["content"]
+    assert "example.co.uk" not in system_prompt and "User Email: [email]" in system_prompt
+
+
+def test_emails_are_redacted_in_every_stored_string():
+    history = [{"type": "human", "content": "my manager is bob@example.com"}]
+    recorder = ConversationRecorder("invite alice@example.com", history, "UTC")
+    call = AIMessage(content="", tool_calls=[
+        {"name": "find_common_availability", "args": {"attendee_emails": ["alice@example.com"]}, "id": "call-1"},
+    ])
+    recorder.record_llm("strong", [HumanMessage(content="invite alice@example.com")], call, 0.1)
+    recorder.record_tool(
+        "list_events", {"current_user": {"email": "me@example.com"}, "start_time": "2030-01-07"},
+        [{"title": "Sync", "attendees": ["carol@example.org"]}], 0.1,
+    )
+
+    assert "@" not in orjson.dumps(recorder.record).decode()
+    assert recorder.record["steps"][1]["result"] == [{"title": "Sync", "attendees": ["[email]"]}]
+    assert history[0]["content"] == "my manager is bob@example.com"
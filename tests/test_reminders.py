@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services import reminder_service
+from app.services.event_transfer_service import EventTransferService
+from app.services.reminder_service import LogReminderSender, ReminderScheduler, ReminderSender
+from tests.fake_mongo import FakeDatabase
+
+
+async def _rows(*rows):
+    for number, fields in enumerate(rows, start=1):
+        yield number, fields, None
+
+
+def test_imported_meetings_reach_the_queue_of_a_held_window(monkeypatch):
+    db = FakeDatabase()
+    scheduler = ReminderScheduler(db, LogReminderSender())
+    monkeypatch.setattr(reminder_service, "_scheduler", scheduler)
+    start = (datetime.utcnow() + timedelta(minutes=40)).replace(microsecond=0)
+
+    async def scenario():
+        await scheduler.renew()  # Holds every window of the horizon, all empty.
+        assert len(scheduler.queue) == 0
+        rows = _rows({
+            "title": "Imported", "start_time": start.isoformat() + "Z",
+            "end_time": (start + timedelta(minutes=30)).isoformat() + "Z",
+        })
+        async for _ in EventTransferService(db).import_rows(rows, ObjectId(), "UTC"):
+            pass
+
+    asyncio.run(scenario())
+    assert len(scheduler.queue) == 1
+
+
+def test_a_sender_must_implement_send():
+    class Incomplete(ReminderSender):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
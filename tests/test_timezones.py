@@ -0,0 +1,63 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from app.utils.timezones import OffsetTable, get_zone, to_local_many
+
+# Zones with DST in either hemisphere, a half-hour DST shift, a zone that dropped DST,
+# a fractional fixed offset and UTC itself.
+ZONES = ["America/New_York", "Europe/London", "Australia/Lord_Howe", "America/Sao_Paulo", "Asia/Kolkata", "UTC"]
+
+
+def _expected(timestamps, zone_name):
+    zone = get_zone(zone_name)
+    return [ts.replace(tzinfo=pytz.UTC).astimezone(zone) for ts in timestamps]
+
+
+def _assert_same(converted, expected):
+    assert len(converted) == len(expected)
+    for got, want in zip(converted, expected):
+        assert got.isoformat() == want.isoformat()
+        assert got.tzname() == want.tzname()
+        assert got.tzinfo is want.tzinfo
+
+
+def test_pytz_internals_used_by_offset_table_are_present():
+    # OffsetTable reads these private pytz attributes; an upgrade that renames them must fail here.
+    zone = get_zone("America/New_York")
+    assert isinstance(zone._utc_transition_times, list)
+    assert len(zone._utc_transition_times) == len(zone._transition_info)
+    assert all(info in zone._tzinfos for info in zone._transition_info)
+    assert not getattr(get_zone("UTC"), "_utc_transition_times", None)
+
+
+@pytest.mark.parametrize("zone_name", ZONES)
+def test_matches_pytz_around_every_transition(zone_name):
+    transitions = getattr(get_zone(zone_name), "_utc_transition_times", None) or []
+    near = [t for t in transitions if datetime(2015, 1, 1) <= t <= datetime(2035, 1, 1)]
+    timestamps = sorted(
+        t + timedelta(seconds=delta) for t in near for delta in (-3600, -1, 0, 1, 3600)
+    ) or [datetime(2024, 3, 10, 7)]
+
+    _assert_same(to_local_many(timestamps, zone_name), _expected(timestamps, zone_name))
+
+
+@pytest.mark.parametrize("zone_name", ZONES)
+def test_matches_pytz_for_random_sorted_and_unsorted_input(zone_name):
+    rng = random.Random(zone_name)
+    start = datetime(2023, 1, 1)
+    timestamps = [start + timedelta(seconds=rng.randrange(3 * 365 * 86400)) for _ in range(2000)]
+
+    _assert_same(to_local_many(sorted(timestamps), zone_name), _expected(sorted(timestamps), zone_name))
+    _assert_same(to_local_many(timestamps, zone_name), _expected(timestamps, zone_name))
+
+
+def test_aware_input_and_single_lookups():
+    table = OffsetTable("Europe/London", datetime(2024, 3, 1), datetime(2024, 11, 1))
+    aware = pytz.timezone("Asia/Tokyo").localize(datetime(2024, 7, 1, 18))
+    local = table.to_local(aware)
+
+    assert local.isoformat() == "2024-07-01T10:00:00+01:00"
+    assert table.to_local(datetime(2024, 12, 1, 12)).isoformat() == "2024-12-01T12:00:00+00:00"